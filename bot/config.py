@@ -12,6 +12,8 @@ class Settings(BaseSettings):
     master_key: str  # 32 bytes hex для шифрования
     rpc_url: str  # URL RPC ноды BNB Chain
     admin_telegram_id: int = 0  # ID администратора для команды /get_db
+    sync_users_concurrency: int = 20  # Пользователей, синхронизируемых одновременно
+    predict_api_concurrency: int = 16  # Одновременных batch-операций с ордерами в API
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -8,12 +8,15 @@
 - Экспорта данных
 """
 
+import asyncio
 import csv
 import io
 import logging
+import time
 import zipfile
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
 import aiosqlite
 from aes import decrypt, encrypt
@@ -24,6 +27,11 @@ logger = logging.getLogger(__name__)
 # Путь к базе данных SQLite (в той же папке, что и скрипт)
 DB_PATH = Path(__file__).parent / "users.db"
 
+# Кеш факта регистрации пользователя (для /start): telegram_id -> (время записи, зарегистрирован)
+USER_REGISTERED_CACHE_TTL = 60  # секунд
+USER_REGISTERED_CACHE_MAXSIZE = 10_000
+_user_registered_cache: "OrderedDict[int, Tuple[float, bool]]" = OrderedDict()
+
 
 async def init_database():
     """Инициализирует базу данных SQLite."""
@@ -136,6 +144,12 @@ async def init_database():
             if "duplicate column" not in str(e).lower():
                 logger.warning(f"Ошибка при добавлении поля proxy_status: {e}")
 
+        # Создаем индекс для выборки пользователей с настроенным прокси
+        # (после миграции, так как в старых БД поля proxy_str может не быть)
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_users_proxy_str ON users(proxy_str)
+        """)
+
         await conn.commit()
     logger.info("База данных инициализирована")
 
@@ -262,6 +276,39 @@ async def get_user(telegram_id: int) -> Optional[dict]:
         return None
 
 
+def invalidate_user_registered_cache(telegram_id: int):
+    """Сбрасывает закешированный факт регистрации пользователя."""
+    _user_registered_cache.pop(telegram_id, None)
+
+
+async def is_user_registered(telegram_id: int) -> bool:
+    """
+    Проверяет, зарегистрирован ли пользователь (с TTL кешем в памяти).
+
+    Кешируется только булев результат, расшифрованные данные в памяти не хранятся.
+    Кеш сбрасывается при сохранении и удалении пользователя.
+
+    Args:
+        telegram_id: ID пользователя в Telegram
+
+    Returns:
+        bool: True если пользователь зарегистрирован
+    """
+    now = time.monotonic()
+    cached = _user_registered_cache.get(telegram_id)
+    if cached is not None and now - cached[0] < USER_REGISTERED_CACHE_TTL:
+        _user_registered_cache.move_to_end(telegram_id)
+        return cached[1]
+
+    registered = await get_user(telegram_id) is not None
+
+    _user_registered_cache[telegram_id] = (now, registered)
+    _user_registered_cache.move_to_end(telegram_id)
+    if len(_user_registered_cache) > USER_REGISTERED_CACHE_MAXSIZE:
+        _user_registered_cache.popitem(last=False)
+    return registered
+
+
 async def save_user(
     telegram_id: int,
     username: Optional[str],
@@ -313,6 +360,7 @@ async def save_user(
         )
 
         await conn.commit()
+    invalidate_user_registered_cache(telegram_id)
     logger.info(f"Пользователь {telegram_id} сохранен в базу данных")
 
 
@@ -523,59 +571,129 @@ async def update_order_status(order_hash: str, status: str):
     logger.info(f"Статус ордера {order_hash} обновлен на {status}")
 
 
-async def update_order_in_db(
-    old_order_hash: str,
-    new_order_hash: str,
-    new_current_price: float,
-    new_target_price: float,
-    new_order_api_id: Optional[str] = None,
+async def bulk_update_order_status(status_updates: List[Tuple[str, str]]):
+    """
+    Обновляет статусы нескольких ордеров одним executemany и одним коммитом.
+
+    Args:
+        status_updates: Список пар (order_hash, status)
+    """
+    if not status_updates:
+        return
+
+    async with aiosqlite.connect(DB_PATH) as conn:
+        await conn.executemany(
+            """
+            UPDATE orders 
+            SET status = ?
+            WHERE order_hash = ?
+        """,
+            [(status, order_hash) for order_hash, status in status_updates],
+        )
+
+        await conn.commit()
+    logger.info(f"Обновлены статусы {len(status_updates)} ордеров")
+
+
+async def bulk_update_orders_in_db(
+    order_updates: List[Tuple[str, str, float, float, Optional[str]]],
 ):
     """
-    Обновляет order_hash, order_api_id и цену ордера в БД.
+    Обновляет order_hash, order_api_id и цены нескольких ордеров одним коммитом.
 
     Args:
-        old_order_hash: Старый hash ордера
-        new_order_hash: Новый hash ордера
-        new_current_price: Новая текущая цена
-        new_target_price: Новая целевая цена
-        new_order_api_id: Новый ID ордера из API (bigint string) для off-chain отмены
+        order_updates: Список кортежей (old_order_hash, new_order_hash,
+            new_current_price, new_target_price, new_order_api_id).
+            Если new_order_api_id пустой, order_api_id в БД не меняется.
     """
+    if not order_updates:
+        return
+
     async with aiosqlite.connect(DB_PATH) as conn:
-        if new_order_api_id:
-            await conn.execute(
-                """
-                UPDATE orders 
-                SET order_hash = ?, order_api_id = ?, current_price = ?, target_price = ?
-                WHERE order_hash = ?
-            """,
+        await conn.executemany(
+            """
+            UPDATE orders 
+            SET order_hash = ?, order_api_id = COALESCE(?, order_api_id),
+                current_price = ?, target_price = ?
+            WHERE order_hash = ?
+        """,
+            [
                 (
                     new_order_hash,
-                    new_order_api_id,
+                    new_order_api_id or None,
                     new_current_price,
                     new_target_price,
                     old_order_hash,
-                ),
-            )
-        else:
-            await conn.execute(
-                """
-                UPDATE orders 
-                SET order_hash = ?, current_price = ?, target_price = ?
-                WHERE order_hash = ?
-            """,
-                (new_order_hash, new_current_price, new_target_price, old_order_hash),
-            )
+                )
+                for (
+                    old_order_hash,
+                    new_order_hash,
+                    new_current_price,
+                    new_target_price,
+                    new_order_api_id,
+                ) in order_updates
+            ],
+        )
 
         await conn.commit()
-    logger.info(f"Обновлен ордер {old_order_hash} -> {new_order_hash} в БД")
+    logger.info(f"Обновлено {len(order_updates)} ордеров в БД")
+
+
+async def iter_all_users(page_size: int = 500) -> AsyncIterator[int]:
+    """
+    Постранично отдает telegram_id всех пользователей из БД.
+
+    Каждая страница читается отдельным коротким соединением (keyset-пагинация
+    по telegram_id), поэтому чтение не удерживает блокировку БД, пока
+    вызывающий код обрабатывает пользователей.
+
+    Args:
+        page_size: Размер страницы
+
+    Yields:
+        telegram_id пользователя
+    """
+    last_id = None
+    while True:
+        async with aiosqlite.connect(DB_PATH) as conn:
+            if last_id is None:
+                query = "SELECT telegram_id FROM users ORDER BY telegram_id LIMIT ?"
+                params = (page_size,)
+            else:
+                query = (
+                    "SELECT telegram_id FROM users WHERE telegram_id > ? "
+                    "ORDER BY telegram_id LIMIT ?"
+                )
+                params = (last_id, page_size)
+            async with conn.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+
+        for row in rows:
+            yield row[0]
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1][0]
 
 
-async def get_all_users():
-    """Получает список всех пользователей из БД."""
+async def get_users_with_proxy() -> list:
+    """
+    Получает пользователей, у которых настроен прокси.
+
+    Returns:
+        list: Список словарей {'telegram_id': int, 'proxy_str': str, 'proxy_status': str}
+    """
     async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute("SELECT telegram_id FROM users") as cursor:
+        async with conn.execute(
+            """
+            SELECT telegram_id, proxy_str, proxy_status FROM users
+            WHERE proxy_str IS NOT NULL AND proxy_str != ''
+        """
+        ) as cursor:
             rows = await cursor.fetchall()
-    return [row[0] for row in rows]
+    return [
+        {"telegram_id": row[0], "proxy_str": row[1], "proxy_status": row[2]}
+        for row in rows
+    ]
 
 
 async def update_proxy_status(telegram_id: int, proxy_status: str):
@@ -667,6 +785,7 @@ async def delete_user(telegram_id: int) -> bool:
         await conn.execute("DELETE FROM users WHERE telegram_id = ?", (telegram_id,))
 
         await conn.commit()
+        invalidate_user_registered_cache(telegram_id)
 
         logger.info(
             f"Пользователь {telegram_id} удален из БД (удалено {orders_deleted} ордеров, очищено {invites_cleared} инвайтов)"
@@ -674,57 +793,56 @@ async def delete_user(telegram_id: int) -> bool:
         return True
 
 
-async def check_wallet_address_exists(wallet_address: str) -> bool:
+def _contains_encrypted_value(rows: list, value: str, field_name: str) -> bool:
     """
-    Проверяет, существует ли уже пользователь с таким wallet_address.
+    Расшифровывает строки (cipher, nonce) и ищет среди них значение.
+
+    Синхронная функция: вызывается в отдельном потоке, чтобы расшифровка
+    всех пользователей не блокировала event loop.
 
     Args:
-        wallet_address: Адрес кошелька для проверки
+        rows: Строки вида (cipher, nonce)
+        value: Искомое значение
+        field_name: Имя поля (для логов)
 
     Returns:
-        bool: True если wallet_address уже существует, False если уникален
+        bool: True если значение найдено
     """
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute(
-            "SELECT wallet_address, wallet_nonce FROM users"
-        ) as cursor:
-            rows = await cursor.fetchall()
-
-    # Если база пустая, сразу возвращаем False
-    if not rows:
-        return False
-
     for row in rows:
         # Проверяем, что данные не пустые
         if not row[0] or not row[1]:
             continue
 
         try:
-            existing_wallet = decrypt(row[0], row[1])
-            if existing_wallet == wallet_address:
+            if decrypt(row[0], row[1]) == value:
                 return True
         except Exception as e:
             logger.warning(
-                f"Ошибка при расшифровке wallet_address для проверки уникальности: {e}"
+                f"Ошибка при расшифровке {field_name} для проверки уникальности: {e}"
             )
             continue
 
     return False
 
 
-async def check_private_key_exists(private_key: str) -> bool:
+async def _encrypted_value_exists(
+    cipher_column: str, nonce_column: str, value: str, field_name: str
+) -> bool:
     """
-    Проверяет, существует ли уже пользователь с таким private_key.
+    Проверяет, есть ли у какого-либо пользователя зашифрованное значение value.
 
     Args:
-        private_key: Приватный ключ для проверки
+        cipher_column: Колонка с шифротекстом
+        nonce_column: Колонка с nonce
+        value: Искомое значение
+        field_name: Имя поля (для логов)
 
     Returns:
-        bool: True если private_key уже существует, False если уникален
+        bool: True если значение уже существует, False если уникально
     """
     async with aiosqlite.connect(DB_PATH) as conn:
         async with conn.execute(
-            "SELECT private_key_cipher, private_key_nonce FROM users"
+            f"SELECT {cipher_column}, {nonce_column} FROM users"
         ) as cursor:
             rows = await cursor.fetchall()
 
@@ -732,60 +850,54 @@ async def check_private_key_exists(private_key: str) -> bool:
     if not rows:
         return False
 
-    for row in rows:
-        # Проверяем, что данные не пустые
-        if not row[0] or not row[1]:
-            continue
+    return await asyncio.to_thread(
+        _contains_encrypted_value, rows, value, field_name
+    )
 
-        try:
-            existing_private_key = decrypt(row[0], row[1])
-            if existing_private_key == private_key:
-                return True
-        except Exception as e:
-            logger.warning(
-                f"Ошибка при расшифровке private_key для проверки уникальности: {e}"
-            )
-            continue
 
-    return False
+async def check_wallet_address_exists(wallet_address: str) -> bool:
+    """
+    Проверяет, существует ли уже пользователь с таким wallet_address.
 
+    Args:
+        wallet_address: Адрес кошелька для проверки
 
-async def check_api_key_exists(api_key: str) -> bool:
+    Returns:
+        bool: True если wallet_address уже существует, False если уникален
     """
-    Проверяет, существует ли уже пользователь с таким api_key.
+    return await _encrypted_value_exists(
+        "wallet_address", "wallet_nonce", wallet_address, "wallet_address"
+    )
+
+
+async def check_private_key_exists(private_key: str) -> bool:
+    """
+    Проверяет, существует ли уже пользователь с таким private_key.
 
     Args:
-        api_key: API ключ для проверки
+        private_key: Приватный ключ для проверки
 
     Returns:
-        bool: True если api_key уже существует, False если уникален
+        bool: True если private_key уже существует, False если уникален
     """
-    async with aiosqlite.connect(DB_PATH) as conn:
-        async with conn.execute(
-            "SELECT api_key_cipher, api_key_nonce FROM users"
-        ) as cursor:
-            rows = await cursor.fetchall()
+    return await _encrypted_value_exists(
+        "private_key_cipher", "private_key_nonce", private_key, "private_key"
+    )
 
-    # Если база пустая, сразу возвращаем False
-    if not rows:
-        return False
 
-    for row in rows:
-        # Проверяем, что данные не пустые
-        if not row[0] or not row[1]:
-            continue
+async def check_api_key_exists(api_key: str) -> bool:
+    """
+    Проверяет, существует ли уже пользователь с таким api_key.
 
-        try:
-            existing_api_key = decrypt(row[0], row[1])
-            if existing_api_key == api_key:
-                return True
-        except Exception as e:
-            logger.warning(
-                f"Ошибка при расшифровке api_key для проверки уникальности: {e}"
-            )
-            continue
+    Args:
+        api_key: API ключ для проверки
 
-    return False
+    Returns:
+        bool: True если api_key уже существует, False если уникален
+    """
+    return await _encrypted_value_exists(
+        "api_key_cipher", "api_key_nonce", api_key, "api_key"
+    )
 
 
 async def export_table_to_csv(conn: aiosqlite.Connection, table_name: str) -> str:
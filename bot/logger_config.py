@@ -6,9 +6,11 @@
 """
 
 import asyncio
+import atexit
 import logging
+import queue
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from typing import Optional
 
@@ -18,6 +20,9 @@ _last_alert_time = 0
 _alert_cooldown = 300  # 5 минут между уведомлениями
 _alert_ignore_patterns = ("Tunnel connection failed: 410 Gone",)
 
+# Фоновый поток, который пишет логи в файл и консоль (запись не блокирует event loop)
+_log_listener: Optional[QueueListener] = None
+
 
 def _create_handlers(
     log_file: Path, file_level: int = logging.INFO, console_level: int = logging.WARNING
@@ -87,6 +92,9 @@ class AdminAlertHandler(logging.Handler):
             return
 
         message = record.getMessage()
+        # logger.exception не включает текст исключения в сообщение - добавляем его
+        if record.exc_info and record.exc_info[1] is not None:
+            message = f"{message}: {record.exc_info[1]}"
         if any(pattern in message for pattern in _alert_ignore_patterns):
             return
 
@@ -150,12 +158,20 @@ def setup_root_logger(
     root_logger.setLevel(min(file_level, console_level))
 
     # Создаем обработчики для корневого логгера с разными уровнями
+    # Файл и консоль обслуживает QueueListener в отдельном потоке,
+    # а в корневой логгер добавляется только быстрый QueueHandler
+    global _log_listener
     log_file = logs_dir / log_filename
     file_handler, console_handler = _create_handlers(
         log_file, file_level, console_level
     )
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger.addHandler(QueueHandler(log_queue))
+    _log_listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+    atexit.register(stop_log_listener)
 
     # Добавляем обработчик для уведомлений администратора (будет настроен позже)
     admin_handler = AdminAlertHandler()
@@ -163,6 +179,14 @@ def setup_root_logger(
     root_logger.addHandler(admin_handler)
 
 
+def stop_log_listener() -> None:
+    """Останавливает фоновый поток логирования, дописав оставшиеся записи."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
 def set_admin_alert_callback(callback):
     """
     Устанавливает функцию обратного вызова для отправки уведомлений администратору.
@@ -33,13 +33,27 @@ from log_utils import send_admin_with_latest_log
 from logger_config import set_admin_alert_callback, setup_root_logger
 from market_router import market_router
 from orders_dialog import OrdersSG, orders_dialog
-from predict_api import PredictAPIClient, get_chain_id, get_usdt_balance
+from predict_api import (
+    PredictAPIClient,
+    format_usdt,
+    get_chain_id,
+    get_usdt_balance,
+)
+from predict_api.auth import close_blocking_executor, run_blocking
 from predict_sdk import OrderBuilder, OrderBuilderOptions
-from proxy_checker import async_check_all_proxies
+from proxy_checker import (
+    async_check_all_proxies,
+    close_probe_session,
+    notification_worker,
+)
 from referral_router import referral_router
-from spam_protection import AntiSpamMiddleware
+from spam_protection import AntiSpamMiddleware, OutgoingRateLimitMiddleware
 from start_router import start_router
-from sync_orders import async_sync_all_orders
+from sync_orders import (
+    async_sync_all_orders,
+    close_http_session,
+    close_notifications,
+)
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -56,6 +70,9 @@ bot = Bot(
 dp = Dispatcher(storage=MemoryStorage())
 router = Router()
 
+# Задача отправки уведомлений о статусе прокси (отменяется при остановке)
+_proxy_notify_task = None
+
 
 # ============================================================================
 # States for support command
@@ -180,7 +197,7 @@ async def cmd_check_account(message: Message):
         )
 
         chain_id = get_chain_id()
-        order_builder = await asyncio.to_thread(
+        order_builder = await run_blocking(
             OrderBuilder.make,
             chain_id,
             user["private_key"],
@@ -189,7 +206,7 @@ async def cmd_check_account(message: Message):
 
         # Получаем баланс USDT
         balance_wei = await get_usdt_balance(order_builder)
-        balance_usdt = balance_wei / 1e18
+        balance_usdt = format_usdt(balance_wei)
 
         # Получаем открытые ордера
         open_orders, _ = await api_client.get_my_orders(status="OPEN")
@@ -213,7 +230,7 @@ async def cmd_check_account(message: Message):
         # Формируем ответ
         response = f"""📊 <b>Account Information</b>
 
-💰 <b>USDT Balance:</b> {balance_usdt:.6f} USDT
+💰 <b>USDT Balance:</b> {balance_usdt} USDT
 
 📋 <b>Open Orders:</b> {open_orders_count}
 
@@ -402,6 +419,10 @@ async def background_sync_task():
 
 async def background_proxy_check_task():
     """Фоновая задача для периодической проверки прокси."""
+    global _proxy_notify_task
+    # Запускаем отправку уведомлений о статусе прокси в фоне
+    _proxy_notify_task = asyncio.create_task(notification_worker(bot))
+
     # Ждем 60 секунд после старта бота перед первой проверкой
     await asyncio.sleep(60)
 
@@ -418,6 +439,19 @@ async def background_proxy_check_task():
         await asyncio.sleep(CHECK_INTERVAL)
 
 
+async def stop_proxy_notifications():
+    """Останавливает задачу уведомлений о статусе прокси (вызывается при остановке бота)."""
+    global _proxy_notify_task
+    task, _proxy_notify_task = _proxy_notify_task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 async def main():
     """Главная функция запуска бота."""
 
@@ -437,9 +471,23 @@ async def main():
         set_admin_alert_callback(admin_alert_callback)
         logger.info("Admin alert handler configured")
 
+    # Останавливаем уведомления о статусе прокси до закрытия HTTP сессии проверки
+    dp.shutdown.register(stop_proxy_notifications)
+    # Закрываем общую HTTP сессию проверки прокси при остановке
+    dp.shutdown.register(close_probe_session)
+    # Останавливаем общий пул потоков блокирующих вызовов API/SDK при остановке
+    dp.shutdown.register(close_blocking_executor)
+    # Закрываем общую HTTP сессию API клиентов при остановке
+    dp.shutdown.register(close_http_session)
+    # Дожидаемся фоновых уведомлений синхронизации (пока сессия бота открыта)
+    dp.shutdown.register(close_notifications)
+
     # Регистрируем middleware для антиспама (глобально)
     dp.message.middleware(AntiSpamMiddleware(bot=bot))
     dp.callback_query.middleware(AntiSpamMiddleware(bot=bot))
+    # Единый лимит исходящих запросов Telegram (~30 сообщений/сек на бота,
+    # ~1 сообщение/сек в один чат)
+    bot.session.middleware(OutgoingRateLimitMiddleware())
 
     # Регистрируем диалоги
     dp.include_router(orders_dialog)
@@ -480,4 +528,11 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        # uvloop (libuv) заметно быстрее стандартного цикла событий на множестве
+        # мелких await (API, БД, уведомления); на Windows он недоступен
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
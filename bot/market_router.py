@@ -3,10 +3,9 @@ Router for market order placement flow (/make_market command).
 Handles the complete order placement process from URL input to order confirmation.
 """
 
-import asyncio
 import hashlib
 import logging
-from datetime import datetime
+import time
 from typing import Optional, Tuple
 from urllib.parse import urlparse
 
@@ -19,7 +18,7 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 from config import TICK_SIZE
 from database import get_user, save_order
 from predict_api import PredictAPIClient
-from predict_api.auth import get_chain_id
+from predict_api.auth import get_chain_id, run_blocking
 from predict_api.sdk_operations import get_usdt_balance, place_single_order
 from predict_sdk import OrderBuilder, OrderBuilderOptions, Side
 
@@ -338,7 +337,7 @@ async def process_market_url(message: Message, state: FSMContext):
 
         # Создаем OrderBuilder для SDK операций
         chain_id = get_chain_id()
-        order_builder = await asyncio.to_thread(
+        order_builder = await run_blocking(
             OrderBuilder.make,
             chain_id,
             user["private_key"],
@@ -347,8 +346,10 @@ async def process_market_url(message: Message, state: FSMContext):
     except Exception as e:
         # Генерируем код ошибки для сопоставления с логами
         error_str = str(e)
-        error_hash = hashlib.md5(error_str.encode()).hexdigest()[:8].upper()
-        error_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        error_hash = (
+            hashlib.blake2b(error_str.encode(), digest_size=4).hexdigest().upper()
+        )
+        error_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
 
         await message.answer(
             f"""❌ Failed to create API client.
@@ -16,6 +16,7 @@ from .sdk_operations import (
     build_and_sign_limit_order,
     calculate_new_target_price,
     cancel_orders_via_sdk,
+    format_usdt,
     get_usdt_balance,
     place_single_order,
     set_approvals,
@@ -29,6 +30,7 @@ __all__ = [
     "get_chain_id",
     "get_api_base_url",
     "get_usdt_balance",
+    "format_usdt",
     "cancel_orders_via_sdk",
     "build_and_sign_limit_order",
     "set_approvals",
@@ -6,8 +6,10 @@
 """
 
 import asyncio
+import functools
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Tuple
 
 import requests
@@ -22,6 +24,14 @@ JWT_RETRYABLE_STATUS_CODES = {502, 503, 504}
 JWT_RETRY_BASE_DELAY_SECONDS = 1.0
 JWT_REFRESH_COOLDOWN_SECONDS = 60
 
+# Единый пул потоков для всех блокирующих вызовов Predict: HTTP запросы (requests)
+# и синхронные методы SDK (OrderBuilder). Не конкурирует за default executor
+# с остальным кодом бота; все такие вызовы идут через run_blocking()
+BLOCKING_EXECUTOR_MAX_WORKERS = 32
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_EXECUTOR_MAX_WORKERS, thread_name_prefix="predict"
+)
+
 
 # Базовый URL API (использует переменные окружения)
 def get_api_base_url() -> str:
@@ -107,6 +117,28 @@ def _format_request_error(context: str, error: Exception) -> str:
     return f"{context}: {error.__class__.__name__}: {error}"
 
 
+async def run_blocking(func, *args, **kwargs):
+    """
+    Выполняет блокирующий вызов в общем пуле потоков, не блокируя event loop.
+
+    Args:
+        func: Синхронная функция (запрос requests, метод OrderBuilder и т.п.)
+        *args, **kwargs: Аргументы func
+
+    Returns:
+        Результат func
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _blocking_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def close_blocking_executor():
+    """Останавливает общий пул потоков блокирующих вызовов (при остановке бота)."""
+    _blocking_executor.shutdown(wait=False)
+
+
 async def _sleep_with_backoff(attempt: int) -> None:
     """Ожидает перед повторной попыткой с экспоненциальной задержкой."""
     delay = JWT_RETRY_BASE_DELAY_SECONDS * (2**attempt)
@@ -136,7 +168,8 @@ async def get_jwt_token_predict_account(
         try:
             # Создаем OrderBuilder для Predict account
             chain_id = get_chain_id()
-            builder = OrderBuilder.make(
+            builder = await run_blocking(
+                OrderBuilder.make,
                 chain_id,
                 private_key,
                 OrderBuilderOptions(predict_account=wallet_address),
@@ -145,7 +178,8 @@ async def get_jwt_token_predict_account(
             # Шаг 1: Получаем сообщение для подписи
             api_base_url = get_api_base_url()
             try:
-                message_response = requests.get(
+                message_response = await run_blocking(
+                    requests.get,
                     f"{api_base_url}/auth/message",
                     headers={"x-api-key": api_key},
                     timeout=JWT_REQUEST_TIMEOUT_SECONDS,
@@ -198,7 +232,9 @@ async def get_jwt_token_predict_account(
                 return None, last_error
 
             # Шаг 2: Подписываем сообщение через SDK (для Predict accounts)
-            signature = builder.sign_predict_account_message(message)
+            signature = await run_blocking(
+                builder.sign_predict_account_message, message
+            )
 
             # Шаг 3: Получаем JWT токен
             body = {
@@ -208,7 +244,8 @@ async def get_jwt_token_predict_account(
             }
 
             try:
-                jwt_response = requests.post(
+                jwt_response = await run_blocking(
+                    requests.post,
                     f"{api_base_url}/auth",
                     headers={
                         "Content-Type": "application/json",
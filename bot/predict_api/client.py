@@ -10,16 +10,53 @@ import logging
 from typing import Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError as RequestsConnectionError
 from requests.exceptions import ProxyError, RequestException, Timeout
 
-from .auth import get_api_base_url, refresh_jwt_token_if_needed
+from .auth import get_api_base_url, refresh_jwt_token_if_needed, run_blocking
 
 logger = logging.getLogger(__name__)
 
 REQUEST_TIMEOUT_SECONDS = 30
 REQUEST_RETRY_ATTEMPTS = 2
 RETRYABLE_STATUS_CODES = {502, 503, 504}
+HTTP_POOL_MAXSIZE = 100  # Максимум keep-alive соединений в пуле HTTP сессии
+
+
+def create_http_session() -> requests.Session:
+    """
+    Создает HTTP сессию с пулом keep-alive соединений.
+
+    Сессию можно разделять между несколькими клиентами, чтобы не тратить время
+    на TCP/TLS handshake при каждом запросе.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Общая HTTP сессия для клиентов, которым не передали свою
+# (клиенты создаются на каждый запрос пользователя и не закрываются)
+_shared_http_session: Optional[requests.Session] = None
+
+
+def get_shared_http_session() -> requests.Session:
+    """Возвращает общую HTTP сессию API клиентов (создает при первом вызове)."""
+    global _shared_http_session
+    if _shared_http_session is None:
+        _shared_http_session = create_http_session()
+    return _shared_http_session
+
+
+def close_shared_http_session():
+    """Закрывает общую HTTP сессию API клиентов (вызывается при остановке бота)."""
+    global _shared_http_session
+    if _shared_http_session is not None:
+        _shared_http_session.close()
+    _shared_http_session = None
 
 
 class PredictAPIClient:
@@ -36,6 +73,7 @@ class PredictAPIClient:
         wallet_address: str,
         private_key: str,
         proxy_str: Optional[str] = None,
+        http_session: Optional[requests.Session] = None,
     ):
         """
         Инициализирует API клиент.
@@ -45,6 +83,8 @@ class PredictAPIClient:
             wallet_address: Deposit Address (адрес Predict Account)
             private_key: Приватный ключ Privy Wallet
             proxy_str: Прокси в формате ip:port:login:password (опционально)
+            http_session: HTTP сессия (опционально). Если не передана,
+                используется общая сессия get_shared_http_session()
         """
         self.api_key = api_key
         self.wallet_address = wallet_address
@@ -65,6 +105,11 @@ class PredictAPIClient:
             "proxies": self.proxies,
         }
 
+        # HTTP сессия с пулом соединений (переиспользуется между запросами и клиентами)
+        self._http = (
+            http_session if http_session is not None else get_shared_http_session()
+        )
+
     async def _get_headers(self, force_refresh: bool = False) -> Dict[str, str]:
         """
         Получить заголовки для API запросов с актуальным JWT токеном.
@@ -134,7 +179,7 @@ class PredictAPIClient:
             for attempt in range(REQUEST_RETRY_ATTEMPTS):
                 # Выполняем запрос в отдельном потоке
                 def _make_request_sync():
-                    response = requests.request(
+                    response = self._http.request(
                         method=method,
                         url=url,
                         headers=headers,
@@ -146,7 +191,7 @@ class PredictAPIClient:
                     return response
 
                 try:
-                    response = await asyncio.to_thread(_make_request_sync)
+                    response = await run_blocking(_make_request_sync)
                 except Timeout as e:
                     logger.warning(
                         f"Таймаут API запроса {method} {url}: {e} "
@@ -180,7 +225,7 @@ class PredictAPIClient:
                     headers = await self._get_headers(force_refresh=True)
 
                     def _retry_request_sync():
-                        return requests.request(
+                        return self._http.request(
                             method=method,
                             url=url,
                             headers=headers,
@@ -190,7 +235,7 @@ class PredictAPIClient:
                             proxies=self.proxies,
                         )
 
-                    response = await asyncio.to_thread(_retry_request_sync)
+                    response = await run_blocking(_retry_request_sync)
 
                 if (
                     response.status_code in RETRYABLE_STATUS_CODES
@@ -23,9 +23,15 @@ from predict_sdk import (
     Side,
 )
 
+from .auth import run_blocking
+
 # Константа для размера тика (совпадает с config.TICK_SIZE)
 TICK_SIZE = 0.001
 
+# Допустимый диапазон цены ордера (требования API)
+MIN_PRICE = 0.001
+MAX_PRICE = 0.999
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,21 +58,40 @@ def calculate_new_target_price(
     else:  # SELL
         target = new_current_price + offset_ticks * tick_size
 
-    # Ограничиваем диапазоном 0.001 - 0.999 (требования API)
-    MIN_PRICE = 0.001
-    MAX_PRICE = 0.999
-    target = max(MIN_PRICE, min(MAX_PRICE, target))
-    target = round(target, 3)
-    # Форматируем и преобразуем обратно в float для гарантии точности (избегаем проблем с float)
-    target = float(f"{target:.3f}")
+    # Ограничиваем диапазоном 0.001 - 0.999 (требования API) и округляем до тика.
+    # round() дает тот же float, что и float(f"{target:.3f}"), а границы диапазона
+    # уже кратны 0.001, поэтому повторная проверка после округления не нужна.
+    return round(max(MIN_PRICE, min(MAX_PRICE, target)), 3)
 
-    # Проверяем, что после округления цена все еще в допустимом диапазоне
-    if target < MIN_PRICE:
-        target = MIN_PRICE
-    elif target > MAX_PRICE:
-        target = MAX_PRICE
 
-    return target
+def format_usdt(amount_wei: int, decimals: int = 6, strip_zeros: bool = False) -> str:
+    """
+    Форматирует сумму в wei как USDT без промежуточного float (точно для любых сумм).
+
+    Args:
+        amount_wei: Сумма в wei (1 USDT = 10**18 wei)
+        decimals: Количество знаков после запятой (округление половины вверх)
+        strip_zeros: Убрать хвостовые нули дробной части (и точку, если она пуста)
+
+    Returns:
+        Строка вида "123.456789" ("100" / "1.5" при strip_zeros=True)
+
+    Example:
+        format_usdt(1_234_567_890_000_000_000)  # "1.234568"
+    """
+    unit = 10 ** (18 - decimals)
+    scaled, remainder = divmod(amount_wei, unit)
+    if remainder * 2 >= unit:
+        scaled += 1
+    whole, frac = divmod(scaled, 10**decimals)
+    if strip_zeros:
+        # Нули убираются арифметически, без промежуточных строк
+        while frac and frac % 10 == 0:
+            frac //= 10
+            decimals -= 1
+        if not frac:
+            decimals = 0
+    return f"{whole}.{frac:0{decimals}d}" if decimals else str(whole)
 
 
 async def get_usdt_balance(order_builder: OrderBuilder) -> int:
@@ -86,11 +111,11 @@ async def get_usdt_balance(order_builder: OrderBuilder) -> int:
         balance_usdt = balance_wei / 1e18
     """
     try:
-        # SDK метод balanceOf() синхронный, оборачиваем в asyncio.to_thread
+        # SDK метод balanceOf() синхронный, выполняем в общем пуле потоков (run_blocking)
         # В Python SDK balanceOf требует аргумент "USDT" для указания токена
-        balance_wei = await asyncio.to_thread(order_builder.balance_of, "USDT")
+        balance_wei = await run_blocking(order_builder.balance_of, "USDT")
         logger.info(
-            f"Баланс USDT получен: {balance_wei} wei ({balance_wei / 1e18:.6f} USDT)"
+            f"Баланс USDT получен: {balance_wei} wei ({format_usdt(balance_wei)} USDT)"
         )
         return balance_wei
     except Exception as e:
@@ -211,19 +236,20 @@ async def cancel_orders_via_sdk(
                 is_neg_risk=group_is_neg_risk, is_yield_bearing=group_is_yield_bearing
             )
 
-            # SDK метод синхронный, оборачиваем в asyncio.to_thread
-            result = await asyncio.to_thread(
+            # SDK метод синхронный, выполняем в общем пуле потоков (run_blocking)
+            result = await run_blocking(
                 order_builder.cancel_orders, group_orders, options
             )
 
             if result.success:
                 logger.info(f"Успешно отменено {len(group_orders)} ордеров в группе")
-                if hasattr(result, "receipt") and result.receipt:
-                    all_receipts.append(result.receipt)
+                receipt = getattr(result, "receipt", None)
+                if receipt:
+                    all_receipts.append(receipt)
             else:
                 logger.error(f"Ошибка отмены группы ордеров: {result.cause}")
                 all_success = False
-                if hasattr(result, "cause") and result.cause:
+                if getattr(result, "cause", None):
                     all_causes.append(
                         f"Group (isNegRisk={group_is_neg_risk}, isYieldBearing={group_is_yield_bearing}): {result.cause}"
                     )
@@ -239,10 +265,7 @@ async def cancel_orders_via_sdk(
         }
 
     except Exception as e:
-        logger.error(f"Исключение при отмене ордеров через SDK: {e}")
-        import traceback
-
-        logger.error(traceback.format_exc())
+        logger.exception("Исключение при отмене ордеров через SDK")
         return {"success": False, "cause": str(e)}
 
 
@@ -283,7 +306,7 @@ async def build_and_sign_limit_order(
     """
     try:
         # Шаг 1: Рассчитываем суммы для ордера
-        amounts = await asyncio.to_thread(
+        amounts = await run_blocking(
             order_builder.get_limit_order_amounts,
             LimitHelperInput(
                 side=side,
@@ -293,19 +316,22 @@ async def build_and_sign_limit_order(
         )
 
         # Отладочный лог: проверяем структуру объекта amounts
-        logger.debug(f"OrderAmounts object type: {type(amounts)}")
-        logger.debug(
-            f"OrderAmounts attributes: {[attr for attr in dir(amounts) if not attr.startswith('_')]}"
-        )
-        if hasattr(amounts, "__dict__"):
-            logger.debug(f"OrderAmounts __dict__: {amounts.__dict__}")
+        # (dir() строится только если DEBUG включен - это путь размещения каждого ордера)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("OrderAmounts object type: %s", type(amounts))
+            logger.debug(
+                "OrderAmounts attributes: %s",
+                [attr for attr in dir(amounts) if not attr.startswith("_")],
+            )
+            if hasattr(amounts, "__dict__"):
+                logger.debug("OrderAmounts __dict__: %s", amounts.__dict__)
 
         # Шаг 2: Строим ордер
         # Определяем expires_at: используем переданное значение или значение по умолчанию (30 дней)
         if expires_at is None:
             expires_at = datetime.now(timezone.utc) + timedelta(days=30)
 
-        order = await asyncio.to_thread(
+        order = await run_blocking(
             order_builder.build_order,
             "LIMIT",
             BuildOrderInput(
@@ -319,7 +345,7 @@ async def build_and_sign_limit_order(
         )
 
         # Шаг 3: Генерируем typed data
-        typed_data = await asyncio.to_thread(
+        typed_data = await run_blocking(
             order_builder.build_typed_data,
             order,
             is_neg_risk=is_neg_risk,
@@ -327,14 +353,12 @@ async def build_and_sign_limit_order(
         )
 
         # Шаг 4: Подписываем ордер
-        signed_order = await asyncio.to_thread(
+        signed_order = await run_blocking(
             order_builder.sign_typed_data_order, typed_data
         )
 
         # Шаг 5: Вычисляем hash ордера
-        order_hash = await asyncio.to_thread(
-            order_builder.build_typed_data_hash, typed_data
-        )
+        order_hash = await run_blocking(order_builder.build_typed_data_hash, typed_data)
 
         # Извлекаем signature из signed_order
         signature = (
@@ -370,11 +394,11 @@ async def build_and_sign_limit_order(
             "pricePerShare": str(amounts.price_per_share),
         }
 
-        logger.info(f"Ордер успешно построен и подписан: hash={order_hash}")
+        logger.info("Ордер успешно построен и подписан: hash=%s", order_hash)
         return result
 
     except Exception as e:
-        logger.error(f"Ошибка при построении и подписи ордера: {e}")
+        logger.error("Ошибка при построении и подписи ордера: %s", e)
         return None
 
 
@@ -404,52 +428,45 @@ async def set_approvals(
             "Начинаем установку approvals (может занять несколько минут, до 10 минут)..."
         )
         result = await asyncio.wait_for(
-            asyncio.to_thread(
+            run_blocking(
                 order_builder.set_approvals, is_yield_bearing=is_yield_bearing
             ),
             timeout=600.0,  # 10 минут таймаут (5 транзакций * 120 сек каждая)
         )
         logger.info("Установка approvals завершена")
 
-        if result.success:
-            logger.info("Approvals успешно установлены")
-        else:
-            # Собираем причины ошибок из неуспешных транзакций
-            failed_causes = []
-            for tx in result.transactions:
-                if not tx.success and hasattr(tx, "cause") and tx.cause:
-                    # cause может быть Exception или словарем с code/message
-                    if isinstance(tx.cause, dict):
-                        cause_msg = tx.cause.get("message", str(tx.cause))
-                    elif hasattr(tx.cause, "message"):
-                        cause_msg = tx.cause.message
-                    else:
-                        cause_msg = str(tx.cause)
-                    failed_causes.append(cause_msg)
-            cause_msg = "; ".join(failed_causes) if failed_causes else "Unknown error"
-            logger.warning(f"Некоторые approvals не установлены: {cause_msg}")
-
-        # Преобразуем результат в словарь
+        # Преобразуем результат в словарь за один проход по транзакциям
         transactions = []
+        failed_causes = []
         for tx in result.transactions:
-            # Правильно извлекаем cause (может быть Exception или словарем)
+            # Правильно извлекаем cause (может быть Exception или словарем с code/message)
             cause_value = None
-            if hasattr(tx, "cause") and tx.cause:
-                if isinstance(tx.cause, dict):
-                    cause_value = tx.cause.get("message", str(tx.cause))
-                elif hasattr(tx.cause, "message"):
-                    cause_value = tx.cause.message
+            cause = getattr(tx, "cause", None)
+            if cause:
+                if isinstance(cause, dict):
+                    cause_value = cause.get("message", str(cause))
+                elif hasattr(cause, "message"):
+                    cause_value = cause.message
                 else:
-                    cause_value = str(tx.cause)
+                    cause_value = str(cause)
+                if not tx.success:
+                    failed_causes.append(cause_value)
 
             transactions.append(
                 {
                     "success": tx.success,
                     "cause": cause_value,
-                    "receipt": tx.receipt if hasattr(tx, "receipt") else None,
+                    "receipt": getattr(tx, "receipt", None),
                 }
             )
 
+        if result.success:
+            logger.info("Approvals успешно установлены")
+        else:
+            # Собираем причины ошибок из неуспешных транзакций
+            cause_msg = "; ".join(failed_causes) if failed_causes else "Unknown error"
+            logger.warning(f"Некоторые approvals не установлены: {cause_msg}")
+
         return {"success": result.success, "transactions": transactions}
 
     except asyncio.TimeoutError:
@@ -502,14 +519,10 @@ async def place_single_order(
     """
     try:
         # Валидация цены
-        # API requires max 3 decimal places
-        # Используем форматирование для гарантии точности (избегаем проблем с float)
+        # API requires max 3 decimal places. round() уже дает ближайший к
+        # десятичному значению float (тот же, что float(f"{price:.3f}")),
+        # поэтому форматирование в строку и обратно не нужно.
         price_rounded = round(price, 3)
-        # Форматируем и преобразуем обратно в float для гарантии точности
-        price_rounded = float(f"{price_rounded:.3f}")
-
-        MIN_PRICE = 0.001
-        MAX_PRICE = 0.999
 
         if price_rounded < MIN_PRICE:
             error_msg = f"Price {price_rounded} is less than minimum {MIN_PRICE}"
@@ -526,7 +539,7 @@ async def place_single_order(
             try:
                 market = await api_client.get_market(market_id=market_id)
             except Exception as e:
-                logger.warning(f"Не удалось получить данные рынка {market_id}: {e}")
+                logger.warning("Не удалось получить данные рынка %s: %s", market_id, e)
 
         if not market:
             # Используем значения по умолчанию
@@ -565,9 +578,10 @@ async def place_single_order(
 
         # Шаг 2: Разместить ордер через REST API
         logger.info(
-            f"Placing order with pricePerShare={signed_order_data.get('pricePerShare')}"
+            "Placing order with pricePerShare=%s",
+            signed_order_data.get("pricePerShare"),
         )
-        logger.debug(f"Order data: {signed_order_data.get('order', {})}")
+        logger.debug("Order data: %s", signed_order_data.get("order", {}))
 
         result = await api_client.place_order(
             order=signed_order_data["order"],
@@ -575,7 +589,7 @@ async def place_single_order(
             strategy="LIMIT",
         )
 
-        logger.info(f"Place order result: {result}")
+        logger.info("Place order result: %s", result)
 
         if result and result.get("code") == "OK":
             # Возвращаем orderHash и orderId
@@ -587,7 +601,7 @@ async def place_single_order(
                 error_msg = (
                     "orderHash not found in response. Cannot save order to database."
                 )
-                logger.error(f"Error placing order: {error_msg}. Result: {result}")
+                logger.error("Error placing order: %s. Result: %s", error_msg, result)
                 return False, None, None, error_msg
         else:
             # Извлекаем описание ошибки из ответа API
@@ -599,10 +613,10 @@ async def place_single_order(
                 if result
                 else "No response from API"
             )
-            logger.error(f"Error placing order: {error_msg}. Full result: {result}")
+            logger.error("Error placing order: %s. Full result: %s", error_msg, result)
             return False, None, None, error_msg
 
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"Error placing order: {error_msg}", exc_info=True)
+        logger.error("Error placing order: %s", error_msg, exc_info=True)
         return False, None, None, error_msg
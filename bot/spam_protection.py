@@ -1,15 +1,25 @@
-"""Middleware для защиты от спама."""
+"""Middleware для защиты от спама и ограничения частоты исходящих запросов."""
 
+import asyncio
 import logging
 import time
 from collections import defaultdict, deque
 from typing import Any, Callable, Dict
 
 from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
 from aiogram.types import TelegramObject
 
 logger = logging.getLogger(__name__)
 
+# Как часто удалять из OutgoingRateLimitMiddleware чаты с прошедшим слотом (секунды)
+CHAT_SLOTS_PRUNE_INTERVAL = 60.0
+
 
 class AntiSpamMiddleware(BaseMiddleware):
     def __init__(self, bot: Bot, limit=5, interval=2, block_duration=30):
@@ -59,3 +69,69 @@ class AntiSpamMiddleware(BaseMiddleware):
             return
 
         return await handler(event, data)
+
+
+class OutgoingRateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Единый ограничитель частоты исходящих запросов к Telegram Bot API.
+
+    Telegram допускает около 30 сообщений в секунду на бота и около одного
+    сообщения в секунду в один чат. Запросы сверх лимита ждут своего слота,
+    а не получают 429 Too Many Requests. Слот резервируется сразу при вызове
+    (без await между чтением и записью), поэтому сообщения в один чат уходят
+    в порядке вызова, а ожидание одного запроса не задерживает остальные.
+    """
+
+    def __init__(self, rate: int = 30, period: float = 1.0, chat_interval: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self.chat_interval = chat_interval
+        # Время отправки последних rate запросов (скользящее окно)
+        self._sent_at: deque = deque(maxlen=rate)
+        # chat_id -> время, с которого в чат можно отправить следующее сообщение
+        self._chat_next_send_at: Dict[Any, float] = {}
+        self._next_prune_at = 0.0
+
+    def _reserve_chat_slot(self, chat_id: Any, now: float) -> float:
+        """Резервирует слот отправки в чат и возвращает время этого слота."""
+        if now >= self._next_prune_at:
+            # Чаты, слот которых уже прошел, больше не ограничены
+            for key in [k for k, t in self._chat_next_send_at.items() if t <= now]:
+                del self._chat_next_send_at[key]
+            self._next_prune_at = now + CHAT_SLOTS_PRUNE_INTERVAL
+        send_at = max(now, self._chat_next_send_at.get(chat_id, 0.0))
+        self._chat_next_send_at[chat_id] = send_at + self.chat_interval
+        return send_at
+
+    def _reserve_slot(self, now: float) -> float:
+        """Резервирует слот в скользящем окне rate/period и возвращает его время."""
+        send_at = now
+        if len(self._sent_at) == self.rate:
+            send_at = max(now, self._sent_at[0] + self.period)
+        self._sent_at.append(send_at)
+        return send_at
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        # Long polling не расходует лимит сообщений
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+
+        # Интервал между сообщениями в один чат (sendMessage, sendPhoto, ...)
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None and method.__api_method__.startswith("send"):
+            now = time.monotonic()
+            send_at = self._reserve_chat_slot(chat_id, now)
+            if send_at > now:
+                await asyncio.sleep(send_at - now)
+
+        now = time.monotonic()
+        send_at = self._reserve_slot(now)
+        if send_at > now:
+            await asyncio.sleep(send_at - now)
+
+        return await make_request(bot, method)
@@ -4,15 +4,16 @@ Handles the complete registration process from wallet address to API key.
 """
 
 import asyncio
+import functools
 import hashlib
 import logging
-import re
-from datetime import datetime
+import time
 from html import escape
 from pathlib import Path
+from typing import Dict, Optional, Union
 
 from aiogram import Router
-from aiogram.filters import Command
+from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import FSInputFile, Message
@@ -20,17 +21,74 @@ from database import (
     check_api_key_exists,
     check_private_key_exists,
     check_wallet_address_exists,
-    get_user,
+    is_user_registered,
     save_user,
 )
 from invites import is_invite_valid, use_invite
-from predict_api import PredictAPIClient
-from predict_api.auth import get_chain_id
-from predict_api.sdk_operations import get_usdt_balance
+from predict_api.auth import get_chain_id, run_blocking
+from predict_api.sdk_operations import format_usdt, get_usdt_balance
 from predict_sdk import OrderBuilder, OrderBuilderOptions
 
 logger = logging.getLogger(__name__)
 
+
+@functools.lru_cache(maxsize=1)
+def _get_chain_id():
+    """ChainId не меняется во время работы бота: вычисляем один раз при первом вызове."""
+    return get_chain_id()
+
+
+# Корень проекта и картинки для шагов регистрации. FSInputFile хранит только путь
+# и читает файл при каждой загрузке; повторную загрузку исключает _PHOTO_FILE_IDS
+_BASE_DIR = Path(__file__).resolve().parent.parent
+_FILES_DIR = _BASE_DIR / "files"
+_PHOTOS: Dict[str, FSInputFile] = {
+    name: FSInputFile(str(_FILES_DIR / f"{name}.png"))
+    for name in ("addr", "private", "api")
+}
+# file_id уже загруженных картинок: Telegram хранит их на своей стороне,
+# поэтому повторная отправка по file_id не требует загрузки файла
+_PHOTO_FILE_IDS: Dict[str, str] = {}
+
+
+async def _answer_registration_photo(message: Message, name: str, caption: str):
+    """
+    Отправляет картинку шага регистрации, переиспользуя file_id после первой загрузки.
+
+    Args:
+        message: Сообщение пользователя, на которое отвечаем
+        name: Имя картинки (addr, private, api)
+        caption: Подпись к картинке
+    """
+    photo: Union[str, FSInputFile] = _PHOTO_FILE_IDS.get(name, _PHOTOS[name])
+    sent = await message.answer_photo(
+        photo,
+        caption=caption,
+        disable_web_page_preview=True,
+    )
+    if name not in _PHOTO_FILE_IDS and sent.photo:
+        _PHOTO_FILE_IDS[name] = sent.photo[-1].file_id
+
+
+async def _delete_and_send(message: Message, send):
+    """
+    Удаляет сообщение пользователя и отправляет ответ параллельно.
+
+    Ошибка удаления (сообщение уже удалено, нет прав) не мешает отправке ответа.
+
+    Args:
+        message: Сообщение пользователя с введенными данными
+        send: Корутина отправки ответа
+
+    Returns:
+        Результат отправки ответа
+    """
+    _, result = await asyncio.gather(message.delete(), send, return_exceptions=True)
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
 # ============================================================================
 # States for user registration
 # ============================================================================
@@ -46,21 +104,10 @@ class RegistrationStates(StatesGroup):
 
 
 # ============================================================================
-# Router and handlers
+# Registration messages
 # ============================================================================
 
-start_router = Router()
-
-
-@start_router.message(Command("start"))
-async def cmd_start(message: Message, state: FSMContext):
-    """Handler for /start command - start of registration process."""
-    logger.info(f"Команда /start от пользователя {message.from_user.id}")
-    user = await get_user(message.from_user.id)
-
-    if user:
-        await message.answer(
-            """✅ You are already registered!
+_MSG_ALREADY_REGISTERED = """✅ You are already registered!
 
 🔗 Platform: <a href="https://predict.fun?ref=73581">predict.fun</a>
 
@@ -69,63 +116,28 @@ Use the /orders command to manage your orders.
 Use the /check_account command to check your balance and account statistics.
 Use the /help command to view instructions.
 Use the /support command to contact administrator."""
-        )
-        return
 
-    # Запрашиваем инвайт
-    await message.answer(
-        """🔐 Bot Registration
+_MSG_INVITE_PROMPT = """🔐 Bot Registration
 
 To register, you need an invite code.
 
 ⚠️ Important: Before using the bot, you must complete at least one trade through the <a href="https://predict.fun?ref=73581">web interface</a> for the bot to work correctly.
 
-Please enter your invite code:""",
-        disable_web_page_preview=True,
-    )
-    await state.set_state(RegistrationStates.waiting_invite)
-
-
-@start_router.message(RegistrationStates.waiting_invite)
-async def process_invite(message: Message, state: FSMContext):
-    """Handles invite code input."""
-    invite_code = message.text.strip()
+Please enter your invite code:"""
 
-    # Проверяем формат (латиница и цифры)
-    if not re.match(r"^[A-Za-z0-9]{10}$", invite_code):
-        await message.answer(
-            """❌ Invalid invite code format. 
+_MSG_INVALID_INVITE_FORMAT = """❌ Invalid invite code format. 
             
 Please try again:"""
-        )
-        return
 
-    # Проверяем валидность инвайта (но не используем его пока)
-    if not await is_invite_valid(invite_code):
-        await message.answer(
-            """❌ Invalid or already used invite code.
+_MSG_INVALID_INVITE = """❌ Invalid or already used invite code.
 
 Please enter a valid invite code:"""
-        )
-        return
-
-    # Сохраняем инвайт в state (будем использовать в конце регистрации)
-    await state.update_data(invite_code=invite_code)
 
-    # Удаляем сообщение пользователя с инвайт-кодом
-    try:
-        await message.delete()
-    except Exception:
-        pass
+_MSG_CHECKING_INVITE = """⏳ Checking invite code..."""
 
-    # Переходим к следующему шагу
-    # Send image with caption in one message
-    photo_path = Path(__file__).parent.parent / "files" / "addr.png"
+_MSG_INVITE_ACCEPTED = """✅ Invite code accepted."""
 
-    photo = FSInputFile(str(photo_path))
-    await message.answer_photo(
-        photo,
-        caption="""🔐 Bot Registration
+_MSG_WALLET_PROMPT = """🔐 Bot Registration
     
 ⚠️ Attention: All data (wallet address, private key, API key) is encrypted using a private encryption key and stored in an encrypted form.
 The data is never used in its raw form and is not shared with third parties.
@@ -134,154 +146,215 @@ Please enter your wallet address (Deposit Address) from the Portfolio page:
 
 <a href="https://predict.fun?ref=73581">https://predict.fun</a>
 
-⚠️ Important: You must specify the wallet address for which you received the API key.""",
+⚠️ Important: You must specify the wallet address for which you received the API key."""
+
+_MSG_INVALID_WALLET = """❌ Invalid wallet address format. Please try again:"""
+
+_MSG_WALLET_EXISTS = """❌ This wallet address is already registered.
+            
+Please enter a different wallet address:"""
+
+_MSG_PRIVATE_KEY_PROMPT = """Please enter your private key (Privy Wallet Private Key) from the account settings page:
+
+<a href="https://predict.fun/account/settings?ref=73581">https://predict.fun/account/settings</a>
+
+⚠️ Important: You must specify the private key of the Privy Wallet that owns the Predict Account (the same wallet address you entered above)."""
+
+_MSG_INVALID_PRIVATE_KEY = """❌ Invalid private key format. Please try again:"""
+
+_MSG_PRIVATE_KEY_EXISTS = """❌ This private key is already registered.
+            
+Please enter a different private key:"""
+
+_MSG_API_KEY_PROMPT = """Please enter your Predict.fun API key.
+
+You can get an API key by opening a ticket in Discord:
+
+<a href="https://discord.gg/predictdotfun">https://discord.gg/predictdotfun</a>
+
+⚠️ Important: You must enter the API key that was obtained for the wallet address from step 1."""
+
+_MSG_INVALID_API_KEY = """❌ Invalid API key format. Please try again:"""
+
+_MSG_REGISTRATION_ERROR = """❌ Registration error. Please start again with /start."""
+
+_MSG_API_KEY_EXISTS = """❌ This API key is already registered.
+            
+Please enter a different API key:"""
+
+_MSG_CREDENTIALS_TAKEN = """❌ This wallet address or private key is already registered.
+
+Please start again with /start."""
+
+_MSG_VERIFYING_API = """🔍 Verifying connection to API..."""
+
+_MSG_INVITE_NOT_USED = """❌ Registration failed: The invite code could not be used.
+
+Please start registration again with /start using a valid invite code."""
+
+_MSG_REGISTRATION_COMPLETED = """✅ Registration Completed!
+
+Your data has been encrypted and verified.
+
+🔗 Platform: <a href="https://predict.fun?ref=73581">predict.fun</a>
+
+Use the /make_market command to place an order.
+Use the /orders command to manage your orders.
+Use the /check_account command to check your balance and account statistics.
+Use the /help command to view instructions.
+Use the /support command to contact administrator."""
+
+
+# ============================================================================
+# Router and handlers
+# ============================================================================
+
+start_router = Router(name="registration")
+
+
+@start_router.message(Command("start"))
+async def cmd_start(message: Message, state: FSMContext):
+    """Handler for /start command - start of registration process."""
+    logger.info(f"Команда /start от пользователя {message.from_user.id}")
+    if await is_user_registered(message.from_user.id):
+        await message.answer(_MSG_ALREADY_REGISTERED)
+        return
+
+    # Запрашиваем инвайт
+    await message.answer(
+        _MSG_INVITE_PROMPT,
         disable_web_page_preview=True,
     )
+    await state.set_state(RegistrationStates.waiting_invite)
+
+
+async def process_invite(message: Message, state: FSMContext):
+    """Handles invite code input."""
+    invite_code = message.text.strip()
+
+    # Проверяем формат (10 символов, латиница и цифры)
+    if not (len(invite_code) == 10 and invite_code.isascii() and invite_code.isalnum()):
+        await message.answer(_MSG_INVALID_INVITE_FORMAT)
+        return
+
+    # Сразу показываем пользователю, что инвайт проверяется,
+    # и параллельно проверяем валидность инвайта (но не используем его пока)
+    ack_task = asyncio.create_task(message.answer(_MSG_CHECKING_INVITE))
+    try:
+        is_valid = await is_invite_valid(invite_code)
+    finally:
+        ack = await ack_task
+
+    if not is_valid:
+        await ack.edit_text(_MSG_INVALID_INVITE)
+        return
+
+    await ack.edit_text(_MSG_INVITE_ACCEPTED)
+
+    # Сохраняем инвайт в state (будем использовать в конце регистрации)
+    await state.update_data(invite_code=invite_code)
+
+    # Удаляем сообщение пользователя с инвайт-кодом и отправляем следующий шаг
+    await _delete_and_send(
+        message,
+        _answer_registration_photo(message, "addr", _MSG_WALLET_PROMPT),
+    )
     await state.set_state(RegistrationStates.waiting_wallet)
 
 
-@start_router.message(RegistrationStates.waiting_wallet)
 async def process_wallet(message: Message, state: FSMContext):
     """Handles wallet address input."""
     wallet_address = message.text.strip()
 
-    if not wallet_address or len(wallet_address) < 10:
-        await message.answer("""❌ Invalid wallet address format. Please try again:""")
+    if len(wallet_address) < 10:
+        await message.answer(_MSG_INVALID_WALLET)
         return
 
     # Проверяем уникальность wallet_address
     if await check_wallet_address_exists(wallet_address):
-        await message.answer(
-            """❌ This wallet address is already registered.
-            
-Please enter a different wallet address:"""
-        )
+        await message.answer(_MSG_WALLET_EXISTS)
         return
 
     await state.update_data(wallet_address=wallet_address)
 
-    # Удаляем сообщение пользователя с адресом кошелька
-    try:
-        await message.delete()
-    except Exception:
-        pass
-
-    # Send image with caption for private key
-    photo_path = Path(__file__).parent.parent / "files" / "private.png"
-    photo = FSInputFile(str(photo_path))
-    await message.answer_photo(
-        photo,
-        caption="""Please enter your private key (Privy Wallet Private Key) from the account settings page:
-
-<a href="https://predict.fun/account/settings?ref=73581">https://predict.fun/account/settings</a>
-
-⚠️ Important: You must specify the private key of the Privy Wallet that owns the Predict Account (the same wallet address you entered above).""",
-        disable_web_page_preview=True,
+    # Удаляем сообщение пользователя с адресом кошелька и отправляем следующий шаг
+    await _delete_and_send(
+        message,
+        _answer_registration_photo(message, "private", _MSG_PRIVATE_KEY_PROMPT),
     )
     await state.set_state(RegistrationStates.waiting_private_key)
 
 
-@start_router.message(RegistrationStates.waiting_private_key)
 async def process_private_key(message: Message, state: FSMContext):
     """Handles private key input."""
     private_key = message.text.strip()
 
-    if not private_key or len(private_key) < 20:
-        await message.answer("""❌ Invalid private key format. Please try again:""")
+    if len(private_key) < 20:
+        await message.answer(_MSG_INVALID_PRIVATE_KEY)
         return
 
     # Проверяем уникальность private_key
     if await check_private_key_exists(private_key):
-        await message.answer(
-            """❌ This private key is already registered.
-            
-Please enter a different private key:"""
-        )
+        await message.answer(_MSG_PRIVATE_KEY_EXISTS)
         return
 
     await state.update_data(private_key=private_key)
 
-    # Удаляем сообщение пользователя с приватным ключом
-    try:
-        await message.delete()
-    except Exception:
-        pass
-
-    # Send image with caption for API key
-    photo_path = Path(__file__).parent.parent / "files" / "api.png"
-    photo = FSInputFile(str(photo_path))
-    await message.answer_photo(
-        photo,
-        caption="""Please enter your Predict.fun API key.
-
-You can get an API key by opening a ticket in Discord:
-
-<a href="https://discord.gg/predictdotfun">https://discord.gg/predictdotfun</a>
-
-⚠️ Important: You must enter the API key that was obtained for the wallet address from step 1.""",
-        disable_web_page_preview=True,
+    # Удаляем сообщение пользователя с приватным ключом и отправляем следующий шаг
+    await _delete_and_send(
+        message,
+        _answer_registration_photo(message, "api", _MSG_API_KEY_PROMPT),
     )
     await state.set_state(RegistrationStates.waiting_api_key)
 
 
-@start_router.message(RegistrationStates.waiting_api_key)
 async def process_api_key(message: Message, state: FSMContext):
     """Handles API key input and completes registration."""
-    api_key = message.text.strip()
+    api_key_clean = message.text.strip()
 
-    if not api_key:
-        await message.answer("""❌ Invalid API key format. Please try again:""")
+    if not api_key_clean:
+        await message.answer(_MSG_INVALID_API_KEY)
         return
 
-    # Проверяем уникальность api_key
-    if await check_api_key_exists(api_key):
-        await message.answer(
-            """❌ This API key is already registered.
-            
-Please enter a different API key:"""
-        )
-        return
-
-    api_key_clean = api_key.strip()
-
-    # Сохраняем API ключ в state
-    await state.update_data(api_key=api_key_clean)
-
-    # Удаляем сообщение пользователя с адресом кошелька
-    try:
-        await message.delete()
-    except Exception:
-        pass
-
-    # Получаем данные из state
+    # Получаем данные из state (значения сохранены уже без пробелов)
     data = await state.get_data()
     telegram_id = message.from_user.id
-    wallet_address = data.get("wallet_address", "").strip()
-    private_key = data.get("private_key", "").strip()
-    api_key_clean = data.get("api_key", "").strip()
+    wallet_address = data.get("wallet_address", "")
+    private_key = data.get("private_key", "")
 
     # Проверяем, что все необходимые данные есть
-    if not wallet_address or not private_key or not api_key_clean:
-        await message.answer(
-            """❌ Registration error. Please start again with /start."""
-        )
+    if not wallet_address or not private_key:
+        await message.answer(_MSG_REGISTRATION_ERROR)
         await state.clear()
         return
 
-    # проверяем API подключение
-    await message.answer("""🔍 Verifying connection to API...""")
+    # Проверяем уникальность всех трех полей параллельно
+    # (кошелек и приватный ключ могли быть заняты, пока пользователь вводил API ключ)
+    wallet_exists, private_key_exists, api_key_exists = await asyncio.gather(
+        check_wallet_address_exists(wallet_address),
+        check_private_key_exists(private_key),
+        check_api_key_exists(api_key_clean),
+    )
 
-    try:
-        # Создаем API клиент нового API
-        PredictAPIClient(
-            api_key=api_key_clean,
-            wallet_address=wallet_address,
-            private_key=private_key,
-        )
+    if api_key_exists:
+        await message.answer(_MSG_API_KEY_EXISTS)
+        return
+
+    if wallet_exists or private_key_exists:
+        await message.answer(_MSG_CREDENTIALS_TAKEN)
+        await state.clear()
+        return
+
+    # Сохраняем API ключ в state
+    await state.update_data(api_key=api_key_clean)
+
+    # Удаляем сообщение пользователя с API ключом и проверяем API подключение
+    await _delete_and_send(message, message.answer(_MSG_VERIFYING_API))
 
+    try:
         # Создаем OrderBuilder для SDK операций
-        chain_id = get_chain_id()
-        order_builder = await asyncio.to_thread(
+        chain_id = _get_chain_id()
+        order_builder = await run_blocking(
             OrderBuilder.make,
             chain_id,
             private_key,
@@ -291,17 +364,17 @@ Please enter a different API key:"""
         # Получаем баланс USDT
         logger.info(f"Проверка баланса USDT для пользователя {telegram_id}")
         balance_wei = await get_usdt_balance(order_builder)
-        balance_usdt = balance_wei / 1e18
+        balance_usdt = format_usdt(balance_wei)
 
         # Если дошли сюда без исключений, значит подключение успешно
         logger.info(
-            f"Успешная проверка подключения для пользователя {telegram_id}. Баланс USDT: {balance_usdt:.6f}"
+            f"Успешная проверка подключения для пользователя {telegram_id}. Баланс USDT: {balance_usdt}"
         )
 
         # Сообщаем пользователю об успешной проверке
         await message.answer(
             f"""✅ API Connection passed!
-Your USDT balance: {balance_usdt:.6f} USDT"""
+Your USDT balance: {balance_usdt} USDT"""
         )
 
         # Если проверка прошла успешно, используем инвайт и сохраняем пользователя в БД
@@ -310,44 +383,29 @@ Your USDT balance: {balance_usdt:.6f} USDT"""
             # Используем инвайт (атомарно, с проверкой валидности внутри)
             if not await use_invite(invite_code, telegram_id):
                 await state.clear()
-                await message.answer(
-                    """❌ Registration failed: The invite code could not be used.
-
-Please start registration again with /start using a valid invite code."""
-                )
+                await message.answer(_MSG_INVITE_NOT_USED)
                 return
 
         # Сохраняем пользователя в БД
+        username = (message.from_user.username or "").strip() or None
         await save_user(
             telegram_id=telegram_id,
-            username=message.from_user.username.strip()
-            if message.from_user.username
-            else None,
+            username=username,
             wallet_address=wallet_address,
             private_key=private_key,
             api_key=api_key_clean,
         )
 
         await state.clear()
-        await message.answer(
-            """✅ Registration Completed!
-
-Your data has been encrypted and verified.
-
-🔗 Platform: <a href="https://predict.fun?ref=73581">predict.fun</a>
-
-Use the /make_market command to place an order.
-Use the /orders command to manage your orders.
-Use the /check_account command to check your balance and account statistics.
-Use the /help command to view instructions.
-Use the /support command to contact administrator."""
-        )
+        await message.answer(_MSG_REGISTRATION_COMPLETED)
 
     except Exception as e:
         # Генерируем код ошибки для сопоставления с логами
         error_str = str(e)
-        error_hash = hashlib.md5(error_str.encode()).hexdigest()[:8].upper()
-        error_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        error_hash = (
+            hashlib.blake2b(error_str.encode(), digest_size=4).hexdigest().upper()
+        )
+        error_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
         escaped_error = escape(error_str)
 
         await message.answer(
@@ -363,7 +421,29 @@ Please check the correctness of the entered data and try again with /start comma
 If the problem persists, contact administrator via /support and provide the error code above."""
         )
         await state.clear()
-        logger.error(
-            f"Ошибка проверки подключения для пользователя {telegram_id} [CODE: {error_hash}] [TIME: {error_time}]: {e}"
+        logger.exception(
+            "Ошибка проверки подключения для пользователя %s [CODE: %s] [TIME: %s]",
+            telegram_id,
+            error_hash,
+            error_time,
         )
         return
+
+
+# Обработчики шагов регистрации по состоянию FSM
+_STATE_HANDLERS = {
+    RegistrationStates.waiting_invite.state: process_invite,
+    RegistrationStates.waiting_wallet.state: process_wallet,
+    RegistrationStates.waiting_private_key.state: process_private_key,
+    RegistrationStates.waiting_api_key.state: process_api_key,
+}
+
+
+@start_router.message(StateFilter(RegistrationStates))
+async def process_registration_step(
+    message: Message, state: FSMContext, raw_state: Optional[str]
+):
+    """Dispatches registration input to the step handler for the current state."""
+    handler = _STATE_HANDLERS.get(raw_state)
+    if handler is not None:
+        await handler(message, state)
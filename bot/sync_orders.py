@@ -6,14 +6,16 @@ PROCESS OVERVIEW:
 ================
 
 1. MAIN LOOP (async_sync_all_orders):
-   - Retrieves all users from the database
-   - For each user, processes their active orders sequentially
+   - Reads users from the database page by page (iter_all_users) into a bounded queue
+   - Processes users concurrently with SYNC_USERS_CONCURRENCY workers taking users from the queue
    - Outputs final statistics (cancelled, placed, errors)
    - Each user is processed independently with their own API client
 
 2. ORDER STATUS CHECK (process_user_orders):
    For each active order from database:
-   a. Checks order status via API (get_order_by_id):
+   a. Checks order status via API:
+      - Lists the user's OPEN orders once (get_my_orders, paged); only orders missing
+        from that list are looked up individually (get_order_by_id)
       - Compares database status ('OPEN') with API status
       - If status changed from 'OPEN' to 'FILLED':
         * Updates database status to 'FILLED'
@@ -58,7 +60,9 @@ PROCESS OVERVIEW:
    - If ANY order fails to cancel, skips placement for ALL orders (safety check)
 
 6. ORDER PLACEMENT:
-   - Places new orders sequentially ONLY if ALL old orders were successfully cancelled
+   - Places new orders ONLY if ALL old orders were successfully cancelled
+   - Orders are placed concurrently, at most PLACE_ORDERS_CONCURRENCY at a time;
+     results keep the order of orders_to_place
    - BATCHES ARE FORMED PER USER: all orders for one user are in the same batch
    - Uses SDK + REST API: build_and_sign_limit_order + place_order
    - Logs each placement with User ID and Market ID for debugging
@@ -99,7 +103,12 @@ KEY FEATURES:
 ARCHITECTURE:
 ============
 - async_sync_all_orders(): Main async function used by bot (background task)
-  * Logs processing time for each user (start, end, duration)
+  * Feeds users from iter_all_users() into a bounded queue (SYNC_USERS_QUEUE_SIZE)
+    consumed by SYNC_USERS_CONCURRENCY workers running sync_user_orders()
+  * Shares one HTTP session (connection pool) between all users' API clients
+  * Aggregates per-user statistics returned by sync_user_orders()
+- sync_user_orders(): Full sync cycle for one user, returns user statistics
+  * Logs processing time for the user (start, end, duration)
   * Uses try/except/finally to ensure time logging always happens
 - main(): Synchronous function for standalone script execution (legacy, not used in bot)
 - process_user_orders(): Processes all orders for one user, returns lists and notifications
@@ -108,6 +117,7 @@ ARCHITECTURE:
   * Calculates price changes and determines if repositioning is needed
 - cancel_orders_batch(): Async batch cancellation via API (off-chain)
 - place_orders_batch(): Async batch placement via SDK + REST API
+  * Places orders concurrently under a semaphore (PLACE_ORDERS_CONCURRENCY)
 - send_price_change_notification(): Sends price change notification to user
 - send_order_updated_notification(): Sends success notification after DB update
 - send_order_placement_error_notification(): Sends error notification if placement fails
@@ -118,21 +128,36 @@ ARCHITECTURE:
 
 import asyncio
 import logging
+import re
 import time
-import traceback
-from typing import Dict, List, Optional, Tuple
-
-from config import TICK_SIZE
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from html import escape
+from typing import Awaitable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+)
+from config import TICK_SIZE, settings
 from database import (
-    get_all_users,
+    bulk_update_order_status,
+    bulk_update_orders_in_db,
     get_user,
     get_user_orders,
-    update_order_in_db,
-    update_order_status,
+    iter_all_users,
 )
 from predict_api import PredictAPIClient
-from predict_api.auth import get_chain_id
-from predict_api.sdk_operations import calculate_new_target_price, place_single_order
+from predict_api.auth import get_chain_id, run_blocking
+from predict_api.client import close_shared_http_session, get_shared_http_session
+from predict_api.sdk_operations import (
+    calculate_new_target_price,
+    format_usdt,
+    place_single_order,
+)
 from predict_sdk import OrderBuilder, OrderBuilderOptions, Side
 
 # Настройка логирования - используем корневой логгер (единый файл bot.log)
@@ -145,6 +170,191 @@ ORDER_STATUS_CANCELLED = "CANCELLED"
 ORDER_STATUS_EXPIRED = "EXPIRED"
 ORDER_STATUS_INVALIDATED = "INVALIDATED"
 
+# Максимум пользователей, чьи ордера синхронизируются одновременно
+# (переменная окружения SYNC_USERS_CONCURRENCY, по умолчанию 20)
+SYNC_USERS_CONCURRENCY = max(1, settings.sync_users_concurrency)
+
+# Максимум одновременных batch отмен/размещений ордеров по всем пользователям
+# (переменная окружения PREDICT_API_CONCURRENCY, по умолчанию 16)
+PREDICT_API_CONCURRENCY = max(1, settings.predict_api_concurrency)
+_PREDICT_API_SEM = asyncio.Semaphore(PREDICT_API_CONCURRENCY)
+
+# Уведомления, отправляемые в фоне (сильные ссылки, чтобы задачи не собрал GC)
+_notification_tasks: set = set()
+# Сколько ждать отправки оставшихся уведомлений при остановке бота (секунды)
+NOTIFICATIONS_SHUTDOWN_TIMEOUT = 10.0
+
+# Попытки отправки сообщения при flood control (429) и сетевых ошибках Telegram
+TELEGRAM_SEND_ATTEMPTS = 3
+# Дольше этого (секунды) retry_after не ждем: уведомление отбрасывается
+TELEGRAM_RETRY_AFTER_MAX = 60
+
+# Размер очереди пользователей, ожидающих синхронизации
+SYNC_USERS_QUEUE_SIZE = 64
+
+# Максимум одновременных размещений ордеров одного пользователя
+PLACE_ORDERS_CONCURRENCY = 8
+
+# Максимум ордеров в одном запросе POST /v1/orders/remove (ограничение API)
+CANCEL_ORDERS_BATCH_SIZE = 100
+
+# Время жизни кэша orderbook внутри одного цикла синхронизации (секунды)
+ORDERBOOK_CACHE_TTL = 3.0
+
+# Кэш метаданных рынков (feeRateBps, isNegRisk, isYieldBearing) на процесс.
+# Эти данные рынка не меняются, поэтому не запрашиваются заново каждый цикл.
+MARKET_CACHE_TTL = 300  # секунд
+MARKET_CACHE_MAXSIZE = 2048
+_market_cache: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+
+# Кэш API клиентов и OrderBuilder пользователей по адресу кошелька.
+# Синхронизация периодическая, поэтому одни и те же пользователи повторяются
+# каждый цикл, и создание OrderBuilder (ключи, контекст подписи) не повторяется.
+# Записи содержат расшифрованные ключи, поэтому держим их, только пока пользователь
+# синхронизируется: TTL в несколько циклов, а записи, к которым не обращались
+# дольше TTL (удаленные/неактивные пользователи), удаляются в начале каждого цикла.
+USER_CLIENTS_CACHE_TTL = 300  # секунд
+USER_CLIENTS_CACHE_MAXSIZE = 4096
+_user_clients_cache: "OrderedDict[str, _UserClients]" = OrderedDict()
+
+# Рамки баннеров начала синхронизации и итоговой статистики в логах
+_BANNER_TOP = "╔" + "=" * 78 + "╗"
+_BANNER_MID = "╠" + "=" * 78 + "╣"
+_BANNER_BOT = "╚" + "=" * 78 + "╝"
+_BANNER_START = "║" + " " * 30 + "НАЧАЛО СИНХРОНИЗАЦИИ ОРДЕРОВ" + " " * 30 + "║"
+_BANNER_STATS = "║" + " " * 30 + "ИТОГОВАЯ СТАТИСТИКА" + " " * 30 + "║"
+_USER_SEPARATOR = "=" * 80
+
+# Постраничная загрузка открытых ордеров пользователя (get_my_orders)
+OPEN_ORDERS_PAGE_SIZE = 100
+OPEN_ORDERS_MAX_PAGES = 20
+
+# Признаки таймаута в тексте ошибки API (ищутся в начале сообщения)
+_TIMEOUT_RE = re.compile(r"504|gateway time-?out|timeout", re.IGNORECASE)
+_TIMEOUT_SCAN_CHARS = 256
+
+# Ожидаемые ошибки обработки (плохие данные, сеть, таймауты). Все прочие
+# исключения - ошибки в коде: они логируются с traceback.
+_EXPECTED_ERRORS = (
+    KeyError,
+    TypeError,
+    ValueError,
+    requests.RequestException,
+    asyncio.TimeoutError,
+)
+
+# Сторона ордера из БД ("BUY"/"SELL") -> Side из predict_sdk
+_SIDE_MAP: Dict[str, Side] = {"BUY": Side.BUY, "SELL": Side.SELL}
+_VALID_SIDES = frozenset(_SIDE_MAP.values())
+
+
+@dataclass(slots=True, frozen=True)
+class OrderRow:
+    """Строка ордера из БД, разобранная один раз перед обработкой."""
+
+    order_hash: str
+    order_api_id: Optional[str]
+    market_id: int
+    market_title: Optional[str]
+    market_slug: Optional[str]
+    token_id: str
+    token_name: Optional[str]  # YES или NO
+    side: str  # BUY или SELL
+    current_price: float  # Текущая цена рынка на момент создания ордера
+    target_price: float
+    offset_ticks: int
+    amount: float
+    reposition_threshold_cents: float
+    status: Optional[str]
+
+    @classmethod
+    def from_db(cls, db_order: Dict) -> Optional["OrderRow"]:
+        """
+        Создает OrderRow из словаря ордера (как его возвращает get_user_orders).
+
+        Returns:
+            OrderRow или None, если не хватает обязательных полей
+            (order_hash, market_id, side, token_id)
+
+        Raises:
+            TypeError, ValueError: если числовые поля не приводятся к float/int
+        """
+        order_hash = db_order.get("order_hash")
+        market_id = db_order.get("market_id")
+        side = db_order.get("side")
+        token_id = db_order.get("token_id")
+        if not order_hash or not market_id or not side or not token_id:
+            return None
+
+        return cls(
+            order_hash=order_hash,
+            order_api_id=db_order.get("order_api_id"),
+            market_id=market_id,
+            market_title=db_order.get("market_title"),
+            market_slug=db_order.get("market_slug"),
+            token_id=token_id,
+            token_name=db_order.get("token_name"),
+            side=side,
+            # Числа приводятся один раз здесь: дальше цикл решений и
+            # place_orders_batch работают с готовыми float/int
+            current_price=float(db_order.get("current_price") or 0.0),
+            target_price=float(db_order.get("target_price") or 0.0),
+            offset_ticks=int(db_order.get("offset_ticks") or 0),
+            amount=float(db_order.get("amount") or 0.0),
+            reposition_threshold_cents=float(
+                db_order.get("reposition_threshold_cents")
+            ),
+            status=db_order.get("status"),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class Decision:
+    """Результат расчета перестановки одного ордера."""
+
+    new_target_price: float
+    target_price_change: float
+    target_price_change_cents: float
+    will_reposition: bool
+
+
+@dataclass(slots=True, frozen=True)
+class PlaceResult:
+    """Результат размещения одного ордера из place_orders_batch."""
+
+    success: bool
+    order_hash: Optional[str] = None  # Hash ордера (используется как order_id в БД)
+    order_api_id: Optional[str] = None  # ID ордера из API (bigint string)
+    error: Optional[str] = None
+
+
+def decide_reposition(row: OrderRow, new_current_price: float) -> Decision:
+    """
+    Решает, нужно ли переставлять ордер при новой текущей цене рынка.
+
+    Чистая функция: только арифметика, без запросов и логирования.
+
+    Args:
+        row: Ордер из БД
+        new_current_price: Новая текущая цена токена ордера
+
+    Returns:
+        Decision с новой целевой ценой, изменением (в долях и центах) и флагом перестановки
+    """
+    # Новая целевая цена с использованием сохраненного offset_ticks
+    new_target_price = calculate_new_target_price(
+        new_current_price, row.side, row.offset_ticks
+    )
+    target_price_change = abs(new_target_price - row.target_price)
+    target_price_change_cents = target_price_change * 100
+    return Decision(
+        new_target_price=new_target_price,
+        target_price_change=target_price_change,
+        target_price_change_cents=target_price_change_cents,
+        # Переставляем, только если изменение достаточно
+        will_reposition=target_price_change_cents >= row.reposition_threshold_cents,
+    )
+
 
 async def get_current_market_price(
     api_client: PredictAPIClient, market_id: int, side: str, token_name: str
@@ -169,45 +379,367 @@ async def get_current_market_price(
         orderbook = await api_client.get_orderbook(market_id=market_id)
 
         if not orderbook:
-            logger.error(f"Ошибка получения orderbook для рынка {market_id}")
+            logger.error("Ошибка получения orderbook для рынка %s", market_id)
             return None
 
-        # Новый API возвращает массивы массивов: [[price, size], ...]
-        bids = orderbook.get("bids", [])
-
-        # Для BUY и SELL используем best_bid (самый высокий бид)
-        # BUY: когда цена ВНИЗ (best_bid уменьшается), ордер ближе к исполнению
-        # SELL: когда цена ВВЕРХ (best_bid увеличивается), ордер ближе к исполнению
-        if bids and len(bids) > 0:
-            # bids - это массив массивов [[price, size], ...]
-            # Берем первый элемент (самый высокий бид) и извлекаем цену
-            bid_prices = []
-            for bid in bids:
-                if isinstance(bid, list) and len(bid) >= 1:
-                    try:
-                        price = float(bid[0])  # Первый элемент - цена
-                        bid_prices.append(price)
-                    except (ValueError, TypeError):
-                        continue
-            if bid_prices:
-                best_bid = max(bid_prices)
-                # Если это NO токен, цена NO = 1 - price_yes
-                if token_name == "NO":
-                    return 1.0 - best_bid
-                return best_bid
+        price = price_for_token(_best_bid(orderbook), token_name)
+        if price is not None:
+            return price
 
         logger.warning(
-            f"Не удалось определить текущую цену для рынка {market_id}, side={side}, token={token_name}"
+            "Не удалось определить текущую цену для рынка %s, side=%s, token=%s",
+            market_id,
+            side,
+            token_name,
+        )
+        return None
+
+    except Exception as e:
+        logger.error("Ошибка при получении текущей цены для рынка %s: %s", market_id, e)
+        return None
+
+
+def _best_bid(orderbook: Dict) -> Optional[float]:
+    """
+    Возвращает лучший бид (самую высокую цену из bids) за один проход.
+
+    Новый API возвращает bids как массив массивов [[price, size], ...],
+    отсортированный по убыванию цены. Записи с некорректной ценой пропускаются.
+
+    Returns:
+        Цена лучшего бида или None, если корректных бидов нет
+    """
+    bids = orderbook.get("bids") or []
+
+    # Обычный случай: лучший бид - первый уровень (O(1)). Порядок проверяем
+    # по второму уровню; если он нарушен или данные некорректны - полный проход.
+    try:
+        if isinstance(bids[0], list):
+            best_bid = float(bids[0][0])
+            if len(bids) < 2 or float(bids[1][0]) <= best_bid:
+                return best_bid
+    except (IndexError, KeyError, ValueError, TypeError):
+        pass
+
+    try:
+        # Один проход генератором, без промежуточного списка
+        return max(
+            (float(bid[0]) for bid in bids if isinstance(bid, list) and bid),
+            default=None,
         )
+    except (ValueError, TypeError):
+        pass
+
+    # Редкий случай: в книге есть некорректные цены - пропускаем их по одной
+    best_bid = None
+    for bid in bids:
+        if not isinstance(bid, list) or not bid:
+            continue
+        try:
+            price = float(bid[0])  # Первый элемент - цена
+        except (ValueError, TypeError):
+            continue
+        if best_bid is None or price > best_bid:
+            best_bid = price
+    return best_bid
+
+
+def price_for_token(best_bid: Optional[float], token_name: str) -> Optional[float]:
+    """
+    Переводит best_bid рынка (цена YES) в цену нужного токена.
+
+    Для BUY и SELL используется best_bid; цена NO = 1 - price_yes.
+
+    Args:
+        best_bid: Лучший бид рынка или None
+        token_name: "YES" или "NO"
+
+    Returns:
+        Цена токена или None, если best_bid неизвестен
+    """
+    if best_bid is None:
+        return None
+    if token_name == "NO":
+        return 1.0 - best_bid
+    return best_bid
+
+
+async def _fetch_best_bid(
+    api_client: PredictAPIClient, market_id: int
+) -> Optional[float]:
+    """
+    Запрашивает orderbook рынка и возвращает лучший бид.
+
+    Returns:
+        best_bid или None, если получить orderbook или цену не удалось
+    """
+    try:
+        orderbook = await api_client.get_orderbook(market_id=market_id)
+    except Exception as e:
+        logger.error("Ошибка при получении orderbook для рынка %s: %s", market_id, e)
+        return None
+
+    if not orderbook or not isinstance(orderbook, dict):
+        logger.error("Ошибка получения orderbook для рынка %s", market_id)
         return None
 
+    best_bid = _best_bid(orderbook)
+    if best_bid is None:
+        logger.warning("Не удалось определить лучший бид для рынка %s", market_id)
+    return best_bid
+
+
+class _OBCache:
+    """
+    Короткоживущий кэш лучших бидов по market_id.
+
+    Создается на один цикл синхронизации (не глобально), чтобы ограничить
+    устаревание цен. Одновременные запросы одного рынка (например, от разных
+    пользователей) ждут один и тот же запрос orderbook. Неудачные запросы
+    не кэшируются.
+    """
+
+    def __init__(self, ttl: float = ORDERBOOK_CACHE_TTL):
+        self._ttl = ttl
+        self._data: Dict[int, Tuple[float, asyncio.Task]] = {}
+
+    async def get(
+        self, api_client: PredictAPIClient, market_id: int
+    ) -> Optional[float]:
+        """Возвращает best_bid рынка из кэша или запрашивает orderbook."""
+        cached = self._data.get(market_id)
+        if cached is not None and time.monotonic() - cached[0] < self._ttl:
+            task = cached[1]
+        else:
+            task = asyncio.ensure_future(_fetch_best_bid(api_client, market_id))
+            self._data[market_id] = (time.monotonic(), task)
+
+        best_bid = await asyncio.shield(task)
+        if best_bid is None and self._data.get(market_id, (0, None))[1] is task:
+            self._data.pop(market_id, None)
+        return best_bid
+
+    def invalidate(self, market_id: int) -> None:
+        """Сбрасывает кэш рынка (после отмены/размещения ордеров цена могла сдвинуться)."""
+        self._data.pop(market_id, None)
+
+
+async def get_orderbooks_bulk(
+    api_client: PredictAPIClient,
+    market_ids: Iterable[int],
+    ob_cache: Optional[_OBCache] = None,
+) -> Dict[int, Optional[float]]:
+    """
+    Загружает orderbook каждого уникального рынка ровно один раз (параллельно).
+
+    Несколько ордеров на одном рынке (в том числе YES и NO) используют одну
+    и ту же цену, поэтому повторные запросы orderbook не нужны.
+
+    Args:
+        api_client: Клиент Predict.fun API
+        market_ids: ID рынков (дубликаты допускаются)
+        ob_cache: Кэш orderbook текущего цикла синхронизации (опционально)
+
+    Returns:
+        Словарь {market_id: best_bid}; None для рынков, цену которых получить не удалось
+    """
+    unique_market_ids = list(dict.fromkeys(market_ids))
+    if ob_cache is not None:
+        fetches = (
+            ob_cache.get(api_client, market_id) for market_id in unique_market_ids
+        )
+    else:
+        fetches = (
+            _fetch_best_bid(api_client, market_id) for market_id in unique_market_ids
+        )
+    best_bids = await asyncio.gather(*fetches)
+    return dict(zip(unique_market_ids, best_bids))
+
+
+async def get_market_cached(
+    api_client: PredictAPIClient, market_id: int
+) -> Optional[Dict]:
+    """
+    Возвращает данные рынка из кэша процесса или запрашивает их через API.
+
+    Кэш общий для всех пользователей; неудачные запросы не кэшируются.
+
+    Args:
+        api_client: Клиент Predict.fun API
+        market_id: ID рынка
+
+    Returns:
+        Данные рынка или None
+
+    Raises:
+        Exception: ошибки api_client.get_market пробрасываются вызывающему
+    """
+    now = time.monotonic()
+    cached = _market_cache.get(market_id)
+    if cached is not None and now - cached[0] < MARKET_CACHE_TTL:
+        _market_cache.move_to_end(market_id)
+        return cached[1]
+
+    market = await api_client.get_market(market_id=market_id)
+    if isinstance(market, dict) and market:
+        _market_cache[market_id] = (now, market)
+        _market_cache.move_to_end(market_id)
+        if len(_market_cache) > MARKET_CACHE_MAXSIZE:
+            _market_cache.popitem(last=False)
+    return market
+
+
+async def close_http_session():
+    """Закрывает общую HTTP сессию API клиентов (вызывается при остановке бота)."""
+    close_shared_http_session()
+    # Кэшированные клиенты ссылаются на закрытую сессию
+    _user_clients_cache.clear()
+
+
+def _prune_user_clients_cache() -> None:
+    """Удаляет из _user_clients_cache записи старше USER_CLIENTS_CACHE_TTL."""
+    now = time.monotonic()
+    for wallet_address in [
+        w
+        for w, entry in _user_clients_cache.items()
+        if now - entry.created_at >= USER_CLIENTS_CACHE_TTL
+    ]:
+        del _user_clients_cache[wallet_address]
+
+
+@dataclass(slots=True)
+class _UserClients:
+    """API клиент и OrderBuilder пользователя из кэша _user_clients_cache."""
+
+    fingerprint: int  # Хэш api_key/private_key/proxy_str, с которыми созданы клиенты
+    created_at: float
+    http_session: Optional[requests.Session]
+    api_client: PredictAPIClient
+    order_builder: Optional[OrderBuilder] = None
+
+
+def get_user_clients(
+    user: Dict, http_session: Optional[requests.Session] = None
+) -> _UserClients:
+    """
+    Возвращает API клиент пользователя из кэша или создает новый.
+
+    Запись кэша пересоздается, если истек USER_CLIENTS_CACHE_TTL или у
+    пользователя изменились api_key, private_key или proxy_str. Если
+    изменилась только HTTP сессия, пересоздается API клиент, а OrderBuilder
+    остается.
+
+    Args:
+        user: Данные пользователя из БД (get_user)
+        http_session: Общая HTTP сессия для API клиента (опционально)
+
+    Returns:
+        Запись кэша с API клиентом (OrderBuilder создается get_user_order_builder)
+    """
+    wallet_address = user["wallet_address"]
+    fingerprint = hash((user["api_key"], user["private_key"], user.get("proxy_str")))
+    now = time.monotonic()
+
+    entry = _user_clients_cache.get(wallet_address)
+    if (
+        entry is None
+        or entry.fingerprint != fingerprint
+        or now - entry.created_at >= USER_CLIENTS_CACHE_TTL
+    ):
+        entry = _UserClients(
+            fingerprint=fingerprint,
+            created_at=now,
+            http_session=http_session,
+            api_client=_make_api_client(user, http_session),
+        )
+    elif entry.http_session is not http_session:
+        entry.api_client = _make_api_client(user, http_session)
+        entry.http_session = http_session
+
+    _user_clients_cache[wallet_address] = entry
+    _user_clients_cache.move_to_end(wallet_address)
+    if len(_user_clients_cache) > USER_CLIENTS_CACHE_MAXSIZE:
+        _user_clients_cache.popitem(last=False)
+    return entry
+
+
+def _make_api_client(
+    user: Dict, http_session: Optional[requests.Session]
+) -> PredictAPIClient:
+    return PredictAPIClient(
+        api_key=user["api_key"],
+        wallet_address=user["wallet_address"],
+        private_key=user["private_key"],
+        proxy_str=user.get("proxy_str"),
+        http_session=http_session,
+    )
+
+
+async def get_user_order_builder(entry: _UserClients, user: Dict) -> OrderBuilder:
+    """
+    Возвращает OrderBuilder пользователя, создавая его при первом обращении.
+
+    Args:
+        entry: Запись кэша из get_user_clients
+        user: Данные пользователя из БД (get_user)
+
+    Returns:
+        OrderBuilder пользователя
+    """
+    if entry.order_builder is None:
+        entry.order_builder = await run_blocking(
+            OrderBuilder.make,
+            get_chain_id(),
+            user["private_key"],
+            OrderBuilderOptions(predict_account=user["wallet_address"]),
+        )
+    return entry.order_builder
+
+
+async def get_open_orders_by_hash(
+    api_client: PredictAPIClient,
+) -> Optional[Dict[str, Dict]]:
+    """
+    Получает все OPEN ордера пользователя из API (постранично) одним проходом.
+
+    Args:
+        api_client: Клиент Predict.fun API
+
+    Returns:
+        Словарь {order_hash: ордер из API} или None, если список получить не удалось
+        (тогда статусы проверяются по каждому ордеру отдельно)
+    """
+    open_orders = {}
+    after = None
+    try:
+        for _ in range(OPEN_ORDERS_MAX_PAGES):
+            orders, cursor = await api_client.get_my_orders(
+                first=OPEN_ORDERS_PAGE_SIZE, after=after, status=ORDER_STATUS_OPEN
+            )
+            for api_order in orders:
+                order_hash = (api_order.get("order") or {}).get("hash")
+                if order_hash:
+                    open_orders[order_hash] = api_order
+            if not cursor or not orders:
+                return open_orders
+            after = cursor
     except Exception as e:
-        logger.error(f"Ошибка при получении текущей цены для рынка {market_id}: {e}")
+        logger.warning("Не удалось получить список открытых ордеров: %s", e)
         return None
 
+    logger.warning(
+        "Список открытых ордеров не уместился в %s страниц, "
+        "проверяем статусы по каждому ордеру",
+        OPEN_ORDERS_MAX_PAGES,
+    )
+    return None
+
 
 async def process_user_orders(
-    telegram_id: int, api_client: PredictAPIClient, bot=None
+    telegram_id: int,
+    api_client: PredictAPIClient,
+    bot=None,
+    ob_cache: Optional[_OBCache] = None,
 ) -> Tuple[List[Dict], List[Dict], List[Dict]]:
     """
     Обрабатывает ордера пользователя и возвращает списки для отмены и размещения.
@@ -216,6 +748,7 @@ async def process_user_orders(
         telegram_id: ID пользователя в Telegram
         api_client: Клиент Predict.fun API (уже создан)
         bot: Экземпляр aiogram Bot для отправки уведомлений (опционально)
+        ob_cache: Кэш orderbook текущего цикла синхронизации (опционально)
 
     Returns:
         Tuple: (список order_api_id для отмены, список параметров новых ордеров, список уведомлений о смещении цены)
@@ -231,267 +764,317 @@ async def process_user_orders(
     db_orders = await get_user_orders(telegram_id, status=ORDER_STATUS_OPEN)
 
     if not db_orders:
-        logger.info(f"У пользователя {telegram_id} нет активных ордеров")
+        logger.info("У пользователя %s нет активных ордеров", telegram_id)
         return orders_to_cancel, orders_to_place, price_change_notifications
 
     logger.info(
-        f"Обработка {len(db_orders)} активных ордеров для пользователя {telegram_id}"
+        "Обработка %s активных ордеров для пользователя %s", len(db_orders), telegram_id
     )
 
-    # Обрабатываем каждый ордер
+    # Разбираем строки БД один раз, отбрасывая ордера с неполными данными
+    valid_orders: List[OrderRow] = []
     for db_order in db_orders:
         try:
-            order_hash = db_order.get("order_hash")
-            market_id = db_order.get("market_id")
-            market_title = db_order.get("market_title")
-            market_slug = db_order.get("market_slug")
-            token_id = db_order.get("token_id")  # Используем token_id из БД
-            token_name = db_order.get("token_name")  # YES или NO
-            side = db_order.get("side")  # BUY или SELL
-            current_price_at_creation = db_order.get("current_price", 0.0)
-            target_price = db_order.get("target_price", 0.0)
-            offset_ticks = db_order.get("offset_ticks", 0)
-            amount = db_order.get("amount", 0.0)
-            reposition_threshold_cents = float(
-                db_order.get("reposition_threshold_cents")
+            row = OrderRow.from_db(db_order)
+        except (TypeError, ValueError) as e:
+            logger.error(
+                "Ошибка при обработке ордера %s: %s",
+                db_order.get("order_hash", "unknown"),
+                e,
             )
-            db_status = db_order.get("status")
-            order_api_id = db_order.get("order_api_id")
-
-            if not order_hash or not market_id or not side or not token_id:
-                logger.warning(f"Пропуск ордера с неполными данными: {order_hash}")
-                continue
+            continue
+        if row is None:
+            logger.warning(
+                "Пропуск ордера с неполными данными: %s", db_order.get("order_hash")
+            )
+            continue
+        valid_orders.append(row)
+
+    # Список OPEN ордеров пользователя (один запрос вместо get_order_by_id на каждый ордер)
+    # и orderbook каждого уникального рынка запрашиваются одновременно
+    open_orders, best_bids = await asyncio.gather(
+        get_open_orders_by_hash(api_client),
+        get_orderbooks_bulk(
+            api_client,
+            (row.market_id for row in valid_orders),
+            ob_cache,
+        ),
+    )
 
-            logger.info(f"--- Обрабатываем ордер {order_hash} со статусом {db_status}")
+    # Ордера, которых нет среди открытых (скорее всего исполнены/отменены), проверяем
+    # по одному, чтобы узнать точный статус. Если список получить не удалось - проверяем все.
+    if open_orders is None:
+        open_orders = {}
+    rows_to_probe = [row for row in valid_orders if row.order_hash not in open_orders]
+    probed_orders = await asyncio.gather(
+        *(
+            api_client.get_order_by_id(order_hash=row.order_hash)
+            for row in rows_to_probe
+        ),
+        return_exceptions=True,
+    )
+    probed_by_hash = {
+        row.order_hash: api_order
+        for row, api_order in zip(rows_to_probe, probed_orders)
+    }
+    order_statuses = [
+        open_orders.get(row.order_hash) or probed_by_hash.get(row.order_hash)
+        for row in valid_orders
+    ]
+
+    status_updates = []  # (order_hash, новый статус) для обновления БД
+    filled_orders = []  # (row, api_order) для уведомлений об исполнении
+
+    # Обрабатываем каждый ордер (только вычисления, без сетевых запросов)
+    for row, api_order in zip(valid_orders, order_statuses):
+        try:
+            logger.debug(
+                "--- Обрабатываем ордер %s со статусом %s", row.order_hash, row.status
+            )
 
             # Проверяем статус ордера через API
             # Если ордер был активным, а стал заполненным/отмененным/истекшим/инвалидированным, обновляем БД
             # В новом API order_hash в БД - это hash ордера
-            try:
-                api_order = await api_client.get_order_by_id(order_hash=order_hash)
-                if api_order:
-                    # Получаем статус из API (новый API возвращает строки: 'OPEN', 'FILLED', 'CANCELLED', 'EXPIRED', 'INVALIDATED')
-                    api_status = api_order.get("status", "").upper()
+            if isinstance(api_order, BaseException):
+                # Логируем ошибку
+                error_str = str(api_order)
+                is_timeout = bool(_TIMEOUT_RE.search(error_str, 0, _TIMEOUT_SCAN_CHARS))
 
+                if is_timeout:
                     logger.info(
-                        f"Ордер {order_hash} статус в API: {api_status} статус в БД: {db_status}"
+                        "⏱️ Таймаут API при проверке статуса ордера %s, продолжаем обработку без проверки статуса",
+                        row.order_hash,
+                    )
+                else:
+                    logger.warning(
+                        "Ошибка при проверке статуса ордера %s через API: %s",
+                        row.order_hash,
+                        api_order,
                     )
 
-                    # Если статус в БД был 'OPEN', а в API стал 'FILLED'
-                    if (
-                        db_status == ORDER_STATUS_OPEN
-                        and api_status == ORDER_STATUS_FILLED
-                    ):
-                        logger.info(
-                            f"Ордер {order_hash} был OPEN, теперь FILLED. Обновляем БД и отправляем уведомление."
-                        )
+                # Продолжаем обработку, если не удалось проверить статус (graceful degradation)
+            elif api_order:
+                # Получаем статус из API (новый API возвращает строки: 'OPEN', 'FILLED', 'CANCELLED', 'EXPIRED', 'INVALIDATED')
+                api_status = api_order.get("status", "").upper()
+
+                logger.debug(
+                    "Ордер %s статус в API: %s статус в БД: %s",
+                    row.order_hash,
+                    api_status,
+                    row.status,
+                )
 
-                        # Обновляем статус в БД (используем статус из API напрямую)
-                        await update_order_status(order_hash, ORDER_STATUS_FILLED)
+                # В обработку попадают только OPEN ордера (get_user_orders фильтрует
+                # по статусу), поэтому сравниваем только статус из API.
+                # Если в API ордер стал 'FILLED'
+                if api_status == ORDER_STATUS_FILLED:
+                    logger.info(
+                        "Ордер %s был OPEN, теперь FILLED. Обновляем БД и отправляем уведомление.",
+                        row.order_hash,
+                    )
 
-                        # Отправляем уведомление пользователю
-                        # Используем db_order для базовых данных и api_order для amountFilled (точное значение исполненной суммы)
-                        if bot:
-                            await send_order_filled_notification(
-                                bot, telegram_id, db_order, api_order
-                            )
+                    # Обновляем статус в БД (используем статус из API напрямую)
+                    status_updates.append((row.order_hash, ORDER_STATUS_FILLED))
 
-                        # Пропускаем дальнейшую обработку этого ордера
-                        continue
-
-                    # Если статус в БД был 'OPEN', а в API стал 'CANCELLED', 'EXPIRED' или 'INVALIDATED'
-                    elif db_status == ORDER_STATUS_OPEN and api_status in (
-                        ORDER_STATUS_CANCELLED,
-                        ORDER_STATUS_EXPIRED,
-                        ORDER_STATUS_INVALIDATED,
-                    ):
-                        logger.info(
-                            f"Ордер {order_hash} был OPEN, теперь {api_status}. Обновляем БД."
-                        )
+                    # Уведомление пользователю отправляется после обновления БД
+                    # Используем db_order для базовых данных и api_order для amountFilled (точное значение исполненной суммы)
+                    filled_orders.append((row, api_order))
 
-                        # Обновляем статус в БД (используем статус из API напрямую)
-                        await update_order_status(order_hash, api_status)
-
-                        # Пропускаем дальнейшую обработку этого ордера
-                        continue
-
-                    # Если статус изменился, но не попал в известные случаи (неизвестный статус или неожиданное изменение)
-                    elif db_status != api_status:
-                        # Проверяем, является ли статус известным
-                        known_statuses = (
-                            ORDER_STATUS_OPEN,
-                            ORDER_STATUS_FILLED,
-                            ORDER_STATUS_CANCELLED,
-                            ORDER_STATUS_EXPIRED,
-                            ORDER_STATUS_INVALIDATED,
-                        )
+                    # Пропускаем дальнейшую обработку этого ордера
+                    continue
 
-                        if api_status not in known_statuses:
-                            # Неизвестный статус из API
-                            logger.warning(
-                                f"⚠️ Неизвестный статус ордера {order_hash} из API: '{api_status}' "
-                                f"(был в БД: '{db_status}'). Сохраняем статус в БД как есть."
-                            )
-                        else:
-                            # Известный статус, но неожиданное изменение (например, FILLED -> CANCELLED)
-                            logger.warning(
-                                f"⚠️ Неожиданное изменение статуса ордера {order_hash}: "
-                                f"'{db_status}' -> '{api_status}'. Обновляем БД."
-                            )
+                # Если в API ордер стал 'CANCELLED', 'EXPIRED' или 'INVALIDATED'
+                elif api_status in (
+                    ORDER_STATUS_CANCELLED,
+                    ORDER_STATUS_EXPIRED,
+                    ORDER_STATUS_INVALIDATED,
+                ):
+                    logger.info(
+                        "Ордер %s был OPEN, теперь %s. Обновляем БД.",
+                        row.order_hash,
+                        api_status,
+                    )
 
-                        # Обновляем статус в БД (сохраняем статус из API, даже если он неизвестный)
-                        await update_order_status(order_hash, api_status)
+                    # Обновляем статус в БД (используем статус из API напрямую)
+                    status_updates.append((row.order_hash, api_status))
 
-                        # Пропускаем дальнейшую обработку этого ордера
-                        continue
-            except Exception as e:
-                # Логируем ошибку
-                error_str = str(e)
-                is_timeout = (
-                    "504" in error_str
-                    or "Gateway Time-out" in error_str
-                    or "timeout" in error_str.lower()
-                )
+                    # Пропускаем дальнейшую обработку этого ордера
+                    continue
 
-                if is_timeout:
-                    logger.info(
-                        f"⏱️ Таймаут API при проверке статуса ордера {order_hash}, продолжаем обработку без проверки статуса"
-                    )
-                else:
+                # Любой другой статус, кроме 'OPEN', - неизвестный статус из API
+                elif api_status != ORDER_STATUS_OPEN:
                     logger.warning(
-                        f"Ошибка при проверке статуса ордера {order_hash} через API: {e}"
+                        "⚠️ Неизвестный статус ордера %s из API: '%s' "
+                        "(был в БД: '%s'). Сохраняем статус в БД как есть.",
+                        row.order_hash,
+                        api_status,
+                        row.status,
                     )
 
-                # Продолжаем обработку, если не удалось проверить статус (graceful degradation)
+                    # Обновляем статус в БД (сохраняем статус из API, даже если он неизвестный)
+                    status_updates.append((row.order_hash, api_status))
+
+                    # Пропускаем дальнейшую обработку этого ордера
+                    continue
 
-            # Получаем текущую цену рынка
-            new_current_price = await get_current_market_price(
-                api_client, market_id, side, token_name
+            # Текущая цена рынка (один orderbook на рынок, цена NO считается локально)
+            new_current_price = price_for_token(
+                best_bids.get(row.market_id), row.token_name
             )
             if not new_current_price:
                 logger.warning(
-                    f"Не удалось получить текущую цену для ордера {order_hash}"
+                    "Не удалось получить текущую цену для ордера %s", row.order_hash
                 )
                 continue
 
-            # Вычисляем новую целевую цену с использованием сохраненного offset_ticks
-            new_target_price = calculate_new_target_price(
-                new_current_price, side, offset_ticks
-            )
-
-            # Вычисляем изменение целевой цены в центах
-            target_price_change = abs(new_target_price - target_price)
-            target_price_change_cents = target_price_change * 100
-
-            # Проверяем, достаточно ли изменение для перестановки ордера
-            will_reposition = target_price_change_cents >= reposition_threshold_cents
+            # Решение о перестановке (чистая функция, без I/O)
+            decision = decide_reposition(row, new_current_price)
 
-            price_change = new_current_price - current_price_at_creation
+            price_change = new_current_price - row.current_price
 
-            # Вычисляем ожидаемую целевую цену для старой текущей цены (для проверки)
-            expected_old_target_price = calculate_new_target_price(
-                current_price_at_creation, side, offset_ticks, TICK_SIZE
-            )
-
-            logger.info(f"Цена изменилась для ордера {order_hash}:")
-            logger.info(f"  👤 User ID: {telegram_id}")
-            logger.info(f"  📊 Market ID: {market_id}")
-            logger.info(f"  📊 Market Slug: {market_slug}")
-            logger.info(f"  🪙 Token: {token_name} {side}")
-            logger.info(f"  Старая текущая цена: {current_price_at_creation}")
-            logger.info(f"  Новая текущая цена: {new_current_price}")
-            logger.info(f"  Изменение текущей цены: {price_change:+.6f}")
-            logger.info(f"  Старая целевая цена (из БД): {target_price}")
-            logger.info(
-                f"  Ожидаемая целевая цена (расчет): {expected_old_target_price:.6f}"
-            )
-            logger.info(f"  Новая целевая цена: {new_target_price}")
-            logger.info(
-                f"  Изменение целевой цены: {target_price_change:.6f} ({target_price_change_cents:.2f}¢)"
-            )
-            logger.info(f"  Порог перестановки: {reposition_threshold_cents:.2f}¢")
-            logger.info(f"  Offset (ticks): {offset_ticks}")
-            logger.info(f"  Будет переставлен: {'Да' if will_reposition else 'Нет'}")
+            # Подробный отчет по ордеру - одной записью и только если DEBUG включен
+            # (форматирование откладывается до обработчика, %-аргументы)
+            if logger.isEnabledFor(logging.DEBUG):
+                # Ожидаемая целевая цена для старой текущей цены (для проверки)
+                expected_old_target_price = calculate_new_target_price(
+                    row.current_price, row.side, row.offset_ticks, TICK_SIZE
+                )
+                logger.debug(
+                    "Цена изменилась для ордера %s:\n"
+                    "  👤 User ID: %s\n"
+                    "  📊 Market ID: %s\n"
+                    "  📊 Market Slug: %s\n"
+                    "  🪙 Token: %s %s\n"
+                    "  Старая текущая цена: %s\n"
+                    "  Новая текущая цена: %s\n"
+                    "  Изменение текущей цены: %+.6f\n"
+                    "  Старая целевая цена (из БД): %s\n"
+                    "  Ожидаемая целевая цена (расчет): %.6f\n"
+                    "  Новая целевая цена: %s\n"
+                    "  Изменение целевой цены: %.6f (%.2f¢)\n"
+                    "  Порог перестановки: %.2f¢\n"
+                    "  Offset (ticks): %s\n"
+                    "  Будет переставлен: %s",
+                    row.order_hash,
+                    telegram_id,
+                    row.market_id,
+                    row.market_slug,
+                    row.token_name,
+                    row.side,
+                    row.current_price,
+                    new_current_price,
+                    price_change,
+                    row.target_price,
+                    expected_old_target_price,
+                    decision.new_target_price,
+                    decision.target_price_change,
+                    decision.target_price_change_cents,
+                    row.reposition_threshold_cents,
+                    row.offset_ticks,
+                    "Да" if decision.will_reposition else "Нет",
+                )
 
             # Добавляем ордер в списки для отмены/размещения только если изменение достаточно
             # ВАЖНО: Ордер добавляется в ОБА списка одновременно, чтобы гарантировать:
             # 1. Каждый отмененный ордер имеет соответствующий новый ордер для размещения
             # 2. Списки всегда одинаковой длины (проверяется позже для безопасности)
             # 3. Невозможно отменить ордер без размещения нового (и наоборот)
-            if will_reposition:
-                orders_to_cancel.append(order_api_id)
-                logger.info(
-                    f"✅ Ордер {order_hash} (API ID: {order_api_id}, User: {telegram_id}, Market: {market_id}) добавлен в список для отмены"
-                )
+            if decision.will_reposition:
+                orders_to_cancel.append(row.order_api_id)
 
                 # Подготавливаем параметры нового ордера
-                order_side = Side.BUY if side == "BUY" else Side.SELL
+                order_side = _SIDE_MAP[row.side]
 
                 new_order_params = {
-                    "old_order_hash": order_hash,  # Старый order_hash для обновления БД
-                    "old_order_api_id": order_api_id,  # Старый order_api_id для отмены
-                    "market_id": market_id,
-                    "market_title": market_title,  # Добавляем title для уведомлений
-                    "market_slug": market_slug,  # Добавляем slug для уведомлений
-                    "token_id": token_id,
-                    "token_name": token_name,  # Добавляем для уведомлений и пересчета цены
+                    "old_order_hash": row.order_hash,  # Старый order_hash для обновления БД
+                    "old_order_api_id": row.order_api_id,  # Старый order_api_id для отмены
+                    "market_id": row.market_id,
+                    "market_title": row.market_title,  # Добавляем title для уведомлений
+                    "market_slug": row.market_slug,  # Добавляем slug для уведомлений
+                    "token_id": row.token_id,
+                    "token_name": row.token_name,  # Добавляем для уведомлений и пересчета цены
                     "side": order_side,  # Side.BUY или Side.SELL из predict_sdk
-                    "side_str": side,  # "BUY" или "SELL" (строка) для пересчета цены
-                    "offset_ticks": offset_ticks,  # Для пересчета цены перед размещением
-                    "price": new_target_price,  # Цена будет пересчитана перед размещением
-                    "amount": amount,
+                    "side_str": row.side,  # "BUY" или "SELL" (строка) для пересчета цены
+                    "offset_ticks": row.offset_ticks,  # Для пересчета цены перед размещением
+                    "price": decision.new_target_price,  # Цена будет пересчитана перед размещением
+                    "amount": row.amount,
                     "current_price_at_creation": new_current_price,  # Сохраняем для обновления БД
-                    "target_price": new_target_price,  # Сохраняем для обновления БД (будет пересчитана)
+                    "target_price": decision.new_target_price,  # Сохраняем для обновления БД (будет пересчитана)
                     "telegram_id": telegram_id,  # Добавляем для логирования
                 }
 
                 # Добавляем в список для размещения (всегда в паре с отменой)
                 orders_to_place.append(new_order_params)
                 logger.info(
-                    f"✅ Ордер {order_hash} (User: {telegram_id}, Market: {market_slug}) добавлен в список для размещения"
+                    "✅ Ордер %s (API ID: %s, User: %s, Market: %s) будет переставлен: "
+                    "%s -> %s (%.2f¢ >= %.2f¢)",
+                    row.order_hash,
+                    row.order_api_id,
+                    telegram_id,
+                    row.market_slug,
+                    row.target_price,
+                    decision.new_target_price,
+                    decision.target_price_change_cents,
+                    row.reposition_threshold_cents,
                 )
             else:
                 logger.info(
-                    f"⏭️ Ордер {order_hash} (User: {telegram_id}, Market: {market_slug}) не будет переставлен: "
-                    f"изменение целевой цены недостаточно ({target_price_change_cents:.2f}¢ < {reposition_threshold_cents:.2f}¢)"
+                    "⏭️ Ордер %s (User: %s, Market: %s) не будет переставлен: "
+                    "изменение целевой цены недостаточно (%.2f¢ < %.2f¢)",
+                    row.order_hash,
+                    telegram_id,
+                    row.market_slug,
+                    decision.target_price_change_cents,
+                    row.reposition_threshold_cents,
                 )
 
             # Добавляем уведомление о смещении цены ТОЛЬКО если ордер будет переставлен
             # Уведомление отправляется только когда изменение достаточно для перестановки
-            if will_reposition:
+            if decision.will_reposition:
                 # Добавляем уведомление о смещении цены только для ордеров, которые будут переставлены
                 price_change_notifications.append(
                     {
-                        "order_hash": order_hash,
-                        "order_api_id": order_api_id,
-                        "market_id": market_id,
-                        "market_title": market_title,  # Добавляем title для уведомлений
-                        "market_slug": market_slug,
-                        "token_name": token_name,
-                        "side": side,
-                        "old_current_price": current_price_at_creation,
+                        "order_hash": row.order_hash,
+                        "order_api_id": row.order_api_id,
+                        "market_id": row.market_id,
+                        "market_title": row.market_title,  # Добавляем title для уведомлений
+                        "market_slug": row.market_slug,
+                        "token_name": row.token_name,
+                        "side": row.side,
+                        "old_current_price": row.current_price,
                         "new_current_price": new_current_price,
-                        "old_target_price": target_price,
-                        "new_target_price": new_target_price,
+                        "old_target_price": row.target_price,
+                        "new_target_price": decision.new_target_price,
                         "price_change": price_change,
-                        "target_price_change": target_price_change,
-                        "target_price_change_cents": target_price_change_cents,
-                        "reposition_threshold_cents": reposition_threshold_cents,
-                        "offset_ticks": offset_ticks,
-                        "will_reposition": will_reposition,
+                        "target_price_change": decision.target_price_change,
+                        "target_price_change_cents": decision.target_price_change_cents,
+                        "reposition_threshold_cents": row.reposition_threshold_cents,
+                        "offset_ticks": row.offset_ticks,
+                        "will_reposition": decision.will_reposition,
                     }
                 )
-            else:
-                logger.info(
-                    f"⏭️ Ордер {order_hash} не будет переставлен, уведомление не отправляется"
-                )
 
-        except Exception as e:
-            logger.error(
-                f"Ошибка при обработке ордера {db_order.get('order_hash', 'unknown')}: {e}"
-            )
+        except _EXPECTED_ERRORS as e:
+            logger.error("Ошибка при обработке ордера %s: %s", row.order_hash, e)
             # При ошибке не добавляем уведомление, чтобы не вводить пользователя в заблуждение
             continue
+        except Exception:
+            # Ошибка одного ордера не прерывает обработку остальных ордеров пользователя
+            logger.exception(
+                "Непредвиденная ошибка при обработке ордера %s", row.order_hash
+            )
+            continue
+
+    # Применяем изменения статусов в БД одним запросом
+    if status_updates:
+        await bulk_update_order_status(status_updates)
+
+    # Уведомления об исполненных ордерах (после обновления БД) отправляются в фоне
+    if bot and filled_orders:
+        _notify_in_background(
+            send_order_filled_notification(bot, telegram_id, asdict(row), api_order)
+            for row, api_order in filled_orders
+        )
 
     return orders_to_cancel, orders_to_place, price_change_notifications
 
@@ -502,6 +1085,12 @@ async def cancel_orders_batch(
     """
     Отменяет ордера через API (off-chain, удаление из orderbook).
 
+    API принимает не больше CANCEL_ORDERS_BATCH_SIZE ордеров за запрос, поэтому
+    список отправляется частями, а результаты частей объединяются. Если часть
+    запросов не удалась, success=True сохраняется при хотя бы одной успешной
+    части: в removed/noop попадут не все ордера, и вызывающий код не перейдет
+    к размещению.
+
     Args:
         api_client: Клиент Predict.fun API
         orders_to_cancel: Список order_api_id для отмены [order_api_id: str, ...]
@@ -511,95 +1100,113 @@ async def cancel_orders_batch(
             'success': bool,
             'removed': List[str],  # ID ордеров, которые были успешно удалены
             'noop': List[str],     # ID ордеров, которые уже были удалены/исполнены/отменены
-            'cause': Optional[str] # Причина ошибки, если success=False
+            'cause': Optional[str] # Причина ошибки, если success=False или часть запросов не удалась
         }
     """
-    try:
-        if not orders_to_cancel:
-            logger.warning("Нет ордеров для отмены (не удалось получить ID)")
-            return {
-                "success": False,
-                "removed": [],
-                "noop": [],
-                "cause": "No orders to cancel",
-            }
+    if not orders_to_cancel:
+        logger.warning("Нет ордеров для отмены (не удалось получить ID)")
+        return {
+            "success": False,
+            "removed": [],
+            "noop": [],
+            "cause": "No orders to cancel",
+        }
 
-        # Отменяем ордера через API (off-chain)
-        result = await api_client.cancel_orders(order_ids=orders_to_cancel)
+    removed = []
+    noop = []
+    succeeded = False
+    cause = None
+    for start in range(0, len(orders_to_cancel), CANCEL_ORDERS_BATCH_SIZE):
+        chunk = orders_to_cancel[start : start + CANCEL_ORDERS_BATCH_SIZE]
+        try:
+            # Отменяем ордера через API (off-chain)
+            result = await api_client.cancel_orders(order_ids=chunk)
+        except Exception as e:
+            logger.error("Ошибка при batch отмене ордеров: %s", e)
+            cause = cause or str(e)
+            continue
 
         if result.get("success", False):
-            removed_count = len(result.get("removed", []))
-            noop_count = len(result.get("noop", []))
-            logger.info(
-                f"Успешно отменено {removed_count} ордеров через API (noop: {noop_count})"
-            )
+            succeeded = True
+            removed.extend(result.get("removed", []))
+            noop.extend(result.get("noop", []))
         else:
             logger.error("Ошибка при отмене ордеров через API")
+            cause = cause or result.get("cause", "Unknown error")
 
-        return result
+    if succeeded:
+        logger.info(
+            "Успешно отменено %s ордеров через API (noop: %s)",
+            len(removed),
+            len(noop),
+        )
 
-    except Exception as e:
-        logger.error(f"Ошибка при batch отмене ордеров: {e}")
-        return {"success": False, "removed": [], "noop": [], "cause": str(e)}
+    result = {"success": succeeded, "removed": removed, "noop": noop}
+    if cause is not None:
+        result["cause"] = cause
+    return result
 
 
 async def place_orders_batch(
-    api_client: PredictAPIClient, orders_params: List[Dict]
-) -> List[Dict]:
+    api_client: PredictAPIClient,
+    orders_params: List[Dict],
+    ob_cache: Optional[_OBCache] = None,
+    order_builder: Optional[OrderBuilder] = None,
+) -> List[PlaceResult]:
     """
     Размещает ордера через новый API (SDK + REST API).
 
-    В новом API нет батч размещения, поэтому размещаем ордера последовательно.
+    В новом API нет батч размещения, поэтому ордера размещаются отдельными
+    запросами, параллельно (не более PLACE_ORDERS_CONCURRENCY одновременно).
 
     Args:
         api_client: Клиент Predict.fun API
-        orders_params: Список параметров ордеров (должен содержать order_builder, api_client, market_id, token_id, side, price, amount)
+        orders_params: Список параметров ордеров (market_id, token_id, side, price, amount;
+            order_builder - если не передан общий order_builder)
+        ob_cache: Кэш orderbook текущего цикла синхронизации (опционально)
+        order_builder: OrderBuilder пользователя, общий для всех ордеров батча
 
     Returns:
-        Список результатов размещения. Каждый результат имеет структуру:
-        {
-            'success': bool,
-            'order_hash': Optional[str],  # Hash ордера (используется как order_id в БД)
-            'order_id': Optional[str],    # ID ордера из API (bigint string)
-            'error': Optional[str]
-        }
+        Список PlaceResult в порядке orders_params
     """
-    results = []
+    # Актуальные цены для пересчета: один запрос orderbook на каждый рынок
+    # (цена могла измениться пока мы отменяли старые ордера)
+    recalc_market_ids = {
+        params.get("market_id")
+        for params in orders_params
+        if params.get("token_name")
+        and params.get("side_str")
+        and params.get("offset_ticks") is not None
+    }
+    best_bids = (
+        await get_orderbooks_bulk(api_client, recalc_market_ids, ob_cache)
+        if recalc_market_ids
+        else {}
+    )
 
-    for i, params in enumerate(orders_params):
+    semaphore = asyncio.Semaphore(PLACE_ORDERS_CONCURRENCY)
+
+    async def _place_one(i: int, params: Dict) -> PlaceResult:
+        """Размещает один ордер и возвращает результат размещения."""
         try:
-            order_builder = params.get("order_builder")
-            if not order_builder:
-                logger.error(f"Отсутствует order_builder в параметрах ордера {i}")
-                results.append(
-                    {
-                        "success": False,
-                        "order_hash": None,
-                        "order_api_id": None,
-                        "error": "Missing order_builder",
-                    }
-                )
-                continue
+            builder = order_builder or params.get("order_builder")
+            if not builder:
+                logger.error("Отсутствует order_builder в параметрах ордера %s", i)
+                return PlaceResult(False, error="Missing order_builder")
 
             # Получаем параметры для размещения
             market_id = params.get("market_id")
             token_id = params.get("token_id")
             side = params.get("side")  # Side.BUY или Side.SELL
+            # price и amount обычно уже float (из OrderRow / Decision); float()
+            # на float ничего не стоит и без проверки типа принимает int/Decimal/str
             price = float(params["price"])
             amount = float(params["amount"])
 
             # Проверяем тип side
-            if not isinstance(side, Side):
-                logger.error(f"Неверный тип side для ордера {i}: {type(side)}")
-                results.append(
-                    {
-                        "success": False,
-                        "order_hash": None,
-                        "order_api_id": None,
-                        "error": "Invalid side type",
-                    }
-                )
-                continue
+            if side not in _VALID_SIDES:
+                logger.error("Неверный тип side для ордера %s: %s", i, type(side))
+                return PlaceResult(False, error="Invalid side type")
 
             # Пересчитываем цену перед размещением (цена могла измениться пока мы отменяли старые ордера)
             token_name = params.get("token_name")
@@ -610,19 +1217,21 @@ async def place_orders_batch(
             current_price_for_db = None
 
             if token_name and side_str and offset_ticks is not None:
-                # Получаем актуальную текущую цену рынка
-                current_price = await get_current_market_price(
-                    api_client, market_id, side_str, token_name
-                )
+                # Актуальная текущая цена рынка (загружена заранее для всех ордеров)
+                current_price = price_for_token(best_bids.get(market_id), token_name)
                 if current_price:
                     # Пересчитываем целевую цену с актуальной текущей ценой
                     recalculated_price = calculate_new_target_price(
                         current_price, side_str, offset_ticks, TICK_SIZE
                     )
                     logger.info(
-                        f"Пересчитана цена перед размещением ордера {i}: "
-                        f"старая цена={price}, новая цена={recalculated_price}, "
-                        f"текущая цена рынка={current_price}"
+                        "Пересчитана цена перед размещением ордера %s: "
+                        "старая цена=%s, новая цена=%s, "
+                        "текущая цена рынка=%s",
+                        i,
+                        price,
+                        recalculated_price,
+                        current_price,
                     )
                     final_price = recalculated_price
                     current_price_for_db = current_price
@@ -636,14 +1245,16 @@ async def place_orders_batch(
             market = None
             if market_id:
                 try:
-                    market = await api_client.get_market(market_id=market_id)
+                    market = await get_market_cached(api_client, market_id)
                 except Exception as e:
-                    logger.warning(f"Не удалось получить данные рынка {market_id}: {e}")
+                    logger.warning(
+                        "Не удалось получить данные рынка %s: %s", market_id, e
+                    )
 
             # Используем общий метод размещения ордера
             success, order_hash, order_api_id, error_msg = await place_single_order(
                 api_client=api_client,
-                order_builder=order_builder,
+                order_builder=builder,
                 token_id=token_id,
                 side=side,
                 price=final_price,  # Используем пересчитанную цену
@@ -653,80 +1264,85 @@ async def place_orders_batch(
             )
 
             if success:
-                logger.info(f"Размещен ордер: hash={order_hash}, api_id={order_api_id}")
+                logger.info(
+                    "Размещен ордер: hash=%s, api_id=%s", order_hash, order_api_id
+                )
                 # Обновляем цены в params для использования при обновлении БД
                 if current_price_for_db is not None:
                     params["current_price_at_creation"] = current_price_for_db
                     params["target_price"] = final_price
-                results.append(
-                    {
-                        "success": True,
-                        "order_hash": order_hash,
-                        "order_api_id": order_api_id,
-                        "error": None,
-                    }
-                )
+                return PlaceResult(True, order_hash, order_api_id)
             else:
-                logger.error(f"Ошибка размещения ордера {i}: {error_msg}")
-                results.append(
-                    {
-                        "success": False,
-                        "order_hash": None,
-                        "order_api_id": None,
-                        "error": error_msg,
-                    }
-                )
+                logger.error("Ошибка размещения ордера %s: %s", i, error_msg)
+                return PlaceResult(False, error=error_msg)
 
+        except _EXPECTED_ERRORS as e:
+            logger.error("Ошибка при размещении ордера %s: %s", i, e)
+            error = str(e)
         except Exception as e:
-            logger.error(f"Ошибка при размещении ордера {i}: {e}")
-            traceback.print_exc()
-            results.append(
-                {
-                    "success": False,
-                    "order_hash": None,
-                    "order_api_id": None,
-                    "error": str(e),
-                }
-            )
-
-    success_count = sum(1 for r in results if r.get("success", False))
-    failed_count = len(results) - success_count
-    logger.info(f"Размещено ордеров: {success_count}, ошибок: {failed_count}")
+            # Старый ордер уже отменен, поэтому остальные ордера пакета
+            # размещаются дальше; traceback нужен только для таких ошибок
+            logger.exception("Непредвиденная ошибка при размещении ордера %d", i)
+            error = str(e)
+        return PlaceResult(False, error=error)
+
+    success_count = 0
+    failed_count = 0
+
+    async def _place_one_limited(i: int, params: Dict) -> PlaceResult:
+        nonlocal success_count, failed_count
+        async with semaphore:
+            result = await _place_one(i, params)
+        # Считаем результаты по мере размещения, без второго прохода по results
+        if result.success:
+            success_count += 1
+        else:
+            failed_count += 1
+        return result
 
-    return results
+    # Ордера независимы, поэтому размещаются параллельно (не более
+    # PLACE_ORDERS_CONCURRENCY одновременно). gather сохраняет порядок:
+    # results[i] соответствует orders_params[i].
+    results = await asyncio.gather(
+        *(_place_one_limited(i, params) for i, params in enumerate(orders_params))
+    )
 
+    logger.info("Размещено ордеров: %s, ошибок: %s", success_count, failed_count)
 
-async def send_price_change_notification(bot, telegram_id: int, notification: Dict):
-    """Отправляет уведомление пользователю о смещении цены."""
-    try:
-        old_price_cents = notification["old_current_price"] * 100
-        new_price_cents = notification["new_current_price"] * 100
-        old_target_cents = notification["old_target_price"] * 100
-        new_target_cents = notification["new_target_price"] * 100
-        price_change_cents = notification["price_change"] * 100
-
-        # Convert offset_ticks to cents
-        offset_ticks = notification["offset_ticks"]
-        offset_cents = offset_ticks * TICK_SIZE * 100
-
-        # Get reposition information
-        target_price_change_cents = notification.get("target_price_change_cents", 0.0)
-        reposition_threshold_cents = float(
-            notification.get("reposition_threshold_cents")
-        )
+    return results
 
-        side_emoji = "📈" if notification["side"] == "BUY" else "📉"
-        change_sign = "+" if notification["price_change"] > 0 else ""
 
-        # Status message - уведомление отправляется только когда ордер будет переставлен
-        status_emoji = "✅"
-        status_text = f"Order will be repositioned (change: {target_price_change_cents:.2f} cents &gt;= threshold: {reposition_threshold_cents:.2f} cents)"
+# Шаблоны уведомлений (собираются один раз при импорте, заполняются через str.format)
+# Ошибки данных при сборке текста уведомления (нет поля, неверный тип)
+_NOTIFICATION_DATA_ERRORS = (KeyError, TypeError, ValueError, AttributeError)
+
+# Сторона (Side или строка из БД) -> (emoji, текст); одна проверка на уведомление
+_SIDE_BUY = ("📈", "BUY")
+_SIDE_SELL = ("📉", "SELL")
+_SIDE_TABLE = {
+    Side.BUY: _SIDE_BUY,
+    "BUY": _SIDE_BUY,
+    Side.SELL: _SIDE_SELL,
+    "SELL": _SIDE_SELL,
+}
+
+# Размер тика в центах
+_TICK_CENTS = TICK_SIZE * 100.0
+
+# Поля уведомления о смещении цены, которые показываются в центах
+_PRICE_CHANGE_CENTS_KEYS = (
+    "old_current_price",
+    "new_current_price",
+    "old_target_price",
+    "new_target_price",
+    "price_change",
+)
 
-        # Экранируем HTML-специальные символы и используем "cents" вместо символа ¢
-        message = f"""🔔 <b>Price Change Detected</b>
+# Экранируем HTML-специальные символы и используем "cents" вместо символа ¢
+_PRICE_CHANGE_TMPL = """🔔 <b>Price Change Detected</b>
 
-{side_emoji} <b>{notification["token_name"]} {notification["side"]}</b>
-📊 Market title: {notification.get("market_title", "N/A")}
+{side_emoji} <b>{token_name} {side}</b>
+📊 Market title: {market_title}
 
 💰 <b>Current Price:</b>
    Old: {old_price_cents:.2f} cents
@@ -742,41 +1358,12 @@ async def send_price_change_notification(bot, telegram_id: int, notification: Di
    Offset: {offset_cents:.2f} cents
    Reposition threshold: {reposition_threshold_cents:.2f} cents
 
-{status_emoji} <b>Status:</b> {status_text}"""
+✅ <b>Status:</b> Order will be repositioned (change: {target_price_change_cents:.2f} cents &gt;= threshold: {reposition_threshold_cents:.2f} cents)"""
 
-        await bot.send_message(chat_id=telegram_id, text=message)
-        logger.info(
-            f"Sent price change notification to user {telegram_id} for order {notification.get('order_hash', 'unknown')}"
-        )
-    except Exception as e:
-        logger.error(
-            f"Failed to send price change notification to user {telegram_id}: {e}"
-        )
-
-
-async def send_order_updated_notification(
-    bot, telegram_id: int, order_params: Dict, new_order_hash: str
-):
-    """Отправляет уведомление пользователю об успешном обновлении ордера в БД."""
-    try:
-        current_price_cents = order_params["current_price_at_creation"] * 100
-        target_price_cents = order_params["target_price"] * 100
-
-        side_emoji = "📈" if order_params.get("side") == Side.BUY else "📉"
-        side_text = "BUY" if order_params.get("side") == Side.BUY else "SELL"
-
-        # Форматируем сумму
-        amount = order_params.get("amount", 0.0)
-        amount_display = (
-            f"{amount:.6f}".rstrip("0").rstrip(".")
-            if isinstance(amount, (int, float))
-            else str(amount)
-        )
+_ORDER_UPDATED_TMPL = """✅ <b>Order Updated Successfully</b>
 
-        message = f"""✅ <b>Order Updated Successfully</b>
-
-{side_emoji} <b>{order_params.get("token_name", "N/A")} {side_text}</b>
-📊 Market title: {order_params.get("market_title", "N/A")}
+{side_emoji} <b>{token_name} {side_text}</b>
+📊 Market title: {market_title}
 
 🆔 <b>New Order Hash:</b>
 <code>{new_order_hash}</code>
@@ -787,13 +1374,247 @@ async def send_order_updated_notification(
 
 Order has been successfully moved to maintain the offset."""
 
-        await bot.send_message(chat_id=telegram_id, text=message)
+_PLACEMENT_ERROR_TMPL = """❌ <b>Order Repositioning Failed</b>
+
+{side_emoji} <b>{token_name} {side_text}</b>
+📊 Market title: {market_title}
+
+🆔 <b>Cancelled Order Hash:</b>
+<code>{old_order_hash}</code>
+
+💰 <b>Target Price:</b> {target_price_cents:.2f} cents
+💵 <b>Amount:</b> {amount_display} USDT
+
+⚠️ <b>Error {errno}</b>
+Your order was cancelled, but the new order could not be placed.
+
+Error details:
+• Error code: {errno}
+• Error message: {errmsg}
+
+<b>⚠️ IMPORTANT:</b> Your old order has been cancelled. Please check your balance and place a new order manually if needed."""
+
+_ORDER_FILLED_TMPL = """🚨 <b>Order Filled - Action Required</b>
+
+{side_emoji} <b>{side}</b>
+📊 Market title: {market_title}
+📋 Market: <a href="https://predict.fun/market/{market_slug}">View Market</a>
+
+🆔 <b>Order Hash:</b>
+<code>{order_hash}</code>
+
+💵 <b>Filled Amount:</b> {amount_display} USDT
+
+Your order has been successfully filled! Please check the market and consider placing new orders. 🎉"""
+
+_CANCELLATION_ERROR_ITEM_TMPL = (
+    "• Order <code>{order_hash}</code>\n"
+    "  Market title: {market_title}, Token: {token_name} {side}\n"
+    "  Error: {errno} - {errmsg}"
+)
+
+_CANCELLATION_ERROR_TMPL = """❌ <b>Order Cancellation Failed</b>
+
+⚠️ <b>Failed to cancel {count} order(s)</b>
+
+The following orders could not be cancelled:
+{orders_text}
+
+<b>⚠️ IMPORTANT:</b>
+• New orders will NOT be placed (safety check)
+• Your old orders remain active
+• Please check the orders manually and cancel them if needed
+• The repositioning will be retried in the next sync cycle"""
+
+
+def _html(value) -> str:
+    """Экранирует пользовательские/внешние данные для сообщений с parse_mode=HTML."""
+    return escape(str(value))
+
+
+def _fmt_amount(amount) -> str:
+    """Форматирует сумму USDT для уведомлений: до 6 знаков, без хвостовых нулей."""
+    if isinstance(amount, (int, float)):
+        return f"{amount:.6f}".rstrip("0").rstrip(".")
+    return str(amount)
+
+
+def _notify_in_background(coros: Iterable[Awaitable]) -> None:
+    """
+    Запускает отправку уведомлений фоновыми задачами, не дожидаясь их.
+
+    Порядок сообщений в одном чате сохраняется: OutgoingRateLimitMiddleware
+    резервирует слот чата в момент вызова send_message, а задачи стартуют
+    в порядке создания.
+
+    Args:
+        coros: Корутины send_*_notification
+    """
+    for coro in coros:
+        task = asyncio.create_task(coro)
+        _notification_tasks.add(task)
+        task.add_done_callback(_notification_tasks.discard)
+
+
+async def drain_notifications(timeout: Optional[float] = None) -> None:
+    """
+    Ждет отправки фоновых уведомлений; по истечении timeout отменяет оставшиеся.
+
+    Args:
+        timeout: Максимальное время ожидания в секундах (None - без ограничения)
+    """
+    if not _notification_tasks:
+        return
+    _, pending = await asyncio.wait(set(_notification_tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning("Отменено %s неотправленных уведомлений", len(pending))
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def close_notifications() -> None:
+    """Дожидается фоновых уведомлений при остановке бота (не дольше таймаута)."""
+    await drain_notifications(NOTIFICATIONS_SHUTDOWN_TIMEOUT)
+
+
+async def _send_message(bot, what: str, chat_id: int, text: str, **kwargs) -> bool:
+    """
+    Отправляет сообщение в Telegram с повторами при временных ошибках.
+
+    Частоту отправки (глобальный лимит и интервал между сообщениями в один чат)
+    ограничивает OutgoingRateLimitMiddleware на сессии бота.
+
+    При flood control (TelegramRetryAfter) отправка повторяется через retry_after,
+    при сетевых ошибках - с экспоненциальной задержкой, всего до
+    TELEGRAM_SEND_ATTEMPTS попыток. Остальные ошибки отправки логируются здесь и
+    не пробрасываются: уведомления не должны прерывать синхронизацию ордеров.
+
+    Args:
+        bot: Экземпляр aiogram Bot
+        what: Название уведомления для логов (например, "price change notification")
+        chat_id: ID пользователя в Telegram
+        text: Готовый текст сообщения
+        **kwargs: Дополнительные параметры bot.send_message
+
+    Returns:
+        True, если сообщение отправлено
+    """
+    for attempt in range(1, TELEGRAM_SEND_ATTEMPTS + 1):
+        try:
+            await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            return True
+        except TelegramRetryAfter as e:
+            error, delay = e, e.retry_after
+            if delay > TELEGRAM_RETRY_AFTER_MAX:
+                logger.error(
+                    "Failed to send %s to user %s: flood control for %ss",
+                    what,
+                    chat_id,
+                    delay,
+                )
+                return False
+        except TelegramNetworkError as e:
+            error, delay = e, 2 ** (attempt - 1)
+        except TelegramAPIError as e:
+            logger.error("Failed to send %s to user %s: %s", what, chat_id, e)
+            return False
+        except Exception:
+            logger.exception("Unexpected error sending %s to user %s", what, chat_id)
+            return False
+
+        if attempt == TELEGRAM_SEND_ATTEMPTS:
+            break
+        logger.warning(
+            "Retrying %s to user %s in %ss (attempt %d/%d): %s",
+            what,
+            chat_id,
+            delay,
+            attempt,
+            TELEGRAM_SEND_ATTEMPTS,
+            error,
+        )
+        await asyncio.sleep(delay)
+
+    logger.error(
+        "Failed to send %s to user %s after %d attempts: %s",
+        what,
+        chat_id,
+        TELEGRAM_SEND_ATTEMPTS,
+        error,
+    )
+    return False
+
+
+async def send_price_change_notification(bot, telegram_id: int, notification: Dict):
+    """Отправляет уведомление пользователю о смещении цены."""
+    # Сначала собираем текст: ошибки данных не смешиваются с ошибками отправки
+    try:
+        n = notification
+        (
+            old_price_cents,
+            new_price_cents,
+            old_target_cents,
+            new_target_cents,
+            price_change_cents,
+        ) = (n[key] * 100 for key in _PRICE_CHANGE_CENTS_KEYS)
+
+        message = _PRICE_CHANGE_TMPL.format(
+            side_emoji=_SIDE_TABLE.get(n["side"], _SIDE_SELL)[0],
+            token_name=_html(n["token_name"]),
+            side=n["side"],
+            market_title=_html(n.get("market_title", "N/A")),
+            old_price_cents=old_price_cents,
+            new_price_cents=new_price_cents,
+            change_sign="+" if price_change_cents > 0 else "",
+            price_change_cents=price_change_cents,
+            old_target_cents=old_target_cents,
+            new_target_cents=new_target_cents,
+            target_price_change_cents=n.get("target_price_change_cents", 0.0),
+            offset_cents=n["offset_ticks"] * _TICK_CENTS,
+            reposition_threshold_cents=float(n.get("reposition_threshold_cents")),
+        )
+    except _NOTIFICATION_DATA_ERRORS as e:
+        logger.error(
+            "Failed to build price change notification for user %s: %r", telegram_id, e
+        )
+        return
+
+    if await _send_message(bot, "price change notification", telegram_id, message):
         logger.info(
-            f"Sent order updated notification to user {telegram_id} for order {new_order_hash}"
+            "Sent price change notification to user %s for order %s",
+            telegram_id,
+            notification.get("order_hash", "unknown"),
         )
-    except Exception as e:
+
+
+async def send_order_updated_notification(
+    bot, telegram_id: int, order_params: Dict, new_order_hash: str
+):
+    """Отправляет уведомление пользователю об успешном обновлении ордера в БД."""
+    try:
+        side_emoji, side_text = _SIDE_TABLE.get(order_params.get("side"), _SIDE_SELL)
+        message = _ORDER_UPDATED_TMPL.format(
+            side_emoji=side_emoji,
+            token_name=_html(order_params.get("token_name", "N/A")),
+            side_text=side_text,
+            market_title=_html(order_params.get("market_title", "N/A")),
+            new_order_hash=new_order_hash,
+            current_price_cents=order_params["current_price_at_creation"] * 100,
+            target_price_cents=order_params["target_price"] * 100,
+            amount_display=_fmt_amount(order_params.get("amount", 0.0)),
+        )
+    except _NOTIFICATION_DATA_ERRORS as e:
         logger.error(
-            f"Failed to send order updated notification to user {telegram_id}: {e}"
+            "Failed to build order updated notification for user %s: %r", telegram_id, e
+        )
+        return
+
+    if await _send_message(bot, "order updated notification", telegram_id, message):
+        logger.info(
+            "Sent order updated notification to user %s for order %s",
+            telegram_id,
+            new_order_hash,
         )
 
 
@@ -808,46 +1629,33 @@ async def send_order_placement_error_notification(
     """Отправляет уведомление пользователю об ошибке размещения ордера."""
     try:
         # Используем .get() для всех полей с значениями по умолчанию
-        target_price = order_params.get("target_price", 0.0)
-        target_price_cents = target_price * 100
-
-        side_emoji = "📈" if order_params.get("side") == Side.BUY else "📉"
-        side_text = "BUY" if order_params.get("side") == Side.BUY else "SELL"
-
-        # Форматируем сумму
-        amount = order_params.get("amount", "N/A")
-        if isinstance(amount, (int, float)):
-            amount_display = f"{amount:.6f}".rstrip("0").rstrip(".")
-        else:
-            amount_display = str(amount)
-
-        # Формируем сообщение об ошибке с информацией из API
-        error_type = f"Error {errno}"
-        error_description = f"Your order was cancelled, but the new order could not be placed.\n\nError details:\n• Error code: {errno}\n• Error message: {errmsg}"
-
-        message = f"""❌ <b>Order Repositioning Failed</b>
-
-{side_emoji} <b>{order_params.get("token_name", "N/A")} {side_text}</b>
-📊 Market title: {order_params.get("market_title", "N/A")}
-
-🆔 <b>Cancelled Order Hash:</b>
-<code>{old_order_hash}</code>
-
-💰 <b>Target Price:</b> {target_price_cents:.2f} cents
-💵 <b>Amount:</b> {amount_display} USDT
-
-⚠️ <b>{error_type}</b>
-{error_description}
-
-<b>⚠️ IMPORTANT:</b> Your old order has been cancelled. Please check your balance and place a new order manually if needed."""
-
-        await bot.send_message(chat_id=telegram_id, text=message)
-        logger.info(
-            f"Sent order placement error notification to user {telegram_id} for order {old_order_hash}"
+        side_emoji, side_text = _SIDE_TABLE.get(order_params.get("side"), _SIDE_SELL)
+        message = _PLACEMENT_ERROR_TMPL.format(
+            side_emoji=side_emoji,
+            token_name=_html(order_params.get("token_name", "N/A")),
+            side_text=side_text,
+            market_title=_html(order_params.get("market_title", "N/A")),
+            old_order_hash=old_order_hash,
+            target_price_cents=order_params.get("target_price", 0.0) * 100,
+            amount_display=_fmt_amount(order_params.get("amount", "N/A")),
+            errno=errno,
+            errmsg=_html(errmsg),
         )
-    except Exception as e:
+    except _NOTIFICATION_DATA_ERRORS as e:
         logger.error(
-            f"Failed to send order placement error notification to user {telegram_id}: {e}"
+            "Failed to build order placement error notification for user %s: %r",
+            telegram_id,
+            e,
+        )
+        return
+
+    if await _send_message(
+        bot, "order placement error notification", telegram_id, message
+    ):
+        logger.info(
+            "Sent order placement error notification to user %s for order %s",
+            telegram_id,
+            old_order_hash,
         )
 
 
@@ -866,49 +1674,41 @@ async def send_order_filled_notification(
     try:
         # Извлекаем данные из БД
         order_hash = db_order.get("order_hash")
-        market_title = db_order.get("market_title")
-        market_slug = db_order.get("market_slug")
-        side = db_order.get("side")  # BUY или SELL
-
-        # Определяем side и emoji
-        side_enum = side.upper()  # BUY или SELL
-        side_emoji = "📈" if side_enum == "BUY" else "📉"
+        side_enum = db_order.get("side").upper()  # BUY или SELL
 
         amount_filled = api_order.get("amountFilled")
 
         # Форматируем amount (конвертируем из wei в USDT)
         try:
-            # amountFilled приходит в wei, нужно разделить на 1e18 для получения USDT
-            amount_wei = (
-                int(amount_filled) if isinstance(amount_filled, str) else amount_filled
-            )
-            amount_usdt = amount_wei / 1e18
-            amount_display = f"{amount_usdt:.6f}".rstrip("0").rstrip(".")
-        except (ValueError, TypeError, ZeroDivisionError):
+            # amountFilled приходит в wei; переводим в USDT целочисленно, без float
+            amount_display = format_usdt(int(amount_filled), strip_zeros=True)
+        except (ValueError, TypeError):
             amount_display = str(amount_filled)
 
-        market_url = f"https://predict.fun/market/{market_slug}"
-
-        message = f"""🚨 <b>Order Filled - Action Required</b>
-
-{side_emoji} <b>{side_enum}</b>
-📊 Market title: {market_title}
-📋 Market: <a href="{market_url}">View Market</a>
-
-🆔 <b>Order Hash:</b>
-<code>{order_hash}</code>
-
-💵 <b>Filled Amount:</b> {amount_display} USDT
-
-Your order has been successfully filled! Please check the market and consider placing new orders. 🎉"""
+        message = _ORDER_FILLED_TMPL.format(
+            side_emoji=_SIDE_TABLE.get(side_enum, _SIDE_SELL)[0],
+            side=side_enum,
+            market_title=_html(db_order.get("market_title")),
+            market_slug=_html(db_order.get("market_slug")),
+            order_hash=order_hash,
+            amount_display=amount_display,
+        )
+    except _NOTIFICATION_DATA_ERRORS as e:
+        logger.error(
+            "Ошибка при формировании уведомления об исполнении для пользователя %s: %r",
+            telegram_id,
+            e,
+        )
+        return
 
-        await bot.send_message(chat_id=telegram_id, text=message, parse_mode="HTML")
+    if await _send_message(
+        bot, "order filled notification", telegram_id, message, parse_mode="HTML"
+    ):
         logger.info(
-            f"Отправлено уведомление об исполнении ордера {order_hash} пользователю {telegram_id}"
+            "Отправлено уведомление об исполнении ордера %s пользователю %s",
+            order_hash,
+            telegram_id,
         )
-    except Exception as e:
-        logger.error(f"Ошибка при отправке уведомления пользователю {telegram_id}: {e}")
-        logger.error(traceback.format_exc())
 
 
 async def send_cancellation_error_notification(
@@ -923,299 +1723,308 @@ async def send_cancellation_error_notification(
         failed_orders: Список словарей с информацией о неудачных отменах:
             [{"order_hash": str, "market_id": int, "token_name": str, "side": str, "errno": int, "errmsg": str}, ...]
     """
-    try:
-        if not failed_orders:
-            return
+    if not failed_orders:
+        return
 
+    try:
         # Формируем список неудачных ордеров
-        orders_list = []
-        for order_info in failed_orders:
-            order_hash = order_info.get("order_hash", "Unknown")
-            market_title = order_info.get("market_title", "N/A")
-            token_name = order_info.get("token_name", "N/A")
-            side = order_info.get("side", "N/A")
-            errno = order_info.get("errno", "N/A")
-            errmsg = order_info.get("errmsg", "Unknown error")
-
-            orders_list.append(
-                f"• Order <code>{order_hash}</code>\n"
-                f"  Market title: {market_title}, Token: {token_name} {side}\n"
-                f"  Error: {errno} - {errmsg}"
+        orders_text = "\n\n".join(
+            _CANCELLATION_ERROR_ITEM_TMPL.format(
+                order_hash=order_info.get("order_hash", "Unknown"),
+                market_title=_html(order_info.get("market_title", "N/A")),
+                token_name=_html(order_info.get("token_name", "N/A")),
+                side=order_info.get("side", "N/A"),
+                errno=order_info.get("errno", "N/A"),
+                errmsg=_html(order_info.get("errmsg", "Unknown error")),
             )
+            for order_info in failed_orders
+        )
 
-        orders_text = "\n\n".join(orders_list)
+        message = _CANCELLATION_ERROR_TMPL.format(
+            count=len(failed_orders), orders_text=orders_text
+        )
+    except _NOTIFICATION_DATA_ERRORS as e:
+        logger.error(
+            "Failed to build cancellation error notification for user %s: %r",
+            telegram_id,
+            e,
+        )
+        return
 
-        message = f"""❌ <b>Order Cancellation Failed</b>
+    if await _send_message(
+        bot, "cancellation error notification", telegram_id, message
+    ):
+        logger.info(
+            "Sent cancellation error notification to user %s for %s failed orders",
+            telegram_id,
+            len(failed_orders),
+        )
 
-⚠️ <b>Failed to cancel {len(failed_orders)} order(s)</b>
 
-The following orders could not be cancelled:
-{orders_text}
+def _build_failed_cancellations(orders_to_place: List[Dict], cause: str) -> List[Dict]:
+    """
+    Собирает записи для send_cancellation_error_notification.
 
-<b>⚠️ IMPORTANT:</b>
-• New orders will NOT be placed (safety check)
-• Your old orders remain active
-• Please check the orders manually and cancel them if needed
-• The repositioning will be retried in the next sync cycle"""
+    Args:
+        orders_to_place: Параметры ордеров (списки отмены и размещения согласованы по индексу)
+        cause: Причина ошибки отмены
 
-        await bot.send_message(chat_id=telegram_id, text=message)
-        logger.info(
-            f"Sent cancellation error notification to user {telegram_id} for {len(failed_orders)} failed orders"
-        )
-    except Exception as e:
-        logger.error(
-            f"Failed to send cancellation error notification to user {telegram_id}: {e}"
-        )
+    Returns:
+        Список словарей с информацией о неудачных отменах
+    """
+    return [
+        {
+            "order_hash": params.get("old_order_hash", "Unknown"),
+            "market_id": params.get("market_id", "N/A"),
+            "market_title": params.get("market_title", "N/A"),
+            "token_name": params.get("token_name", "N/A"),
+            "side": _SIDE_TABLE.get(params.get("side"), _SIDE_SELL)[1],
+            "errno": "N/A",
+            "errmsg": cause,
+        }
+        for params in orders_to_place
+    ]
 
 
-async def async_sync_all_orders(bot):
+async def sync_user_orders(
+    bot,
+    telegram_id: int,
+    http_session: Optional[requests.Session] = None,
+    ob_cache: Optional[_OBCache] = None,
+) -> Dict[str, int]:
     """
-    Асинхронная функция синхронизации ордеров с уведомлениями пользователям.
+    Синхронизирует ордера одного пользователя: проверка статусов, отмена и перестановка.
 
     Args:
         bot: Экземпляр aiogram Bot для отправки уведомлений
+        telegram_id: ID пользователя в Telegram
+        http_session: Общая HTTP сессия для API клиентов (опционально)
+        ob_cache: Кэш orderbook текущего цикла синхронизации (опционально)
+
+    Returns:
+        Статистика пользователя: {'cancelled', 'noop', 'processed', 'placed', 'errors'}
     """
-    logger.info("")
-    logger.info("╔" + "=" * 78 + "╗")
-    logger.info("║" + " " * 30 + "НАЧАЛО СИНХРОНИЗАЦИИ ОРДЕРОВ" + " " * 30 + "║")
-    logger.info("╚" + "=" * 78 + "╝")
-    logger.info("")
+    stats = {"cancelled": 0, "noop": 0, "processed": 0, "placed": 0, "errors": 0}
 
-    # Получаем всех пользователей
-    users = await get_all_users()
-    logger.info(f"Найдено пользователей: {len(users)}")
+    # Засекаем время начала обработки пользователя
+    user_start_time = time.time()
 
-    if not users:
-        logger.warning("В базе данных нет пользователей")
-        return
-
-    # Общая статистика
-    total_cancelled = 0
-    total_noop = 0  # Ордера, которые уже были удалены/исполнены/отменены ранее
-    total_processed = 0  # Все обработанные ордера (удаленные + noop)
-    total_placed = 0
-    total_errors = 0
-
-    # Обрабатываем ордера для каждого пользователя
-    for telegram_id in users:
-        # Засекаем время начала обработки пользователя
-        user_start_time = time.time()
-        user_start_time_str = time.strftime(
-            "%Y-%m-%d %H:%M:%S", time.localtime(user_start_time)
+    # Заголовок и итог пользователя строятся только если INFO включен
+    log_info = logger.isEnabledFor(logging.INFO)
+    if log_info:
+        user_start_time_str = datetime.fromtimestamp(user_start_time).isoformat(
+            sep=" ", timespec="seconds"
         )
+        logger.info("\n%s", _USER_SEPARATOR)
+        logger.info("Обработка пользователя %s", telegram_id)
+        logger.info("⏰ Время начала: %s", user_start_time_str)
+        logger.info(_USER_SEPARATOR)
 
-        logger.info(f"\n{'=' * 80}")
-        logger.info(f"Обработка пользователя {telegram_id}")
-        logger.info(f"⏰ Время начала: {user_start_time_str}")
-        logger.info(f"{'=' * 80}")
+    try:
+        # Получаем данные пользователя и создаем клиент один раз
+        user = await get_user(telegram_id)
+        if not user:
+            logger.warning("Пользователь %s не найден в БД", telegram_id)
+            return stats
 
+        # API клиент пользователя берется из кэша (создается один раз на пользователя)
         try:
-            # Получаем данные пользователя и создаем клиент один раз
-            user = await get_user(telegram_id)
-            if not user:
-                logger.warning(f"Пользователь {telegram_id} не найден в БД")
-                continue
-
-            # Создаем API клиент и OrderBuilder один раз для пользователя
-            try:
-                api_client = PredictAPIClient(
-                    api_key=user["api_key"],
-                    wallet_address=user["wallet_address"],
-                    private_key=user["private_key"],
-                    proxy_str=user.get("proxy_str"),
-                )
-
-                # Создаем OrderBuilder для SDK операций
-                chain_id = get_chain_id()
-                order_builder = await asyncio.to_thread(
-                    OrderBuilder.make,
-                    chain_id,
-                    user["private_key"],
-                    OrderBuilderOptions(predict_account=user["wallet_address"]),
-                )
-            except Exception as e:
-                logger.error(
-                    f"Ошибка создания клиента для пользователя {telegram_id}: {e}"
-                )
-                total_errors += 1
-                continue
+            clients = get_user_clients(user, http_session)
+            api_client = clients.api_client
+        except Exception as e:
+            logger.error(
+                "Ошибка создания клиента для пользователя %s: %s", telegram_id, e
+            )
+            stats["errors"] += 1
+            return stats
+
+        # Получаем списки ордеров для отмены и размещения, а также уведомления
+        (
+            orders_to_cancel,
+            orders_to_place,
+            price_change_notifications,
+        ) = await process_user_orders(telegram_id, api_client, bot, ob_cache)
+
+        if not orders_to_cancel and not orders_to_place:
+            logger.info("Нет ордеров для перемещения у пользователя %s", telegram_id)
+            return stats
+
+        # Уведомления о смещении цены (независимо от успешности отмены/создания)
+        # отправляются в фоне: интервалы между сообщениями в чат не задерживают
+        # отмену и размещение ордеров
+        _notify_in_background(
+            send_price_change_notification(bot, telegram_id, notification)
+            for notification in price_change_notifications
+        )
 
-            # Получаем списки ордеров для отмены и размещения, а также уведомления
-            (
-                orders_to_cancel,
-                orders_to_place,
-                price_change_notifications,
-            ) = await process_user_orders(telegram_id, api_client, bot)
+        logger.info("Ордеров для отмены: %s", len(orders_to_cancel))
+        logger.info("Ордеров для размещения: %s", len(orders_to_place))
 
-            if not orders_to_cancel and not orders_to_place:
-                logger.info(f"Нет ордеров для перемещения у пользователя {telegram_id}")
-                continue
-
-            # Отправляем уведомления о смещении цены (независимо от успешности отмены/создания)
-            for notification in price_change_notifications:
-                await send_price_change_notification(bot, telegram_id, notification)
+        # Проверяем, что списки согласованы (должны быть одинаковой длины, если есть ордера для перестановки)
+        # Если will_reposition = True, ордер добавляется в ОБА списка одновременно в одном блоке кода,
+        # поэтому теоретически несоответствие невозможно. Но эта проверка - защита от багов в логике
+        # (например, если в будущем код изменится и ордер будет добавлен только в один список).
+        if len(orders_to_cancel) != len(orders_to_place):
+            logger.error(
+                "КРИТИЧЕСКАЯ ОШИБКА: Несоответствие списков! Отмена=%s, размещение=%s",
+                len(orders_to_cancel),
+                len(orders_to_place),
+            )
+            logger.error(
+                "Это указывает на ошибку в логике process_user_orders. Пропускаем обработку для безопасности."
+            )
+            return stats
 
-            logger.info(f"Ордеров для отмены: {len(orders_to_cancel)}")
-            logger.info(f"Ордеров для размещения: {len(orders_to_place)}")
+        # Если списки пустые, но есть уведомления - это нормально (изменение недостаточно)
+        if not orders_to_cancel:
+            logger.info(
+                "Нет ордеров для перестановки у пользователя %s (изменение недостаточно для всех ордеров)",
+                telegram_id,
+            )
+            return stats
 
-            # Проверяем, что списки согласованы (должны быть одинаковой длины, если есть ордера для перестановки)
-            # Если will_reposition = True, ордер добавляется в ОБА списка одновременно в одном блоке кода,
-            # поэтому теоретически несоответствие невозможно. Но эта проверка - защита от багов в логике
-            # (например, если в будущем код изменится и ордер будет добавлен только в один список).
-            if len(orders_to_cancel) != len(orders_to_place):
-                logger.error(
-                    f"КРИТИЧЕСКАЯ ОШИБКА: Несоответствие списков! Отмена={len(orders_to_cancel)}, размещение={len(orders_to_place)}"
-                )
-                logger.error(
-                    "Это указывает на ошибку в логике process_user_orders. Пропускаем обработку для безопасности."
-                )
-                continue
+        # OrderBuilder нужен только для размещения, поэтому создается только когда
+        # есть что переставлять и затем переиспользуется между циклами. Получаем
+        # его ДО отмены: если создать не удалось, старые ордера остаются на месте.
+        try:
+            order_builder = await get_user_order_builder(clients, user)
+        except Exception as e:
+            logger.error(
+                "Ошибка создания OrderBuilder для пользователя %s: %s", telegram_id, e
+            )
+            stats["errors"] += 1
+            return stats
+
+        # Отменяем старые ордера
+        cancelled_count = 0
+        user_total_processed = 0
+        if orders_to_cancel:
+            logger.info("🔄 Отмена ордеров для пользователя %s...", telegram_id)
+            async with _PREDICT_API_SEM:
+                cancel_result = await cancel_orders_batch(api_client, orders_to_cancel)
 
-            # Если списки пустые, но есть уведомления - это нормально (изменение недостаточно)
-            if not orders_to_cancel:
+            # Проверяем успешность отмены
+            # cancel_orders возвращает {'success': bool, 'removed': [...], 'noop': [...]}
+            if cancel_result.get("success", False):
+                removed = cancel_result.get("removed", [])
+                noop = cancel_result.get("noop", [])
+                cancelled_count = len(removed)
+                user_total_processed = (
+                    len(removed) + len(noop)
+                )  # Все обработанные ордера для этого пользователя (удаленные + уже удаленные)
                 logger.info(
-                    f"Нет ордеров для перестановки у пользователя {telegram_id} (изменение недостаточно для всех ордеров)"
+                    "✅ Успешно отменено %s ордеров через API (noop: %s, всего обработано: %s)",
+                    cancelled_count,
+                    len(noop),
+                    user_total_processed,
                 )
-                continue
-
-            # Отменяем старые ордера
-            cancelled_count = 0
-            total_processed = 0  # Инициализируем для использования после блока if
-            if orders_to_cancel:
-                logger.info(f"🔄 Отмена ордеров для пользователя {telegram_id}...")
-                cancel_result = await cancel_orders_batch(api_client, orders_to_cancel)
 
-                # Проверяем успешность отмены
-                # cancel_orders возвращает {'success': bool, 'removed': [...], 'noop': [...]}
-                if cancel_result.get("success", False):
-                    removed = cancel_result.get("removed", [])
-                    noop = cancel_result.get("noop", [])
-                    cancelled_count = len(removed)
-                    user_total_processed = (
-                        len(removed) + len(noop)
-                    )  # Все обработанные ордера для этого пользователя (удаленные + уже удаленные)
-                    logger.info(
-                        f"✅ Успешно отменено {cancelled_count} ордеров через API (noop: {len(noop)}, всего обработано: {user_total_processed})"
+                # Если не все ордера были обработаны (ни в removed, ни в noop), это ошибка
+                if user_total_processed == 0:
+                    logger.error(
+                        "❌ Не удалось обработать ни одного ордера (ни удалить, ни найти в noop)"
                     )
-
-                    # Если не все ордера были обработаны (ни в removed, ни в noop), это ошибка
-                    if user_total_processed == 0:
-                        logger.error(
-                            "❌ Не удалось обработать ни одного ордера (ни удалить, ни найти в noop)"
-                        )
-                        failed_cancellations = []
-                        for i, order_api_id in enumerate(orders_to_cancel):
-                            order_params = orders_to_place[i]
-                            order_hash = order_params.get("old_order_hash", "Unknown")
-                            failed_cancellations.append(
-                                {
-                                    "order_hash": order_hash,
-                                    "market_id": order_params.get("market_id", "N/A"),
-                                    "market_title": order_params.get(
-                                        "market_title", "N/A"
-                                    ),
-                                    "token_name": order_params.get("token_name", "N/A"),
-                                    "side": "BUY"
-                                    if order_params.get("side") == Side.BUY
-                                    else "SELL",
-                                    "errno": "N/A",
-                                    "errmsg": "Failed to cancel order",
-                                }
+                    _notify_in_background(
+                        [
+                            send_cancellation_error_notification(
+                                bot,
+                                telegram_id,
+                                _build_failed_cancellations(
+                                    orders_to_place, "Failed to cancel order"
+                                ),
                             )
-                        await send_cancellation_error_notification(
-                            bot, telegram_id, failed_cancellations
-                        )
-                        continue
-                else:
-                    # Если отмена не удалась, собираем информацию об ошибке
-                    failed_cancellations = []
-                    cause = cancel_result.get("cause", "Unknown error")
-                    logger.error(f"❌ Ошибка при отмене ордеров: {cause}")
-
-                    # Для каждого ордера создаем запись об ошибке
-                    for i, order_api_id in enumerate(orders_to_cancel):
-                        order_params = orders_to_place[i]
-                        order_hash = order_params.get("old_order_hash", "Unknown")
-                        failed_cancellations.append(
-                            {
-                                "order_hash": order_hash,
-                                "market_id": order_params.get("market_id", "N/A"),
-                                "market_title": order_params.get("market_title", "N/A"),
-                                "token_name": order_params.get("token_name", "N/A"),
-                                "side": "BUY"
-                                if order_params.get("side") == Side.BUY
-                                else "SELL",
-                                "errno": "N/A",
-                                "errmsg": cause,
-                            }
+                        ]
+                    )
+                    return stats
+            else:
+                # Если отмена не удалась, уведомляем пользователя об ошибке по каждому ордеру
+                cause = cancel_result.get("cause", "Unknown error")
+                logger.error("❌ Ошибка при отмене ордеров: %s", cause)
+                _notify_in_background(
+                    [
+                        send_cancellation_error_notification(
+                            bot,
+                            telegram_id,
+                            _build_failed_cancellations(orders_to_place, cause),
                         )
+                    ]
+                )
+                return stats
 
-                    # Отправляем уведомление пользователю об ошибке отмены
-                    await send_cancellation_error_notification(
-                        bot, telegram_id, failed_cancellations
-                    )
-                    continue
+            # Отмена сдвигает orderbook: перед размещением цены запрашиваются заново
+            if ob_cache is not None:
+                for order_params in orders_to_place:
+                    ob_cache.invalidate(order_params.get("market_id"))
 
-                # Обновляем общую статистику
-                total_cancelled += cancelled_count
-                total_noop += len(noop)
-                # Используем уже вычисленное значение user_total_processed для обновления глобальной статистики
-                total_processed += user_total_processed
+            # Обновляем статистику пользователя
+            stats["cancelled"] += cancelled_count
+            stats["noop"] += len(noop)
+            stats["processed"] += user_total_processed
 
-                # Проверяем, что все ордера были обработаны (либо удалены, либо уже были удалены ранее)
-                # user_total_processed = removed + noop (все ордера, которые были обработаны для этого пользователя)
-                if user_total_processed < len(orders_to_cancel):
-                    failed_count = len(orders_to_cancel) - user_total_processed
-                    logger.warning(
-                        f"Не все ордера были обработаны: обработано {user_total_processed} из {len(orders_to_cancel)} "
-                        f"(удалено: {cancelled_count}, уже удалены: {len(noop)}, не обработано: {failed_count})"
-                    )
-                    # Не продолжаем размещение, так как не все ордера были обработаны
-                else:
-                    # Все ордера обработаны (удалены или уже были удалены ранее)
-                    logger.info(
-                        f"✅ Все ордера обработаны: удалено {cancelled_count}, уже удалены {len(noop)}"
-                    )
+            # Проверяем, что все ордера были обработаны (либо удалены, либо уже были удалены ранее)
+            # user_total_processed = removed + noop (все ордера, которые были обработаны для этого пользователя)
+            if user_total_processed < len(orders_to_cancel):
+                failed_count = len(orders_to_cancel) - user_total_processed
+                logger.warning(
+                    "Не все ордера были обработаны: обработано %s из %s "
+                    "(удалено: %s, уже удалены: %s, не обработано: %s)",
+                    user_total_processed,
+                    len(orders_to_cancel),
+                    cancelled_count,
+                    len(noop),
+                    failed_count,
+                )
+                # Не продолжаем размещение, так как не все ордера были обработаны
+            else:
+                # Все ордера обработаны (удалены или уже были удалены ранее)
+                logger.info(
+                    "✅ Все ордера обработаны: удалено %s, уже удалены %s",
+                    cancelled_count,
+                    len(noop),
+                )
 
-            # Размещаем новые ордера только если все старые успешно обработаны
-            # (либо удалены через API, либо уже были удалены ранее и попали в noop)
-            # БАТЧИ ФОРМИРУЮТСЯ ПО ПОЛЬЗОВАТЕЛЮ: каждый пользователь обрабатывается отдельно,
-            # и для каждого пользователя создается свой батч ордеров (все ордера одного пользователя в одном батче)
-            if orders_to_place and user_total_processed == len(orders_to_cancel):
-                logger.info(f"📝 Размещение ордеров для пользователя {telegram_id}...")
-                # Добавляем order_builder и api_client в параметры каждого ордера
+        # Размещаем новые ордера только если все старые успешно обработаны
+        # (либо удалены через API, либо уже были удалены ранее и попали в noop)
+        # БАТЧИ ФОРМИРУЮТСЯ ПО ПОЛЬЗОВАТЕЛЮ: каждый пользователь обрабатывается отдельно,
+        # и для каждого пользователя создается свой батч ордеров (все ордера одного пользователя в одном батче)
+        if orders_to_place and user_total_processed == len(orders_to_cancel):
+            logger.info("📝 Размещение ордеров для пользователя %s...", telegram_id)
+            # Один OrderBuilder пользователя используется для всех его ордеров
+            async with _PREDICT_API_SEM:
+                place_results = await place_orders_batch(
+                    api_client, orders_to_place, ob_cache, order_builder=order_builder
+                )
+            if ob_cache is not None:
                 for order_params in orders_to_place:
-                    order_params["order_builder"] = order_builder
-                    order_params["api_client"] = api_client
-                place_results = await place_orders_batch(api_client, orders_to_place)
-
-                # Подсчитываем успешно размещенные ордера для общей статистики
-                placed_count = sum(1 for r in place_results if r.get("success", False))
-                total_placed += placed_count
-
-                # Обновляем цены в БД для успешно размещенных ордеров и отправляем уведомления
-                # Также обрабатываем ошибки размещения
-                # ВАЖНО: Уведомления об ошибках отправляются для КАЖДОГО ордера отдельно,
-                # если его размещение не удалось (не для всего батча целиком)
-                # Индекс i в place_results соответствует индексу i в orders_to_place (гарантировано)
-                for i, result in enumerate(place_results):
-                    order_params = orders_to_place[
-                        i
-                    ]  # Берем параметры ордера по индексу
-                    old_order_hash = order_params.get(
-                        "old_order_hash"
-                    )  # Это hash старого ордера, который был отменен
-
-                    is_success = result.get("success", False)
-
-                    if not is_success:
-                        # Обрабатываем ошибку размещения для конкретного ордера
-                        error = result.get("error", "Unknown error")
-                        errno = 0  # В новом API нет errno, используем 0
-                        errmsg = error
-
-                        # Отправляем уведомление пользователю об ошибке для ЭТОГО ордера
-                        await send_order_placement_error_notification(
+                    ob_cache.invalidate(order_params.get("market_id"))
+
+            # Подсчитываем успешно размещенные ордера для общей статистики
+            placed_count = sum(1 for r in place_results if r.success)
+            stats["placed"] += placed_count
+
+            # Обновляем цены в БД для успешно размещенных ордеров и отправляем уведомления
+            # Также обрабатываем ошибки размещения
+            # ВАЖНО: Уведомления об ошибках отправляются для КАЖДОГО ордера отдельно,
+            # если его размещение не удалось (не для всего батча целиком)
+            # Индекс i в place_results соответствует индексу i в orders_to_place (гарантировано)
+            order_updates = []  # Кортежи для bulk_update_orders_in_db
+            updated_orders = []  # (order_params, new_order_hash) для уведомлений
+            error_notifications = []  # Уведомления об ошибках размещения
+            for i, result in enumerate(place_results):
+                order_params = orders_to_place[i]  # Берем параметры ордера по индексу
+                old_order_hash = order_params.get(
+                    "old_order_hash"
+                )  # Это hash старого ордера, который был отменен
+
+                if not result.success:
+                    # Обрабатываем ошибку размещения для конкретного ордера
+                    errno = 0  # В новом API нет errno, используем 0
+                    errmsg = result.error or "Unknown error"
+
+                    # Уведомление пользователю об ошибке для ЭТОГО ордера
+                    # (отправляется после цикла вместе с остальными)
+                    error_notifications.append(
+                        send_order_placement_error_notification(
                             bot,
                             telegram_id,
                             order_params,
@@ -1223,59 +2032,164 @@ async def async_sync_all_orders(bot):
                             errno,
                             errmsg,
                         )
-                        logger.warning(
-                            f"Ошибка размещения ордера {old_order_hash} (индекс {i}): {errmsg}"
-                        )
-                        continue
+                    )
+                    logger.warning(
+                        "Ошибка размещения ордера %s (индекс %s): %s",
+                        old_order_hash,
+                        i,
+                        errmsg,
+                    )
+                    continue
 
-                    # Успешное размещение
-                    new_order_hash = result.get("order_hash")  # Hash нового ордера
-                    new_order_api_id = result.get(
-                        "order_api_id"
-                    )  # ID ордера из API для off-chain отмены
+                # Успешное размещение
+                new_order_hash = result.order_hash  # Hash нового ордера
+                # ID ордера из API для off-chain отмены
+                new_order_api_id = result.order_api_id
 
-                    if new_order_hash and old_order_hash:
-                        # Обновляем ордер в БД
-                        await update_order_in_db(
+                if new_order_hash and old_order_hash:
+                    # Ордер обновляется в БД после цикла (один коммит на всех)
+                    order_updates.append(
+                        (
                             old_order_hash,  # Старый hash
                             new_order_hash,  # Новый hash
                             order_params["current_price_at_creation"],
                             order_params["target_price"],
                             new_order_api_id,  # Сохраняем order_api_id для будущих отмен
                         )
-                        # Отправляем уведомление об успешном обновлении
-                        await send_order_updated_notification(
-                            bot, telegram_id, order_params, new_order_hash
-                        )
+                    )
+                    updated_orders.append((order_params, new_order_hash))
+
+            # Обновляем размещенные ордера в БД одним запросом
+            if order_updates:
+                await bulk_update_orders_in_db(order_updates)
+
+            # Уведомления об ошибках и об успешном обновлении (после записи в БД)
+            # отправляются в фоне
+            _notify_in_background(error_notifications)
+            _notify_in_background(
+                send_order_updated_notification(
+                    bot, telegram_id, order_params, new_order_hash
+                )
+                for order_params, new_order_hash in updated_orders
+            )
 
-        except Exception as e:
-            logger.error(f"Ошибка при обработке пользователя {telegram_id}: {e}")
-            total_errors += 1
-        finally:
-            # Засекаем время окончания обработки пользователя (всегда выполняется)
+    except _EXPECTED_ERRORS as e:
+        logger.error("Ошибка при обработке пользователя %s: %s", telegram_id, e)
+        stats["errors"] += 1
+    except Exception:
+        logger.exception(
+            "Непредвиденная ошибка при обработке пользователя %d", telegram_id
+        )
+        stats["errors"] += 1
+    finally:
+        # Итог по пользователю строится только если INFO включен
+        if log_info:
             user_end_time = time.time()
-            user_end_time_str = time.strftime(
-                "%Y-%m-%d %H:%M:%S", time.localtime(user_end_time)
+            user_end_time_str = datetime.fromtimestamp(user_end_time).isoformat(
+                sep=" ", timespec="seconds"
             )
             user_elapsed = user_end_time - user_start_time
 
             logger.info(
-                f"⏰ Время окончания обработки пользователя {telegram_id}: {user_end_time_str}"
+                "⏰ Время окончания обработки пользователя %s: %s",
+                telegram_id,
+                user_end_time_str,
             )
             logger.info(
-                f"⏱️  Время обработки пользователя {telegram_id}: {user_elapsed:.2f} секунд ({user_elapsed / 60:.2f} минут)"
+                "⏱️  Время обработки пользователя %s: %.2f секунд (%.2f минут)",
+                telegram_id,
+                user_elapsed,
+                user_elapsed / 60,
             )
-            logger.info(f"{'=' * 80}")
+            logger.info(_USER_SEPARATOR)
+
+    return stats
+
+
+async def async_sync_all_orders(bot):
+    """
+    Асинхронная функция синхронизации ордеров с уведомлениями пользователям.
+
+    Args:
+        bot: Экземпляр aiogram Bot для отправки уведомлений
+    """
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("")
+        logger.info(_BANNER_TOP)
+        logger.info(_BANNER_START)
+        logger.info(_BANNER_BOT)
+        logger.info("")
+
+    # Общая статистика
+    totals = {
+        "cancelled": 0,
+        "noop": 0,  # Ордера, которые уже были удалены/исполнены/отменены ранее
+        "processed": 0,  # Все обработанные ордера (удаленные + noop)
+        "placed": 0,
+        "errors": 0,
+    }
+    users_count = 0
+
+    # Пользователи читаются из БД постранично и передаются через ограниченную очередь
+    # SYNC_USERS_CONCURRENCY воркерам: в памяти одновременно не больше
+    # SYNC_USERS_QUEUE_SIZE ожидающих пользователей, сколько бы их ни было в БД.
+    # Работа почти полностью состоит из ожидания API, поэтому запросы разных
+    # пользователей перекрываются по времени. HTTP сессия (пул соединений) общая
+    # для всех пользователей и циклов. Кэш orderbook общий для всех пользователей,
+    # но живет только в этом цикле.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SYNC_USERS_QUEUE_SIZE)
+    http_session = get_shared_http_session()
+    ob_cache = _OBCache()
+    # Ключи пользователей, которые больше не синхронизируются, не держим в памяти
+    _prune_user_clients_cache()
+
+    async def _worker() -> None:
+        while True:
+            telegram_id = await queue.get()
+            try:
+                result = await sync_user_orders(
+                    bot, telegram_id, http_session, ob_cache
+                )
+            except _EXPECTED_ERRORS as e:
+                logger.error("Ошибка при обработке пользователя %s: %s", telegram_id, e)
+                totals["errors"] += 1
+            except Exception:
+                logger.exception(
+                    "Непредвиденная ошибка при обработке пользователя %d", telegram_id
+                )
+                totals["errors"] += 1
+            else:
+                for key in totals:
+                    totals[key] += result[key]
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(_worker()) for _ in range(SYNC_USERS_CONCURRENCY)]
+    try:
+        async for telegram_id in iter_all_users():
+            await queue.put(telegram_id)
+            users_count += 1
+        await queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    logger.info("Обработано пользователей: %s", users_count)
+    if not users_count:
+        logger.warning("В базе данных нет пользователей")
+        return
 
     # Итоговая статистика
-    logger.info("")
-    logger.info("╔" + "=" * 78 + "╗")
-    logger.info("║" + " " * 30 + "ИТОГОВАЯ СТАТИСТИКА" + " " * 30 + "║")
-    logger.info("╠" + "=" * 78 + "╣")
-    logger.info(f"║ Отменено ордеров (removed): {total_cancelled:<55} ║")
-    logger.info(f"║ Уже удалены ранее (noop): {total_noop:<58} ║")
-    logger.info(f"║ Всего обработано: {total_processed:<63} ║")
-    logger.info(f"║ Размещено ордеров: {total_placed:<62} ║")
-    logger.info(f"║ Ошибок: {total_errors:<69} ║")
-    logger.info("╚" + "=" * 78 + "╝")
-    logger.info("")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("")
+        logger.info(_BANNER_TOP)
+        logger.info(_BANNER_STATS)
+        logger.info(_BANNER_MID)
+        logger.info("║ Отменено ордеров (removed): %-55s ║", totals["cancelled"])
+        logger.info("║ Уже удалены ранее (noop): %-58s ║", totals["noop"])
+        logger.info("║ Всего обработано: %-63s ║", totals["processed"])
+        logger.info("║ Размещено ордеров: %-62s ║", totals["placed"])
+        logger.info("║ Ошибок: %-69s ║", totals["errors"])
+        logger.info(_BANNER_BOT)
+        logger.info("")
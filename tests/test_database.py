@@ -0,0 +1,144 @@
+"""
+Тесты для bot/database.py
+
+Покрывает:
+- Массовое обновление ордеров после перестановки (bulk_update_orders_in_db)
+- TTL кеш факта регистрации (is_user_registered) и его сброс в save_user/delete_user
+"""
+import time
+
+import pytest
+from unittest.mock import patch
+
+# conftest.py настроит sys.path для работы с относительными импортами
+import database
+from database import (
+    bulk_update_orders_in_db,
+    delete_user,
+    get_order_by_hash,
+    init_database,
+    is_user_registered,
+    save_order,
+    save_user,
+)
+
+
+@pytest.fixture(autouse=True)
+async def temp_db(tmp_path):
+    """Создает временную БД и тестовый ключ шифрования для каждого теста"""
+    with patch.object(database, "DB_PATH", tmp_path / "users.db"), \
+         patch.dict(database._user_registered_cache, clear=True), \
+         patch("aes.get_master_key", return_value=bytes(32)):
+        await init_database()
+        yield
+
+
+async def _save_test_order(order_hash: str, order_api_id=None):
+    """Сохраняет тестовый ордер с минимальным набором полей"""
+    await save_order(
+        telegram_id=12345,
+        order_hash=order_hash,
+        market_id=1,
+        market_title="Test Market",
+        market_slug="test-market",
+        token_id="token_1",
+        token_name="YES",
+        side="BUY",
+        current_price=0.5,
+        target_price=0.49,
+        offset_ticks=10,
+        offset_cents=1.0,
+        amount=10.0,
+        order_api_id=order_api_id,
+    )
+
+
+async def _save_test_user(telegram_id: int = 12345):
+    """Сохраняет тестового пользователя"""
+    await save_user(
+        telegram_id=telegram_id,
+        username="test_user",
+        wallet_address="0x" + "1" * 40,
+        private_key="0x" + "2" * 64,
+        api_key="test_api_key",
+    )
+
+
+class TestBulkUpdateOrdersInDb:
+    """Тесты для bulk_update_orders_in_db"""
+
+    @pytest.mark.asyncio
+    async def test_updates_hash_prices_and_api_id(self):
+        """Тест: hash, цены и order_api_id обновляются для всех ордеров"""
+        await _save_test_order("old_0", "api_old_0")
+        await _save_test_order("old_1", "api_old_1")
+
+        await bulk_update_orders_in_db([
+            ("old_0", "new_0", 0.6, 0.59, "api_new_0"),
+            ("old_1", "new_1", 0.7, 0.69, "api_new_1"),
+        ])
+
+        assert await get_order_by_hash("old_0") is None
+        order = await get_order_by_hash("new_0")
+        assert order["current_price"] == 0.6
+        assert order["target_price"] == 0.59
+        assert order["order_api_id"] == "api_new_0"
+        assert (await get_order_by_hash("new_1"))["order_api_id"] == "api_new_1"
+
+    @pytest.mark.asyncio
+    async def test_empty_api_id_keeps_existing_one(self):
+        """Тест: пустой new_order_api_id (None или "") не затирает order_api_id в БД"""
+        await _save_test_order("old_0", "api_old_0")
+        await _save_test_order("old_1", "api_old_1")
+
+        await bulk_update_orders_in_db([
+            ("old_0", "new_0", 0.6, 0.59, None),
+            ("old_1", "new_1", 0.7, 0.69, ""),
+        ])
+
+        assert (await get_order_by_hash("new_0"))["order_api_id"] == "api_old_0"
+        assert (await get_order_by_hash("new_1"))["order_api_id"] == "api_old_1"
+
+
+class TestIsUserRegisteredCache:
+    """Тесты для TTL кеша is_user_registered"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_db(self):
+        """Тест: повторная проверка в пределах TTL не обращается к БД"""
+        with patch("database.get_user", wraps=database.get_user) as mock_get_user:
+            assert await is_user_registered(12345) is False
+            assert await is_user_registered(12345) is False
+
+        assert mock_get_user.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_rechecked(self):
+        """Тест: после истечения TTL результат берется из БД заново"""
+        assert await is_user_registered(12345) is False
+        # Пользователь добавлен в обход save_user: кеш не сброшен, но запись устарела
+        database._user_registered_cache[12345] = (
+            time.monotonic() - database.USER_REGISTERED_CACHE_TTL,
+            False,
+        )
+        with patch("database.get_user", return_value={"telegram_id": 12345}):
+            assert await is_user_registered(12345) is True
+
+    @pytest.mark.asyncio
+    async def test_save_user_invalidates_cache(self):
+        """Тест: после save_user закешированный False не возвращается"""
+        assert await is_user_registered(12345) is False
+
+        await _save_test_user(12345)
+
+        assert await is_user_registered(12345) is True
+
+    @pytest.mark.asyncio
+    async def test_delete_user_invalidates_cache(self):
+        """Тест: после delete_user закешированный True не возвращается"""
+        await _save_test_user(12345)
+        assert await is_user_registered(12345) is True
+
+        assert await delete_user(12345) is True
+
+        assert await is_user_registered(12345) is False
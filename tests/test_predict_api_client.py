@@ -30,8 +30,13 @@ https://api-testnet.predict.fun/v1
 import pytest
 import os
 from typing import Dict, List, Optional
+from unittest.mock import MagicMock
 
-from bot.predict_api.client import PredictAPIClient
+from bot.predict_api.client import (
+    PredictAPIClient,
+    close_shared_http_session,
+    get_shared_http_session,
+)
 from bot.predict_api.auth import get_api_base_url, get_rpc_url, get_chain_id
 from bot.predict_api.sdk_operations import build_and_sign_limit_order
 from predict_sdk import OrderBuilder, ChainId, Side, OrderBuilderOptions
@@ -518,6 +523,34 @@ class TestClientInitialization:
         assert client.private_key == "0x456"
         assert client.jwt_token is None
 
+    def test_clients_share_http_session_by_default(self):
+        """Клиенты без своей HTTP сессии используют общую, переданная сессия сохраняется."""
+        first = PredictAPIClient(
+            api_key="test_key", wallet_address="0x123", private_key="0x456"
+        )
+        second = PredictAPIClient(
+            api_key="other_key", wallet_address="0x789", private_key="0xabc"
+        )
+        assert first._http is get_shared_http_session()
+        assert second._http is first._http
+
+        external_session = MagicMock()
+        client = PredictAPIClient(
+            api_key="test_key",
+            wallet_address="0x123",
+            private_key="0x456",
+            http_session=external_session,
+        )
+        assert client._http is external_session
+
+    def test_close_shared_http_session_recreates_on_next_use(self):
+        """После закрытия общей сессии следующий вызов создает новую."""
+        session = get_shared_http_session()
+        close_shared_http_session()
+        new_session = get_shared_http_session()
+        assert new_session is not session
+        close_shared_http_session()
+
 
 class TestAPIBaseURL:
     """Тесты для проверки использования правильного API URL."""
@@ -17,6 +17,7 @@ import traceback
 from typing import Dict, List, Optional
 
 from bot.predict_api.sdk_operations import (
+    format_usdt,
     get_usdt_balance,
     cancel_orders_via_sdk,
     build_and_sign_limit_order,
@@ -148,6 +149,24 @@ class TestGetUsdtBalance:
         print(f"\nБаланс USDT: {balance_usdt:.6f} USDT ({balance_wei} wei)")
 
 
+class TestFormatUsdt:
+    """Тесты для format_usdt (без сети)."""
+
+    def test_format_usdt_rounds_to_six_decimals(self):
+        assert format_usdt(1_234_567_890_000_000_000) == "1.234568"
+        assert format_usdt(0) == "0.000000"
+
+    def test_format_usdt_large_balance_is_exact(self):
+        # float (balance_wei / 1e18) теряет точность на таких суммах
+        assert format_usdt(123_456_789_012_345_678_901_234_567) == "123456789.012346"
+
+    def test_format_usdt_strip_zeros(self):
+        assert format_usdt(100 * 10**18, strip_zeros=True) == "100"
+        assert format_usdt(1_500_000_000_000_000_000, strip_zeros=True) == "1.5"
+        assert format_usdt(1_234_567_890_000_000_000, strip_zeros=True) == "1.234568"
+        assert format_usdt(0, strip_zeros=True) == "0"
+
+
 class TestBuildAndSignLimitOrder:
     """Тесты для построения и подписи ордеров."""
     
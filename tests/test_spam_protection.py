@@ -0,0 +1,104 @@
+"""
+Тесты для bot/spam_protection.py
+
+Покрывает:
+- Скользящее окно исходящих запросов (OutgoingRateLimitMiddleware)
+- Интервал между сообщениями в один чат
+- Исключение long polling (GetUpdates) из лимита
+"""
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiogram.methods import DeleteMessage, GetUpdates, SendMessage
+
+# conftest.py настроит sys.path для работы с относительными импортами
+from spam_protection import CHAT_SLOTS_PRUNE_INTERVAL, OutgoingRateLimitMiddleware
+
+
+async def _call(middleware, method, make_request=None):
+    """Пропускает запрос через middleware"""
+    make_request = make_request or AsyncMock(return_value="ok")
+    return await middleware(make_request, MagicMock(), method)
+
+
+class TestOutgoingRateLimitMiddleware:
+    """Тесты для OutgoingRateLimitMiddleware"""
+
+    @pytest.mark.asyncio
+    async def test_sliding_window_delays_requests_over_rate(self):
+        """Тест: запросы сверх rate за period ждут освобождения окна"""
+        middleware = OutgoingRateLimitMiddleware(rate=2, period=1.0, chat_interval=0)
+
+        with patch('spam_protection.time.monotonic', return_value=100.0), \
+             patch('spam_protection.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            for chat_id in range(5):
+                assert await _call(middleware, SendMessage(chat_id=chat_id, text="a")) == "ok"
+
+        # Первые два сразу, затем по два запроса на каждую следующую секунду
+        assert [c.args[0] for c in mock_sleep.await_args_list] == [1.0, 1.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_get_updates_is_not_limited(self):
+        """Тест: GetUpdates не ждет и не занимает слот в окне"""
+        middleware = OutgoingRateLimitMiddleware(rate=1, period=1.0)
+        make_request = AsyncMock(return_value="updates")
+
+        with patch('spam_protection.time.monotonic', return_value=100.0), \
+             patch('spam_protection.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            await _call(middleware, SendMessage(chat_id=1, text="a"))
+            assert await _call(middleware, GetUpdates(), make_request) == "updates"
+
+        mock_sleep.assert_not_called()
+        make_request.assert_awaited_once()
+        assert list(middleware._sent_at) == [100.0]
+
+    @pytest.mark.asyncio
+    async def test_messages_to_one_chat_are_spaced(self):
+        """Тест: сообщения в один чат разносятся на chat_interval, в разные чаты - нет"""
+        middleware = OutgoingRateLimitMiddleware(chat_interval=1.0)
+
+        with patch('spam_protection.time.monotonic', return_value=100.0), \
+             patch('spam_protection.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            await _call(middleware, SendMessage(chat_id=1, text="a"))
+            await _call(middleware, SendMessage(chat_id=2, text="b"))
+            # Не отправка сообщения: интервал чата не применяется
+            await _call(middleware, DeleteMessage(chat_id=1, message_id=1))
+            mock_sleep.assert_not_called()
+
+            await _call(middleware, SendMessage(chat_id=1, text="c"))
+
+        mock_sleep.assert_awaited_once_with(1.0)
+
+    @pytest.mark.asyncio
+    async def test_waiting_request_does_not_block_others(self):
+        """Тест: ожидание слота одного чата не задерживает запросы в другие чаты"""
+        middleware = OutgoingRateLimitMiddleware(chat_interval=0.5)
+
+        await _call(middleware, SendMessage(chat_id=1, text="a"))
+        waiting = asyncio.create_task(_call(middleware, SendMessage(chat_id=1, text="b")))
+        await asyncio.sleep(0)
+
+        started = time.monotonic()
+        await _call(middleware, SendMessage(chat_id=2, text="c"))
+
+        assert time.monotonic() - started < 0.1
+        assert not waiting.done()
+        assert await waiting == "ok"
+
+    @pytest.mark.asyncio
+    async def test_past_chat_slots_are_pruned(self):
+        """Тест: чаты с прошедшим слотом удаляются из памяти"""
+        middleware = OutgoingRateLimitMiddleware(chat_interval=1.0)
+
+        with patch('spam_protection.time.monotonic', return_value=100.0):
+            await _call(middleware, SendMessage(chat_id=1, text="a"))
+        assert set(middleware._chat_next_send_at) == {1}
+
+        with patch('spam_protection.time.monotonic',
+                   return_value=100.0 + CHAT_SLOTS_PRUNE_INTERVAL):
+            await _call(middleware, SendMessage(chat_id=2, text="b"))
+
+        assert set(middleware._chat_next_send_at) == {2}
@@ -0,0 +1,66 @@
+"""
+Тесты для bot/start_router.py
+
+Покрывает:
+- Диспетчеризацию шагов регистрации по состоянию FSM (process_registration_step)
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# conftest.py настроит sys.path для работы с относительными импортами
+from start_router import (
+    RegistrationStates,
+    _STATE_HANDLERS,
+    process_api_key,
+    process_invite,
+    process_private_key,
+    process_registration_step,
+    process_wallet,
+)
+
+# Ожидаемый обработчик для каждого состояния регистрации
+EXPECTED_HANDLERS = {
+    RegistrationStates.waiting_invite.state: process_invite,
+    RegistrationStates.waiting_wallet.state: process_wallet,
+    RegistrationStates.waiting_private_key.state: process_private_key,
+    RegistrationStates.waiting_api_key.state: process_api_key,
+}
+
+
+class TestRegistrationStepDispatch:
+    """Тесты для process_registration_step"""
+
+    def test_every_state_has_its_handler(self):
+        """Тест: каждое состояние RegistrationStates связано со своим обработчиком"""
+        all_states = {state.state for state in RegistrationStates.__all_states__}
+
+        assert set(_STATE_HANDLERS) == all_states
+        assert _STATE_HANDLERS == EXPECTED_HANDLERS
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("raw_state", list(EXPECTED_HANDLERS))
+    async def test_dispatches_to_handler_of_current_state(self, raw_state):
+        """Тест: сообщение передается только обработчику текущего состояния"""
+        mocks = {state: AsyncMock() for state in _STATE_HANDLERS}
+        message = MagicMock()
+        state = MagicMock()
+
+        with patch.dict("start_router._STATE_HANDLERS", mocks):
+            await process_registration_step(message, state, raw_state)
+
+        mocks[raw_state].assert_awaited_once_with(message, state)
+        for other_state, mock in mocks.items():
+            if other_state != raw_state:
+                mock.assert_not_called()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("raw_state", [None, "OtherStates:waiting_something"])
+    async def test_unknown_state_is_ignored(self, raw_state):
+        """Тест: для неизвестного состояния ни один обработчик не вызывается"""
+        mocks = {state: AsyncMock() for state in _STATE_HANDLERS}
+
+        with patch.dict("start_router._STATE_HANDLERS", mocks):
+            await process_registration_step(MagicMock(), MagicMock(), raw_state)
+
+        for mock in mocks.values():
+            mock.assert_not_called()
@@ -21,6 +21,7 @@ from typing import Dict, List
 from sync_orders import (
     process_user_orders,
     get_current_market_price,
+    get_orderbooks_bulk,
     send_cancellation_error_notification,
     send_order_placement_error_notification,
     ORDER_STATUS_OPEN,
@@ -34,6 +35,15 @@ from config import TICK_SIZE
 from predict_sdk import Side
 
 
+@pytest.fixture(autouse=True)
+async def _drain_background_notifications():
+    """Дожидается фоновых уведомлений теста"""
+    import sync_orders
+    
+    yield
+    await sync_orders.drain_notifications()
+
+
 class TestCalculateNewTargetPrice:
     """Тесты для функции calculate_new_target_price"""
     
@@ -252,10 +262,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.get_current_market_price') as mock_get_price, \
+             patch('sync_orders.get_orderbooks_bulk') as mock_get_bids, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -279,10 +289,10 @@ class TestProcessUserOrders:
                 'asks': [[0.511, 150]]
             }
             
-            mock_get_price.return_value = 0.510  # Новая текущая цена
+            mock_get_bids.return_value = {100: 0.510}  # Новая текущая цена
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()  # OrderBuilder
+            mock_run_blocking.return_value = MagicMock()  # OrderBuilder
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -339,10 +349,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.get_current_market_price') as mock_get_price, \
+             patch('sync_orders.get_orderbooks_bulk') as mock_get_bids, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -359,10 +369,10 @@ class TestProcessUserOrders:
                 'currency': 'USDT'
             }
             
-            mock_get_price.return_value = 0.503  # Новая текущая цена
+            mock_get_bids.return_value = {100: 0.497}  # Новая текущая цена NO: 1 - 0.497 = 0.503
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -396,11 +406,11 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.update_order_status', new_callable=AsyncMock) as mock_update_status, \
+             patch('sync_orders.bulk_update_order_status', new_callable=AsyncMock) as mock_update_status, \
              patch('sync_orders.send_order_filled_notification', new_callable=AsyncMock) as mock_send_notif, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -423,7 +433,7 @@ class TestProcessUserOrders:
             
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client, bot=MagicMock())
             
@@ -432,7 +442,7 @@ class TestProcessUserOrders:
             assert len(orders_to_place) == 0
             
             # Статус должен быть обновлен на FILLED (API статус)
-            mock_update_status.assert_called_once_with("order_filled", ORDER_STATUS_FILLED)
+            mock_update_status.assert_called_once_with([("order_filled", ORDER_STATUS_FILLED)])
             
             # Уведомление должно быть отправлено
             mock_send_notif.assert_called_once()
@@ -460,10 +470,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.update_order_status', new_callable=AsyncMock) as mock_update_status, \
+             patch('sync_orders.bulk_update_order_status', new_callable=AsyncMock) as mock_update_status, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -483,7 +493,7 @@ class TestProcessUserOrders:
             
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -492,7 +502,7 @@ class TestProcessUserOrders:
             assert len(orders_to_place) == 0
             
             # Статус должен быть обновлен на CANCELLED (API статус)
-            mock_update_status.assert_called_once_with("order_cancelled", ORDER_STATUS_CANCELLED)
+            mock_update_status.assert_called_once_with([("order_cancelled", ORDER_STATUS_CANCELLED)])
     
     @pytest.mark.asyncio
     async def test_no_price_change(self, mock_user, mock_api_client):
@@ -518,10 +528,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.get_current_market_price') as mock_get_price, \
+             patch('sync_orders.get_orderbooks_bulk') as mock_get_bids, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -537,10 +547,10 @@ class TestProcessUserOrders:
                 'currency': 'USDT'
             }
             
-            mock_get_price.return_value = 0.500  # Та же цена
+            mock_get_bids.return_value = {100: 0.500}  # Та же цена
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -580,8 +590,8 @@ class TestProcessUserOrders:
                 "token_id": "token_no",
                 "token_name": "NO",
                 "side": "SELL",
-                "current_price": 0.500,
-                "target_price": 0.510,
+                "current_price": 0.487,
+                "target_price": 0.497,
                 "offset_ticks": 10,
                 "amount": 100.0,
                 "reposition_threshold_cents": 0.5,
@@ -592,10 +602,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.get_current_market_price') as mock_get_price, \
+             patch('sync_orders.get_orderbooks_bulk') as mock_get_bids, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = db_orders
@@ -627,19 +637,13 @@ class TestProcessUserOrders:
             
             mock_api_client.get_order_by_id.side_effect = get_order_side_effect
             
-            # Первый ордер: изменение достаточно (1.0 цент)
-            # Второй ордер: изменение недостаточно (0.3 цента)
-            def get_price_side_effect(api_client, market_id, side, token_name):
-                if token_name == "YES" and side == "BUY":
-                    return 0.510  # Изменение 0.01 = 1.0 цент
-                elif token_name == "NO" and side == "SELL":
-                    return 0.503  # Изменение 0.003 = 0.3 цента
-                return None
-            
-            mock_get_price.side_effect = get_price_side_effect
+            # Оба ордера на одном рынке: один orderbook, best_bid = 0.510
+            # Первый ордер (YES): цена 0.510, изменение 0.01 = 1.0 цент - достаточно
+            # Второй ордер (NO): цена 1 - 0.510 = 0.490, изменение 0.003 = 0.3 цента - недостаточно
+            mock_get_bids.return_value = {100: 0.510}
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -657,6 +661,45 @@ class TestProcessUserOrders:
             assert notif1["order_api_id"] == "111"
             assert notif1["will_reposition"] is True
     
+    @pytest.mark.asyncio
+    async def test_unexpected_error_in_one_order_skips_only_that_order(self, mock_user, mock_api_client):
+        """Тест: непредвиденная ошибка одного ордера не прерывает обработку остальных"""
+        base_order = {
+            "market_id": 100,
+            "market_title": "Test Market",
+            "market_slug": "test-market",
+            "token_id": "token_yes",
+            "token_name": "YES",
+            "side": "BUY",
+            "current_price": 0.500,
+            "target_price": 0.490,
+            "offset_ticks": 10,
+            "amount": 100.0,
+            "reposition_threshold_cents": 0.5,
+            "status": ORDER_STATUS_OPEN
+        }
+        db_orders = [
+            {**base_order, "order_hash": "order_1", "order_api_id": "111"},
+            {**base_order, "order_hash": "order_2", "order_api_id": "222"},
+        ]
+        
+        def get_order_side_effect(order_hash, **kwargs):
+            # "status": null в ответе API -> None.upper() вызывает AttributeError
+            status = None if order_hash == "order_1" else ORDER_STATUS_OPEN
+            return {'status': status, 'order': {'hash': order_hash}}
+        
+        mock_api_client.get_order_by_id.side_effect = get_order_side_effect
+        
+        with patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
+             patch('sync_orders.get_orderbooks_bulk', return_value={100: 0.510}):
+            mock_get_orders.return_value = db_orders
+            
+            orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
+        
+        assert orders_to_cancel == ["222"]
+        assert len(orders_to_place) == 1
+        assert [n["order_hash"] for n in notifications] == ["order_2"]
+    
     @pytest.mark.asyncio
     async def test_notification_only_when_repositioning(self, mock_user, mock_api_client):
         """Тест: уведомление отправляется только когда ордер будет переставлен"""
@@ -680,10 +723,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.get_current_market_price') as mock_get_price, \
+             patch('sync_orders.get_orderbooks_bulk') as mock_get_bids, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -699,10 +742,10 @@ class TestProcessUserOrders:
                 'currency': 'USDT'
             }
             
-            mock_get_price.return_value = 0.501  # Небольшое изменение
+            mock_get_bids.return_value = {100: 0.501}  # Небольшое изменение
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -736,10 +779,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.get_current_market_price') as mock_get_price, \
+             patch('sync_orders.get_orderbooks_bulk') as mock_get_bids, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -755,10 +798,10 @@ class TestProcessUserOrders:
                 'currency': 'USDT'
             }
             
-            mock_get_price.return_value = 0.510
+            mock_get_bids.return_value = {200: 0.510}
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             _, _, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -815,10 +858,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.update_order_status', new_callable=AsyncMock) as mock_update_status, \
+             patch('sync_orders.bulk_update_order_status', new_callable=AsyncMock) as mock_update_status, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -837,7 +880,7 @@ class TestProcessUserOrders:
             
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -846,7 +889,7 @@ class TestProcessUserOrders:
             assert len(orders_to_place) == 0
             
             # Статус должен быть обновлен на EXPIRED (API статус)
-            mock_update_status.assert_called_once_with("order_expired", ORDER_STATUS_EXPIRED)
+            mock_update_status.assert_called_once_with([("order_expired", ORDER_STATUS_EXPIRED)])
     
     @pytest.mark.asyncio
     async def test_order_status_invalidated(self, mock_user, mock_api_client):
@@ -871,10 +914,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.update_order_status', new_callable=AsyncMock) as mock_update_status, \
+             patch('sync_orders.bulk_update_order_status', new_callable=AsyncMock) as mock_update_status, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -893,7 +936,7 @@ class TestProcessUserOrders:
             
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -902,7 +945,7 @@ class TestProcessUserOrders:
             assert len(orders_to_place) == 0
             
             # Статус должен быть обновлен на INVALIDATED (API статус)
-            mock_update_status.assert_called_once_with("order_invalidated", ORDER_STATUS_INVALIDATED)
+            mock_update_status.assert_called_once_with([("order_invalidated", ORDER_STATUS_INVALIDATED)])
     
     @pytest.mark.asyncio
     async def test_unknown_status_from_api(self, mock_user, mock_api_client):
@@ -927,10 +970,10 @@ class TestProcessUserOrders:
         with patch('sync_orders.get_user', new_callable=AsyncMock) as mock_get_user, \
              patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
              patch('sync_orders.PredictAPIClient') as mock_client_class, \
-             patch('sync_orders.update_order_status', new_callable=AsyncMock) as mock_update_status, \
+             patch('sync_orders.bulk_update_order_status', new_callable=AsyncMock) as mock_update_status, \
              patch('sync_orders.get_chain_id') as mock_get_chain_id, \
              patch('sync_orders.OrderBuilder') as mock_order_builder_class, \
-             patch('sync_orders.asyncio.to_thread') as mock_to_thread:
+             patch('sync_orders.run_blocking') as mock_run_blocking:
             
             mock_get_user.return_value = mock_user
             mock_get_orders.return_value = [db_order]
@@ -949,7 +992,7 @@ class TestProcessUserOrders:
             
             mock_get_chain_id.return_value = MagicMock()
             mock_order_builder_class.make = MagicMock()
-            mock_to_thread.return_value = MagicMock()
+            mock_run_blocking.return_value = MagicMock()
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -958,7 +1001,7 @@ class TestProcessUserOrders:
             assert len(orders_to_place) == 0
             
             # Статус должен быть обновлен на неизвестный статус из API (сохраняем как есть)
-            mock_update_status.assert_called_once_with("order_unknown", 'UNKNOWN_STATUS')
+            mock_update_status.assert_called_once_with([("order_unknown", 'UNKNOWN_STATUS')])
 
 
 class TestCancellationErrorNotification:
@@ -1356,10 +1399,10 @@ class TestPlaceOrdersBatch:
         
         # Мокируем place_single_order
         with patch('sync_orders.place_single_order', new_callable=AsyncMock) as mock_place_order, \
-             patch('sync_orders.get_current_market_price', new_callable=AsyncMock) as mock_get_price:
+             patch('sync_orders.get_orderbooks_bulk', new_callable=AsyncMock) as mock_get_bids:
             
             # Пересчитанная цена: 0.520 - 10*0.001 = 0.510
-            mock_get_price.return_value = 0.520
+            mock_get_bids.return_value = {100: 0.520}
             mock_place_order.return_value = (True, "new_order_hash", "new_order_api_id", None)
             
             orders_params = [{
@@ -1386,9 +1429,9 @@ class TestPlaceOrdersBatch:
             assert orders_params[0]['target_price'] == pytest.approx(0.510, abs=0.0001)
             
             # Проверяем результат
-            assert results[0]['success'] is True
-            assert results[0]['order_hash'] == "new_order_hash"
-            assert results[0]['order_api_id'] == "new_order_api_id"
+            assert results[0].success is True
+            assert results[0].order_hash == "new_order_hash"
+            assert results[0].order_api_id == "new_order_api_id"
     
     @pytest.mark.asyncio
     async def test_place_orders_without_price_recalculation(self):
@@ -1424,7 +1467,7 @@ class TestPlaceOrdersBatch:
             assert call_args.kwargs['price'] == 0.500
             
             # Проверяем результат
-            assert results[0]['success'] is True
+            assert results[0].success is True
 
 
 class TestGetCurrentMarketPriceEdgeCases:
@@ -1481,6 +1524,109 @@ class TestGetCurrentMarketPriceEdgeCases:
         assert price is None
 
 
+class TestGetOrderbooksBulk:
+    """Тесты для функции get_orderbooks_bulk"""
+    
+    @pytest.mark.asyncio
+    async def test_one_request_per_market(self):
+        """Тест: orderbook каждого рынка запрашивается один раз, ошибки дают None"""
+        mock_api_client = AsyncMock()
+        
+        def get_orderbook_side_effect(market_id):
+            if market_id == 100:
+                return {'bids': [[0.48, 10], ['bad', 5], [0.52, 20]], 'asks': []}
+            raise Exception("Network error")
+        
+        mock_api_client.get_orderbook.side_effect = get_orderbook_side_effect
+        
+        best_bids = await get_orderbooks_bulk(mock_api_client, [100, 100, 200, 100])
+        
+        assert best_bids == {100: 0.52, 200: None}
+        assert mock_api_client.get_orderbook.call_count == 2
+    
+    def test_best_bid_unsorted_book(self):
+        """Тест: если биды не отсортированы по убыванию, лучший бид ищется полным проходом"""
+        from sync_orders import _best_bid
+        
+        assert _best_bid({'bids': [[0.50, 10], [0.49, 5]]}) == 0.50
+        assert _best_bid({'bids': [[0.48, 10], [0.52, 5], [0.50, 1]]}) == 0.52
+    
+    @pytest.mark.asyncio
+    async def test_cache_reused_until_invalidated(self):
+        """Тест: повторный запрос берется из кэша, после invalidate - запрашивается заново"""
+        from sync_orders import _OBCache
+        
+        mock_api_client = AsyncMock()
+        mock_api_client.get_orderbook.return_value = {'bids': [[0.5, 10]], 'asks': []}
+        ob_cache = _OBCache(ttl=60.0)
+        
+        assert await get_orderbooks_bulk(mock_api_client, [100], ob_cache) == {100: 0.5}
+        assert await get_orderbooks_bulk(mock_api_client, [100], ob_cache) == {100: 0.5}
+        assert mock_api_client.get_orderbook.call_count == 1
+        
+        ob_cache.invalidate(100)
+        await get_orderbooks_bulk(mock_api_client, [100], ob_cache)
+        assert mock_api_client.get_orderbook.call_count == 2
+
+
+class TestOrderRow:
+    """Тесты для разбора строки ордера из БД"""
+    
+    def test_from_db(self):
+        """Тест: поля читаются один раз, неполные ордера отбрасываются"""
+        from sync_orders import OrderRow
+        
+        db_order = {
+            "order_hash": "order_1",
+            "market_id": 100,
+            "token_id": "token_yes",
+            "token_name": "YES",
+            "side": "BUY",
+            "reposition_threshold_cents": "0.5",
+            "status": ORDER_STATUS_OPEN
+        }
+        
+        row = OrderRow.from_db(db_order)
+        assert row.order_hash == "order_1"
+        assert row.reposition_threshold_cents == 0.5
+        assert row.offset_ticks == 0
+        assert OrderRow.from_db({**db_order, "token_id": None}) is None
+        
+        # Числа из БД приводятся к float один раз при загрузке
+        from decimal import Decimal
+        row = OrderRow.from_db({**db_order, "current_price": Decimal("0.5"), "amount": 100})
+        assert type(row.current_price) is float
+        assert type(row.amount) is float
+
+
+class TestDecideReposition:
+    """Тесты для чистой функции решения о перестановке"""
+    
+    def test_decide_reposition(self):
+        """Тест: изменение целевой цены сравнивается с порогом в центах"""
+        from sync_orders import OrderRow, decide_reposition
+        
+        row = OrderRow.from_db({
+            "order_hash": "order_1",
+            "market_id": 100,
+            "token_id": "token_yes",
+            "token_name": "YES",
+            "side": "BUY",
+            "current_price": 0.500,
+            "target_price": 0.490,
+            "offset_ticks": 10,
+            "reposition_threshold_cents": 0.5,
+            "status": ORDER_STATUS_OPEN
+        })
+        
+        decision = decide_reposition(row, 0.510)
+        assert decision.new_target_price == pytest.approx(0.500)
+        assert decision.target_price_change_cents == pytest.approx(1.0)
+        assert decision.will_reposition is True
+        
+        assert decide_reposition(row, 0.503).will_reposition is False
+
+
 class TestProcessUserOrdersEdgeCases:
     """Тесты для граничных случаев process_user_orders"""
     
@@ -1529,12 +1675,12 @@ class TestProcessUserOrdersEdgeCases:
         }
         
         with patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
-             patch('sync_orders.get_current_market_price', new_callable=AsyncMock) as mock_get_price:
+             patch('sync_orders.get_orderbooks_bulk', new_callable=AsyncMock) as mock_get_bids:
             
             mock_get_orders.return_value = [db_order]
             # Мокируем таймаут при проверке статуса
             mock_api_client.get_order_by_id.side_effect = Exception("504 Gateway Time-out")
-            mock_get_price.return_value = 0.510
+            mock_get_bids.return_value = {100: 0.510}
             
             # Должна продолжиться обработка несмотря на таймаут
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
@@ -1542,6 +1688,42 @@ class TestProcessUserOrdersEdgeCases:
             # Обработка должна продолжиться (graceful degradation)
             assert len(orders_to_cancel) >= 0  # Может быть 0 или 1 в зависимости от изменения цены
     
+    @pytest.mark.asyncio
+    async def test_open_orders_listing_skips_per_order_probe(self, mock_api_client):
+        """Тест: ордер найден в списке открытых - get_order_by_id не вызывается"""
+        db_order = {
+            "order_hash": "order_open",
+            "order_api_id": "111",
+            "market_id": 100,
+            "market_title": "Test Market",
+            "market_slug": "test-market",
+            "token_id": "token_yes",
+            "token_name": "YES",
+            "side": "BUY",
+            "current_price": 0.500,
+            "target_price": 0.490,
+            "offset_ticks": 10,
+            "amount": 100.0,
+            "reposition_threshold_cents": 0.5,
+            "status": ORDER_STATUS_OPEN
+        }
+        
+        with patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
+             patch('sync_orders.get_orderbooks_bulk', new_callable=AsyncMock) as mock_get_bids:
+            
+            mock_get_orders.return_value = [db_order]
+            mock_api_client.get_my_orders.return_value = (
+                [{'status': ORDER_STATUS_OPEN, 'id': '111', 'order': {'hash': 'order_open'}}],
+                None,
+            )
+            mock_get_bids.return_value = {100: 0.510}
+            
+            orders_to_cancel, orders_to_place, _ = await process_user_orders(12345, mock_api_client)
+            
+            mock_api_client.get_order_by_id.assert_not_called()
+            assert orders_to_cancel == ["111"]
+            assert len(orders_to_place) == 1
+    
     @pytest.mark.asyncio
     async def test_get_price_failure_continues(self, mock_api_client):
         """Тест: ошибка получения цены - обработка продолжается для других ордеров"""
@@ -1581,7 +1763,7 @@ class TestProcessUserOrdersEdgeCases:
         ]
         
         with patch('sync_orders.get_user_orders', new_callable=AsyncMock) as mock_get_orders, \
-             patch('sync_orders.get_current_market_price', new_callable=AsyncMock) as mock_get_price:
+             patch('sync_orders.get_orderbooks_bulk', new_callable=AsyncMock) as mock_get_bids:
             
             mock_get_orders.return_value = db_orders
             
@@ -1599,15 +1781,9 @@ class TestProcessUserOrdersEdgeCases:
             
             mock_api_client.get_order_by_id.side_effect = get_order_side_effect
             
-            # Первый ордер: успешно получаем цену
-            # Второй ордер: ошибка получения цены
-            def get_price_side_effect(api_client, market_id, side, token_name):
-                if market_id == 100:
-                    return 0.510  # Успешно
-                else:
-                    return None  # Ошибка
-            
-            mock_get_price.side_effect = get_price_side_effect
+            # Первый рынок: успешно получаем цену
+            # Второй рынок: ошибка получения цены
+            mock_get_bids.return_value = {100: 0.510, 200: None}
             
             orders_to_cancel, orders_to_place, notifications = await process_user_orders(12345, mock_api_client)
             
@@ -1661,6 +1837,28 @@ class TestNotificationFunctions:
         assert "51.00 cents" in message  # new_current_price
         assert "Order will be repositioned" in message
     
+    @pytest.mark.asyncio
+    async def test_send_placement_error_notification_escapes_html(self):
+        """Тест: название рынка и текст ошибки экранируются для parse_mode=HTML"""
+        from sync_orders import send_order_placement_error_notification
+        
+        mock_bot = AsyncMock()
+        order_params = {
+            "market_title": "BTC > $100k & ETH < $5k?",
+            "token_name": "YES",
+            "side": Side.BUY,
+            "price": 0.5,
+            "amount": 10.0,
+        }
+        
+        await send_order_placement_error_notification(
+            mock_bot, 12345, order_params, "h", errno=400, errmsg="<invalid> order"
+        )
+        
+        message = mock_bot.send_message.call_args.kwargs['text']
+        assert "BTC &gt; $100k &amp; ETH &lt; $5k?" in message
+        assert "&lt;invalid&gt; order" in message
+    
     @pytest.mark.asyncio
     async def test_send_order_updated_notification(self):
         """Тест: отправка уведомления об успешном обновлении ордера"""
@@ -1726,6 +1924,39 @@ class TestNotificationFunctions:
         assert "100.5" in message  # amountFilled
         assert "View Market" in message
 
+    @pytest.mark.asyncio
+    async def test_send_order_filled_notification_wei_amount(self):
+        """Тест: amountFilled в wei переводится в USDT без потери точности"""
+        from sync_orders import send_order_filled_notification
+        
+        mock_bot = AsyncMock()
+        db_order = {"order_hash": "h", "market_title": "M", "market_slug": "m", "side": "SELL"}
+        
+        await send_order_filled_notification(
+            mock_bot, 12345, db_order, {"amountFilled": "123456789012345678901234567"}
+        )
+        
+        message = mock_bot.send_message.call_args.kwargs['text']
+        assert "123456789.012346 USDT" in message
+
+    @pytest.mark.asyncio
+    async def test_send_retries_after_flood_control(self):
+        """Тест: при TelegramRetryAfter сообщение отправляется повторно через retry_after"""
+        from aiogram.exceptions import TelegramRetryAfter
+        from sync_orders import _send_message
+        
+        mock_bot = AsyncMock()
+        mock_bot.send_message.side_effect = [
+            TelegramRetryAfter(method=MagicMock(), message="Too Many Requests", retry_after=5),
+            None,
+        ]
+        
+        with patch('sync_orders.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            assert await _send_message(mock_bot, "test", 1, "a") is True
+        
+        mock_sleep.assert_awaited_once_with(5)
+        assert mock_bot.send_message.call_count == 2
+
 
 class TestCancelOrdersBatchEdgeCases:
     """Тесты для граничных случаев cancel_orders_batch"""
@@ -1758,6 +1989,44 @@ class TestCancelOrdersBatchEdgeCases:
         assert 'API error' in result['cause']
         assert len(result['removed']) == 0
         assert len(result['noop']) == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancel_orders_split_by_api_limit(self):
+        """Тест: больше CANCEL_ORDERS_BATCH_SIZE ордеров отправляются частями"""
+        from sync_orders import CANCEL_ORDERS_BATCH_SIZE, cancel_orders_batch
+        
+        mock_api_client = AsyncMock()
+        mock_api_client.cancel_orders.side_effect = lambda order_ids: {
+            'success': True,
+            'removed': list(order_ids),
+            'noop': []
+        }
+        
+        orders_to_cancel = [f'order_{i}' for i in range(CANCEL_ORDERS_BATCH_SIZE + 5)]
+        result = await cancel_orders_batch(mock_api_client, orders_to_cancel)
+        
+        assert mock_api_client.cancel_orders.await_count == 2
+        assert result['success'] is True
+        assert result['removed'] == orders_to_cancel
+        assert 'cause' not in result
+    
+    @pytest.mark.asyncio
+    async def test_cancel_orders_partial_chunk_failure(self):
+        """Тест: ошибка одной из частей - обработаны не все ордера, причина сохраняется"""
+        from sync_orders import CANCEL_ORDERS_BATCH_SIZE, cancel_orders_batch
+        
+        mock_api_client = AsyncMock()
+        mock_api_client.cancel_orders.side_effect = [
+            {'success': True, 'removed': ['order_0'], 'noop': []},
+            Exception("API error"),
+        ]
+        
+        orders_to_cancel = [f'order_{i}' for i in range(CANCEL_ORDERS_BATCH_SIZE + 1)]
+        result = await cancel_orders_batch(mock_api_client, orders_to_cancel)
+        
+        assert result['success'] is True
+        assert result['removed'] == ['order_0']
+        assert 'API error' in result['cause']
 
 
 class TestPlaceOrdersBatchEdgeCases:
@@ -1782,8 +2051,8 @@ class TestPlaceOrdersBatchEdgeCases:
         results = await place_orders_batch(mock_api_client, orders_params)
         
         assert len(results) == 1
-        assert results[0]['success'] is False
-        assert 'Missing order_builder' in results[0]['error']
+        assert results[0].success is False
+        assert 'Missing order_builder' in results[0].error
     
     @pytest.mark.asyncio
     async def test_place_orders_invalid_side_type(self):
@@ -1804,8 +2073,8 @@ class TestPlaceOrdersBatchEdgeCases:
         results = await place_orders_batch(mock_api_client, orders_params)
         
         assert len(results) == 1
-        assert results[0]['success'] is False
-        assert 'Invalid side type' in results[0]['error']
+        assert results[0].success is False
+        assert 'Invalid side type' in results[0].error
     
     @pytest.mark.asyncio
     async def test_place_orders_get_market_error(self):
@@ -1832,6 +2101,145 @@ class TestPlaceOrdersBatchEdgeCases:
             
             # place_single_order должен быть вызван (использует дефолтные значения)
             assert mock_place_order.called
+    
+    @pytest.mark.asyncio
+    async def test_market_metadata_cached(self):
+        """Тест: данные рынка запрашиваются один раз и берутся из кэша"""
+        from sync_orders import _market_cache, get_market_cached
+        
+        _market_cache.clear()
+        mock_api_client = AsyncMock()
+        mock_api_client.get_market.return_value = {'feeRateBps': 100, 'isNegRisk': False}
+        
+        first = await get_market_cached(mock_api_client, 300)
+        second = await get_market_cached(mock_api_client, 300)
+        
+        assert first == second == {'feeRateBps': 100, 'isNegRisk': False}
+        mock_api_client.get_market.assert_called_once_with(market_id=300)
+        _market_cache.clear()
+
+
+class TestAsyncSyncAllOrders:
+    """Тесты для параллельной обработки пользователей в async_sync_all_orders"""
+
+    @pytest.mark.asyncio
+    async def test_users_processed_and_errors_counted(self):
+        """Тест: все пользователи обработаны, исключение одного не мешает остальным"""
+        from sync_orders import async_sync_all_orders
+
+        processed = []
+
+        async def fake_sync_user_orders(bot, telegram_id, http_session=None, ob_cache=None):
+            processed.append(telegram_id)
+            if telegram_id == 2:
+                raise RuntimeError("boom")
+            return {"cancelled": 1, "noop": 0, "processed": 1, "placed": 1, "errors": 0}
+
+        async def fake_iter_all_users():
+            for telegram_id in [1, 2, 3]:
+                yield telegram_id
+
+        with patch('sync_orders.iter_all_users', side_effect=fake_iter_all_users), \
+             patch('sync_orders.sync_user_orders', side_effect=fake_sync_user_orders):
+            await async_sync_all_orders(MagicMock())
+
+        assert sorted(processed) == [1, 2, 3]
+
+
+class TestSyncUserOrders:
+    """Тесты для перестановки ордеров одного пользователя"""
+
+    @pytest.mark.asyncio
+    async def test_placed_orders_saved_in_one_bulk_update(self):
+        """Тест: все размещенные ордера записываются в БД одним вызовом до уведомлений"""
+        import sync_orders
+        from sync_orders import PlaceResult, sync_user_orders
+
+        orders_to_place = [
+            {
+                "old_order_hash": f"old_{i}",
+                "market_id": 100 + i,
+                "side": Side.BUY,
+                "current_price_at_creation": 0.5,
+                "target_price": 0.49,
+            }
+            for i in range(2)
+        ]
+        place_results = [PlaceResult(True, f"new_{i}", f"api_{i}") for i in range(2)]
+        calls = []
+
+        async def fake_bulk_update(order_updates):
+            calls.append("db")
+
+        async def fake_send_updated(bot, telegram_id, order_params, new_order_hash):
+            calls.append("notify")
+
+        user = {"api_key": "k", "wallet_address": "0x1", "private_key": "0x2"}
+        with patch.dict('sync_orders._user_clients_cache', clear=True), \
+             patch('sync_orders.get_user', return_value=user), \
+             patch('sync_orders.PredictAPIClient'), \
+             patch('sync_orders.OrderBuilder'), \
+             patch('sync_orders.process_user_orders',
+                   return_value=(["api_old_0", "api_old_1"], orders_to_place, [])), \
+             patch('sync_orders.cancel_orders_batch',
+                   return_value={"success": True, "removed": ["api_old_0", "api_old_1"], "noop": []}), \
+             patch('sync_orders.place_orders_batch', return_value=place_results), \
+             patch('sync_orders.bulk_update_orders_in_db', side_effect=fake_bulk_update) as mock_bulk, \
+             patch('sync_orders.send_order_updated_notification', side_effect=fake_send_updated):
+            stats = await sync_user_orders(MagicMock(), 12345)
+            # Уведомления отправляются в фоне после записи в БД
+            assert calls == ["db"]
+            await sync_orders.drain_notifications()
+
+        mock_bulk.assert_called_once_with([
+            ("old_0", "new_0", 0.5, 0.49, "api_0"),
+            ("old_1", "new_1", 0.5, 0.49, "api_1"),
+        ])
+        assert calls == ["db", "notify", "notify"]
+        assert stats["placed"] == 2
+
+class TestUserClientsCache:
+    """Тесты для кэша клиентов пользователей между циклами синхронизации"""
+
+    @pytest.mark.asyncio
+    async def test_order_builder_reused_until_keys_change(self):
+        """Тест: OrderBuilder создается один раз и пересоздается при смене ключей"""
+        from sync_orders import get_user_clients, get_user_order_builder
+
+        user = {"api_key": "k", "wallet_address": "0x1", "private_key": "0x2"}
+        with patch.dict('sync_orders._user_clients_cache', clear=True), \
+             patch('sync_orders.PredictAPIClient'), \
+             patch('sync_orders.OrderBuilder') as mock_builder:
+            mock_builder.make.side_effect = lambda *args: object()
+
+            first = await get_user_order_builder(get_user_clients(user), user)
+            second = await get_user_order_builder(get_user_clients(user), user)
+            assert first is second
+            assert mock_builder.make.call_count == 1
+
+            changed = {**user, "private_key": "0x3"}
+            third = await get_user_order_builder(get_user_clients(changed), changed)
+            assert third is not first
+            assert mock_builder.make.call_count == 2
+
+    def test_prune_drops_expired_entries(self):
+        """Тест: записи старше USER_CLIENTS_CACHE_TTL удаляются вместе с ключами"""
+        import time
+        import sync_orders
+        from sync_orders import get_user_clients
+
+        fresh = {"api_key": "k1", "wallet_address": "0x1", "private_key": "0x2"}
+        stale = {"api_key": "k2", "wallet_address": "0x3", "private_key": "0x4"}
+        with patch.dict('sync_orders._user_clients_cache', clear=True), \
+             patch('sync_orders.PredictAPIClient'):
+            get_user_clients(fresh)
+            get_user_clients(stale).created_at = (
+                time.monotonic() - sync_orders.USER_CLIENTS_CACHE_TTL
+            )
+
+            sync_orders._prune_user_clients_cache()
+
+            assert list(sync_orders._user_clients_cache) == ["0x1"]
 
 
 if __name__ == "__main__":